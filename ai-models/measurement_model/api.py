@@ -4,12 +4,22 @@ Qeyafa AI Measurement Service
 FastAPI API for body measurement extraction from photos
 """
 
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, APIRouter, File, UploadFile, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List
 import os
+import sys
 from dotenv import load_dotenv
 
+if __package__ in (None, ''):
+    # Allow running as a script: python measurement_model/api.py
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from measurement_model.batching import MicroBatcher
+from measurement_model.executor import ExecutorBusy, InferenceExecutor
+
 # Load environment variables
 load_dotenv()
 
@@ -17,9 +27,72 @@ load_dotenv()
 router = APIRouter()
 
 # Configuration
-UPLOAD_FOLDER = 'data/input'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
+ALLOWED_TYPES = ['image/jpeg', 'image/png', 'image/jpg']
+
+# Batching: concurrent single requests arriving within BATCH_WINDOW_MS of
+# each other are run through the model together (up to MAX_BATCH_SIZE)
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', 32))
+BATCH_WINDOW_MS = float(os.getenv('BATCH_WINDOW_MS', 5))
+
+# Inference runs on a pool of workers (one model per worker) so CPU-bound
+# work never blocks the event loop. When INFERENCE_QUEUE_SIZE requests are
+# already waiting, new ones get 503 with Retry-After instead of piling up.
+INFERENCE_EXECUTOR = os.getenv('INFERENCE_EXECUTOR', 'process')
+INFERENCE_WORKERS = int(os.getenv('INFERENCE_WORKERS', 0)) or os.cpu_count() or 1
+INFERENCE_QUEUE_SIZE = int(os.getenv('INFERENCE_QUEUE_SIZE', 256))
+RETRY_AFTER_SECONDS = int(os.getenv('RETRY_AFTER_SECONDS', 1))
+
+executor = InferenceExecutor(mode=INFERENCE_EXECUTOR, workers=INFERENCE_WORKERS)
+batcher = MicroBatcher(
+    executor.process_batch,
+    max_batch_size=MAX_BATCH_SIZE,
+    window_ms=BATCH_WINDOW_MS,
+    max_queue_size=INFERENCE_QUEUE_SIZE,
+    max_concurrent_batches=INFERENCE_WORKERS,
+)
+
+
+def service_busy():
+    """503 telling the client when to retry"""
+    return HTTPException(
+        status_code=503,
+        detail='Measurement service is busy. Please retry shortly.',
+        headers={'Retry-After': str(RETRY_AFTER_SECONDS)}
+    )
+
+
+async def read_photos(photo_front, photo_back, photo_left, photo_right):
+    """Validate the 4 views of one subject and read them into memory"""
+    photos = {'front': photo_front, 'back': photo_back, 'left': photo_left, 'right': photo_right}
+    for photo in photos.values():
+        if photo.content_type not in ALLOWED_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f'Invalid file type for {photo.filename}. Only JPEG and PNG are allowed.'
+            )
+    return {view: await photo.read() for view, photo in photos.items()}
+
+
+def check_decoded(result):
+    """Reject a subject whose photos the model could not decode"""
+    if 'error' in result:
+        raise HTTPException(
+            status_code=400,
+            detail='Could not decode photos. Only JPEG and PNG images are allowed.'
+        )
+    return result
+
+
+def format_result(result, height, weight):
+    """Shape a model result like the single-subject API response data"""
+    return {
+        'measurements': result['measurements'],
+        'unit': 'cm',
+        'confidence': result['confidence'],
+        'height': height,
+        'weight': weight
+    }
 
 @router.get('/health')
 async def health_check():
@@ -61,53 +134,30 @@ async def process_measurements(
                 'status': 'error',
                 'data': {}
             }
-        # Validate files are images
-        allowed_types = ['image/jpeg', 'image/png', 'image/jpg']
-        photos = [photo_front, photo_back, photo_left, photo_right]
-        
-        for photo in photos:
-            if photo.content_type not in allowed_types:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f'Invalid file type for {photo.filename}. Only JPEG and PNG are allowed.'
-                )
-        
+        # Validate files are images and read them
+        photos = await read_photos(photo_front, photo_back, photo_left, photo_right)
+
         # Validate height and weight
         if height <= 0 or weight <= 0:
             raise HTTPException(
                 status_code=400,
                 detail='Height and weight must be positive numbers'
             )
-        
-        # TODO: Implement actual AI processing
-        # For MVP, return mock measurements
-        # In production, this would:
-        # 1. Save uploaded photos
-        # 2. Preprocess images
-        # 3. Run through ML model
-        # 4. Extract measurements
-        # 5. Apply calibration based on height/weight
-        
-        measurements = {
-            'chest': calculate_measurement(height, weight, 'chest'),
-            'waist': calculate_measurement(height, weight, 'waist'),
-            'shoulders': calculate_measurement(height, weight, 'shoulders'),
-            'arm_length': calculate_measurement(height, weight, 'arm'),
-            'neck': calculate_measurement(height, weight, 'neck'),
-            'hip': calculate_measurement(height, weight, 'hip'),
-        }
-        
+
+        # Coalesce with concurrent requests into a single model batch; the
+        # worker decodes the photos, and a bad photo fails only this request
+        try:
+            result = await batcher.submit({'photos': photos, 'height': height, 'weight': weight})
+        except (asyncio.QueueFull, ExecutorBusy):
+            # The batch queue is full, or the batch found every worker busy
+            raise service_busy()
+        check_decoded(result)
+
         return {
             'status': 'success',
-            'data': {
-                'measurements': measurements,
-                'unit': 'cm',
-                'confidence': 0.92,
-                'height': height,
-                'weight': weight
-            }
+            'data': format_result(result, height, weight)
         }
-        
+
     except HTTPException:
         raise
     except Exception as e:
@@ -118,30 +168,75 @@ async def process_measurements(
             detail='Failed to process measurements. Please try again.'
         )
 
-def calculate_measurement(height: float, weight: float, body_part: str) -> float:
+@router.post('/api/measurements/process-batch')
+async def process_measurements_batch(
+    photo_front: List[UploadFile] = File(...),
+    photo_back: List[UploadFile] = File(...),
+    photo_left: List[UploadFile] = File(...),
+    photo_right: List[UploadFile] = File(...),
+    height: List[float] = Form(...),
+    weight: List[float] = Form(...),
+):
     """
-    Calculate body measurements based on height and weight
-    This is a simplified algorithm for MVP
-    In production, this would use the AI model
+    Process body measurements for several subjects in one model pass
+
+    Expected form data (repeat each field once per subject, in the same order):
+    - photo_front, photo_back, photo_left, photo_right: files
+    - height: number (cm)
+    - weight: number (kg)
+
+    Results are returned in subject order.
     """
-    # BMI calculation
-    bmi = weight / ((height / 100) ** 2)
-    
-    # Base measurements (for average BMI of 22)
-    base_measurements = {
-        'chest': height * 0.56,
-        'waist': height * 0.47,
-        'shoulders': height * 0.25,
-        'arm': height * 0.36,
-        'neck': height * 0.22,
-        'hip': height * 0.55,
-    }
-    
-    # Adjust for BMI
-    bmi_factor = bmi / 22.0
-    adjusted = base_measurements[body_part] * (0.85 + 0.15 * bmi_factor)
-    
-    return round(adjusted, 1)
+    try:
+        count = len(height)
+        fields = [photo_front, photo_back, photo_left, photo_right, weight]
+        if any(len(field) != count for field in fields):
+            raise HTTPException(
+                status_code=400,
+                detail='Each subject needs 4 photos, a height and a weight'
+            )
+        if count > MAX_BATCH_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f'At most {MAX_BATCH_SIZE} subjects can be processed per batch'
+            )
+        if any(h <= 0 for h in height) or any(w <= 0 for w in weight):
+            raise HTTPException(
+                status_code=400,
+                detail='Height and weight must be positive numbers'
+            )
+
+        subjects = []
+        for i in range(count):
+            photos = await read_photos(photo_front[i], photo_back[i], photo_left[i], photo_right[i])
+            subjects.append({'photos': photos, 'height': height[i], 'weight': weight[i]})
+
+        try:
+            results = await executor.process_batch(subjects)
+        except ExecutorBusy:
+            raise service_busy()
+        for result in results:
+            check_decoded(result)
+
+        return {
+            'status': 'success',
+            'data': {
+                'results': [
+                    format_result(result, subject['height'], subject['weight'])
+                    for result, subject in zip(results, subjects)
+                ]
+            }
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        # Log error for debugging but don't expose stack trace
+        print(f'Error processing measurement batch: {str(e)}')
+        raise HTTPException(
+            status_code=500,
+            detail='Failed to process measurements. Please try again.'
+        )
 
 @router.post('/api/measurements/validate')
 async def validate_photo(photo: UploadFile = File(...)):
@@ -182,8 +277,17 @@ async def validate_photo(photo: UploadFile = File(...)):
             detail='Failed to validate photo. Please try again.'
         )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    executor.start()
+    batcher.start()
+    yield
+    await batcher.stop()
+    executor.shutdown()
+
+
 # Create FastAPI app and include router
-app = FastAPI(title="Qeyafa AI Measurement Service", version="1.0.0")
+app = FastAPI(title="Qeyafa AI Measurement Service", version="1.0.0", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -0,0 +1,126 @@
+"""
+Micro-batching for measurement inference
+Coalesces concurrent single-subject requests into one model batch
+"""
+
+import asyncio
+
+
+class MicroBatcher:
+    """
+    Collects items submitted by concurrent requests and processes them together
+
+    The first queued item opens a window of `window_ms` milliseconds; every
+    item that arrives before the window closes (up to `max_batch_size`) is
+    passed to `process_batch` in a single call. Up to `max_concurrent_batches`
+    batches run at once; while they are all busy, new items wait in a queue
+    of at most `max_queue_size` items and form the next, larger batch.
+    """
+
+    def __init__(self, process_batch, max_batch_size=32, window_ms=5.0,
+                 max_queue_size=0, max_concurrent_batches=1):
+        """
+        Args:
+            process_batch: Coroutine function taking a list of items and
+                returning a list of results in the same order
+            max_batch_size: Maximum number of items per batch
+            window_ms: How long to wait for more items after the first one
+            max_queue_size: Maximum items waiting for a batch (0 for unbounded)
+            max_concurrent_batches: Maximum batches processed at the same time
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000.0
+        self.max_queue_size = max_queue_size
+        self.max_concurrent_batches = max_concurrent_batches
+        self._queue = None
+        self._task = None
+        self._slots = None
+        self._batches = set()
+
+    def start(self):
+        """Start the batching loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the batching loop and fail any items still waiting"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._batches):
+            task.cancel()
+        await asyncio.gather(*self._batches, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError('Batcher stopped'))
+
+    async def submit(self, item):
+        """
+        Queue one item and wait for its result
+
+        Raises:
+            asyncio.QueueFull: If max_queue_size items are already waiting
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        # Skip requests whose clients have gone away
+        return [(item, future) for item, future in batch if not future.done()]
+
+    async def _run(self):
+        while True:
+            # Wait for a free slot first so items keep queueing (and batches
+            # keep growing) while every slot is busy
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._process(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _process(self, batch):
+        try:
+            results = await self.process_batch([item for item, _ in batch])
+        except asyncio.CancelledError:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError('Batcher stopped'))
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,102 @@
+"""
+Inference executor
+Runs CPU-bound model work on a thread or process pool so the event loop stays free
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from measurement_model.model import MeasurementModel
+
+# Per-worker state: each pool thread or process loads its own model once
+_worker = threading.local()
+
+
+class ExecutorBusy(Exception):
+    """Raised when the executor already has its maximum number of pending jobs"""
+    pass
+
+
+def _init_worker():
+    """Pool initializer: load the model weights once per worker"""
+    _worker.model = MeasurementModel()
+
+
+def _process_batch(subjects):
+    """Run one batch on the calling worker's model"""
+    return _worker.model.process_batch(subjects)
+
+
+class InferenceExecutor:
+    """
+    Dispatches model batches to a pool of workers with a bounded backlog
+
+    In 'process' mode every core runs inference in parallel regardless of the
+    GIL; 'thread' mode avoids pickling the photos and suits models
+    whose heavy lifting (OpenCV, numpy, ML runtimes) releases the GIL.
+    """
+
+    def __init__(self, mode='process', workers=None, max_pending=None):
+        """
+        Args:
+            mode: 'process' or 'thread'
+            workers: Number of pool workers (default: number of CPU cores)
+            max_pending: Maximum batches running or waiting for a worker
+                before new work is rejected (default: 2 x workers)
+        """
+        if mode not in ('process', 'thread'):
+            raise ValueError(f"Inference executor mode must be 'process' or 'thread', got: {mode}")
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.workers
+        self._pending = 0
+        self._pool = None
+
+    def start(self):
+        """Create the worker pool"""
+        if self._pool is not None:
+            return
+        if self.mode == 'process':
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix='inference',
+                initializer=_init_worker,
+            )
+
+    def shutdown(self):
+        """Stop the worker pool, cancelling work that has not started"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    @property
+    def pending(self):
+        """Number of batches running or waiting for a worker"""
+        return self._pending
+
+    async def process_batch(self, subjects):
+        """
+        Run MeasurementModel.process_batch on a pool worker
+
+        Raises:
+            ExecutorBusy: If max_pending batches are already in flight
+        """
+        if self._pending >= self.max_pending:
+            raise ExecutorBusy('Inference workers are busy')
+        self.start()
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, _process_batch, subjects)
+        finally:
+            self._pending -= 1
@@ -7,6 +7,20 @@ import cv2
 import numpy as np
 # import mediapipe as mp
 
+# Output measurements, in the column order produced by estimate_batch
+MEASUREMENT_NAMES = ('chest', 'waist', 'shoulders', 'arm_length', 'neck', 'hip')
+
+# Measurement / height ratios for an average BMI of 22 (MVP calibration)
+HEIGHT_RATIOS = np.array([0.56, 0.47, 0.25, 0.36, 0.22, 0.55], dtype=np.float64)
+
+REFERENCE_BMI = 22.0
+MVP_CONFIDENCE = 0.92
+
+# Model input size (square) and photo views per subject, in input order
+INPUT_SIZE = 224
+VIEWS = ('front', 'back', 'left', 'right')
+
+
 class MeasurementModel:
     """
     AI Model for extracting body measurements from photos
@@ -19,6 +33,63 @@ class MeasurementModel:
         # self.pose_detector = mp.solutions.pose.Pose()
         pass
     
+    def decode_images(self, images, out=None):
+        """
+        Decode encoded images (JPEG/PNG bytes) into a uint8 NHWC batch
+
+        Each image is decoded in memory and resized straight into its slot
+        of a preallocated buffer, so no temporary files or per-image
+        float arrays are created.
+
+        Args:
+            images: Sequence of encoded image bytes
+            out: Optional uint8 buffer of shape (len(images), INPUT_SIZE, INPUT_SIZE, 3)
+
+        Returns:
+            uint8 array of shape (N, INPUT_SIZE, INPUT_SIZE, 3)
+
+        Raises:
+            ValueError: If an image cannot be decoded
+        """
+        if out is None:
+            out = np.empty((len(images), INPUT_SIZE, INPUT_SIZE, 3), dtype=np.uint8)
+
+        for i, data in enumerate(images):
+            try:
+                img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            except cv2.error:
+                # e.g. an empty buffer
+                img = None
+            if img is None:
+                raise ValueError(f'Could not decode image {i}')
+            cv2.resize(img, (INPUT_SIZE, INPUT_SIZE), dst=out[i])
+
+        return out
+
+    def normalize(self, batch):
+        """
+        Scale a uint8 batch to float32 in [0, 1] in one vectorized op
+
+        Args:
+            batch: uint8 array of any shape
+
+        Returns:
+            float32 array of the same shape
+        """
+        return np.multiply(batch, np.float32(1.0 / 255.0), dtype=np.float32)
+
+    def preprocess_batch(self, images):
+        """
+        Preprocess encoded images for model input
+
+        Args:
+            images: Sequence of encoded image bytes
+
+        Returns:
+            float32 tensor of shape (N, INPUT_SIZE, INPUT_SIZE, 3)
+        """
+        return self.normalize(self.decode_images(images))
+
     def preprocess_image(self, image_path):
         """
         Preprocess image for model input
@@ -29,16 +100,8 @@ class MeasurementModel:
         Returns:
             Preprocessed image tensor
         """
-        # Load image
-        img = cv2.imread(image_path)
-        
-        # Resize to model input size
-        img_resized = cv2.resize(img, (224, 224))
-        
-        # Normalize
-        img_normalized = img_resized / 255.0
-        
-        return img_normalized
+        with open(image_path, 'rb') as f:
+            return self.preprocess_batch([f.read()])[0]
     
     def extract_keypoints(self, image):
         """
@@ -116,3 +179,90 @@ class MeasurementModel:
             'measurements': {},
             'confidence': 0.0
         }
+
+    def estimate_batch(self, images, heights, weights):
+        """
+        Estimate measurements for a batch of subjects in one vectorized pass
+
+        This is the MVP height/weight calibration and does not look at the
+        images yet; once the trained model is available its batched forward
+        pass over `images` replaces this computation.
+
+        Args:
+            images: float32 tensor of shape (N, len(VIEWS), INPUT_SIZE, INPUT_SIZE, 3)
+            heights: Sequence of heights in cm, one per subject
+            weights: Sequence of weights in kg, one per subject
+
+        Returns:
+            Array of shape (N, len(MEASUREMENT_NAMES)) in cm
+        """
+        heights = np.asarray(heights, dtype=np.float64)
+        weights = np.asarray(weights, dtype=np.float64)
+
+        # BMI adjustment relative to the reference BMI
+        bmi = weights / ((heights / 100) ** 2)
+        bmi_factor = 0.85 + 0.15 * (bmi / REFERENCE_BMI)
+
+        base = heights[:, None] * HEIGHT_RATIOS[None, :]
+        return np.round(base * bmi_factor[:, None], 1)
+
+    def decode_views(self, photos, out=None):
+        """
+        Decode the 4 views of one subject
+
+        Args:
+            photos: Dict of view name -> encoded image bytes
+            out: Optional uint8 buffer of shape (len(VIEWS), INPUT_SIZE, INPUT_SIZE, 3),
+                e.g. the subject's slot of a batch buffer
+
+        Returns:
+            uint8 array of shape (len(VIEWS), INPUT_SIZE, INPUT_SIZE, 3)
+
+        Raises:
+            ValueError: If a view cannot be decoded
+        """
+        return self.decode_images([photos[view] for view in VIEWS], out=out)
+
+    def process_batch(self, subjects):
+        """
+        Process a batch of subjects (4 photos + height/weight each)
+
+        Every subject's photos are decoded straight into its slot of one
+        preallocated uint8 batch buffer, which is then normalized at once.
+
+        Args:
+            subjects: List of dicts with 'photos' (view name -> encoded
+                image bytes), 'height' (cm) and 'weight' (kg)
+
+        Returns:
+            List, in input order, of dicts with 'measurements' and
+            'confidence', or with 'error' for a subject whose photos could
+            not be decoded (the other subjects are still processed)
+        """
+        if not subjects:
+            return []
+
+        batch = np.empty((len(subjects), len(VIEWS), INPUT_SIZE, INPUT_SIZE, 3), dtype=np.uint8)
+        decoded = []
+        errors = {}
+        for i, subject in enumerate(subjects):
+            try:
+                self.decode_views(subject['photos'], out=batch[len(decoded)])
+            except ValueError as e:
+                errors[i] = str(e)
+                continue
+            decoded.append(subject)
+
+        values = self.estimate_batch(
+            self.normalize(batch[:len(decoded)]),
+            [subject['height'] for subject in decoded],
+            [subject['weight'] for subject in decoded],
+        )
+        rows = iter(values)
+        return [
+            {'error': errors[i]} if i in errors else {
+                'measurements': dict(zip(MEASUREMENT_NAMES, next(rows).tolist())),
+                'confidence': MVP_CONFIDENCE,
+            }
+            for i in range(len(subjects))
+        ]
@@ -0,0 +1,49 @@
+"""
+Pytest configuration for the AI measurement service tests.
+"""
+import os
+import sys
+from pathlib import Path
+
+# Make 'measurement_model' importable when running `pytest tests/` from ai-models
+ai_models_path = Path(__file__).resolve().parents[1]
+if str(ai_models_path) not in sys.path:
+    sys.path.insert(0, str(ai_models_path))
+
+# Thread workers start instantly and share the test process; set before the
+# API module reads its configuration
+os.environ.setdefault('INFERENCE_EXECUTOR', 'thread')
+os.environ.setdefault('INFERENCE_WORKERS', '2')
+
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+
+def encode_image(color, size=(320, 240), ext='.png'):
+    """Encoded image bytes of a solid color with a gradient, so resizing is not trivial"""
+    height, width = size
+    img = np.empty((height, width, 3), dtype=np.uint8)
+    img[...] = color
+    img[:, :, 0] = np.linspace(0, 255, width, dtype=np.uint8)[None, :]
+    ok, data = cv2.imencode(ext, img)
+    assert ok
+    return data.tobytes()
+
+
+def subject_files(colors=((10, 20, 30), (40, 50, 60), (70, 80, 90), (100, 110, 120))):
+    """Multipart files for the 4 views of one subject"""
+    return [
+        (f'photo_{view}', (f'{view}.png', encode_image(color), 'image/png'))
+        for view, color in zip(('front', 'back', 'left', 'right'), colors)
+    ]
+
+
+@pytest.fixture
+def client():
+    """Test client with the service lifespan (inference workers and batcher) running"""
+    from measurement_model.api import app
+
+    with TestClient(app) as test_client:
+        yield test_client
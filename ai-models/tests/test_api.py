@@ -0,0 +1,118 @@
+"""
+Tests for the measurement API endpoints.
+"""
+
+import asyncio
+
+import pytest
+
+from conftest import subject_files
+from measurement_model import api
+
+
+def test_process_returns_measurements(client):
+    response = client.post(
+        '/api/measurements/process',
+        files=subject_files(),
+        data={'height': 175, 'weight': 70},
+    )
+
+    assert response.status_code == 200
+    data = response.json()['data']
+    assert data['height'] == 175 and data['unit'] == 'cm'
+    assert set(data['measurements']) == {'chest', 'waist', 'shoulders', 'arm_length', 'neck', 'hip'}
+
+
+def test_process_batch_returns_results_in_subject_order(client):
+    heights = [150, 175, 190]
+    files = [field for _ in heights for field in subject_files()]
+    response = client.post(
+        '/api/measurements/process-batch',
+        files=files,
+        data={'height': heights, 'weight': [50, 70, 95]},
+    )
+
+    assert response.status_code == 200
+    results = response.json()['data']['results']
+    assert [result['height'] for result in results] == heights
+    assert [result['weight'] for result in results] == [50, 70, 95]
+    # Same result as processing each subject on its own
+    for result, height, weight in zip(results, heights, [50, 70, 95]):
+        single = client.post(
+            '/api/measurements/process',
+            files=subject_files(),
+            data={'height': height, 'weight': weight},
+        ).json()['data']
+        assert result['measurements'] == single['measurements']
+
+
+def test_process_batch_rejects_mismatched_field_counts(client):
+    files = [field for _ in range(2) for field in subject_files()]
+    # One photo_front too few for two subjects
+    files.remove(next(field for field in files if field[0] == 'photo_front'))
+    response = client.post(
+        '/api/measurements/process-batch',
+        files=files,
+        data={'height': [170, 180], 'weight': [60, 80]},
+    )
+
+    assert response.status_code == 400
+    assert response.json()['detail'] == 'Each subject needs 4 photos, a height and a weight'
+
+    response = client.post(
+        '/api/measurements/process-batch',
+        files=[field for _ in range(2) for field in subject_files()],
+        data={'height': [170, 180], 'weight': [60]},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('data', [b'not an image', b'', b'\x89PNG\r\n\x1a\n' + b'0' * 20])
+def test_undecodable_photos_are_rejected_with_400(client, data):
+    files = subject_files()
+    files[2] = ('photo_left', ('left.png', data, 'image/png'))
+
+    single = client.post('/api/measurements/process', files=files, data={'height': 175, 'weight': 70})
+    batch = client.post(
+        '/api/measurements/process-batch',
+        files=subject_files() + files,
+        data={'height': [170, 175], 'weight': [60, 70]},
+    )
+
+    for response in (single, batch):
+        assert response.status_code == 400
+        assert response.json()['detail'] == 'Could not decode photos. Only JPEG and PNG images are allowed.'
+
+
+def test_process_returns_503_when_the_batch_queue_is_full(client, monkeypatch):
+    async def queue_full(item):
+        raise asyncio.QueueFull()
+
+    monkeypatch.setattr(api.batcher, 'submit', queue_full)
+    response = client.post(
+        '/api/measurements/process',
+        files=subject_files(),
+        data={'height': 175, 'weight': 70},
+    )
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(api.RETRY_AFTER_SECONDS)
+
+
+def test_requests_get_503_while_inference_workers_are_busy(client, monkeypatch):
+    monkeypatch.setattr(api.executor, '_pending', api.executor.max_pending)
+
+    single = client.post(
+        '/api/measurements/process',
+        files=subject_files(),
+        data={'height': 175, 'weight': 70},
+    )
+    batch = client.post(
+        '/api/measurements/process-batch',
+        files=subject_files(),
+        data={'height': [175], 'weight': [70]},
+    )
+
+    for response in (single, batch):
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == str(api.RETRY_AFTER_SECONDS)
@@ -0,0 +1,95 @@
+"""
+Tests for request micro-batching.
+"""
+
+import asyncio
+
+import pytest
+
+from measurement_model.batching import MicroBatcher
+
+
+def test_concurrent_items_are_coalesced_into_one_batch():
+    batches = []
+
+    async def process_batch(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+
+    async def run():
+        batcher = MicroBatcher(process_batch, max_batch_size=8, window_ms=50)
+        try:
+            return await asyncio.gather(*(batcher.submit(item) for item in range(5)))
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(run())
+
+    assert batches == [[0, 1, 2, 3, 4]]
+    # Each caller gets the result of its own item
+    assert results == [0, 10, 20, 30, 40]
+
+
+def test_batches_are_split_at_max_batch_size():
+    batches = []
+
+    async def process_batch(items):
+        batches.append(list(items))
+        return [-item for item in items]
+
+    async def run():
+        batcher = MicroBatcher(process_batch, max_batch_size=2, window_ms=50, max_concurrent_batches=2)
+        try:
+            return await asyncio.gather(*(batcher.submit(item) for item in range(5)))
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(run())
+
+    assert sorted(len(batch) for batch in batches) == [1, 2, 2]
+    assert sorted(item for batch in batches for item in batch) == [0, 1, 2, 3, 4]
+    assert results == [0, -1, -2, -3, -4]
+
+
+def test_batch_failure_is_raised_to_every_caller():
+    async def process_batch(items):
+        raise RuntimeError('model failed')
+
+    async def run():
+        batcher = MicroBatcher(process_batch, window_ms=20)
+        try:
+            return await asyncio.gather(*(batcher.submit(item) for item in range(3)), return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(run())
+
+    assert [str(result) for result in results] == ['model failed'] * 3
+
+
+def test_submit_raises_queue_full_while_all_batches_are_busy():
+    async def run():
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def process_batch(items):
+            started.set()
+            await release.wait()
+            return items
+
+        batcher = MicroBatcher(process_batch, window_ms=1, max_queue_size=1, max_concurrent_batches=1)
+        try:
+            running = asyncio.create_task(batcher.submit('running'))
+            await started.wait()
+            # The only slot is busy, so this one waits in the queue ...
+            waiting = asyncio.create_task(batcher.submit('waiting'))
+            await asyncio.sleep(0)
+            # ... which is now full
+            with pytest.raises(asyncio.QueueFull):
+                await batcher.submit('rejected')
+            release.set()
+            return await running, await waiting
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(run()) == ('running', 'waiting')
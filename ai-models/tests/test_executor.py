@@ -0,0 +1,63 @@
+"""
+Tests for the bounded inference executor.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from conftest import subject_files
+from measurement_model import executor as executor_module
+from measurement_model.executor import ExecutorBusy, InferenceExecutor
+from measurement_model.model import VIEWS, MeasurementModel
+
+
+def test_thread_executor_runs_batches_on_the_model():
+    model = MeasurementModel()
+    photos = {view: data for (_, (_, data, _)), view in zip(subject_files(), VIEWS)}
+    subjects = [{'photos': photos, 'height': 175.0, 'weight': 70.0}]
+    executor = InferenceExecutor(mode='thread', workers=1)
+
+    try:
+        results = asyncio.run(executor.process_batch(subjects))
+    finally:
+        executor.shutdown()
+
+    assert results == model.process_batch(subjects)
+    assert executor.pending == 0
+
+
+def test_executor_rejects_work_beyond_max_pending(monkeypatch):
+    release = threading.Event()
+
+    def blocking_batch(subjects):
+        release.wait(5)
+        return subjects
+
+    monkeypatch.setattr(executor_module, '_process_batch', blocking_batch)
+    executor = InferenceExecutor(mode='thread', workers=1, max_pending=2)
+
+    async def run():
+        # One batch running and one waiting for the only worker
+        batches = [asyncio.create_task(executor.process_batch([i])) for i in range(2)]
+        await asyncio.sleep(0)
+        assert executor.pending == 2
+        with pytest.raises(ExecutorBusy):
+            await executor.process_batch([2])
+        release.set()
+        results = await asyncio.gather(*batches)
+        # Capacity is available again once the batches finish
+        results.append(await executor.process_batch([3]))
+        return results
+
+    try:
+        assert asyncio.run(run()) == [[0], [1], [3]]
+    finally:
+        executor.shutdown()
+    assert executor.pending == 0
+
+
+def test_executor_mode_is_validated():
+    with pytest.raises(ValueError):
+        InferenceExecutor(mode='gpu')
@@ -0,0 +1,106 @@
+"""
+Tests for batched photo preprocessing and measurement estimation.
+
+The golden tests compare against the single-image path the service used
+before batching: cv2.imread of a file, resize, divide by 255, and the
+per-measurement height/BMI formula.
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from conftest import encode_image, subject_files
+from measurement_model.model import INPUT_SIZE, MEASUREMENT_NAMES, VIEWS, MeasurementModel
+
+# Baseline per-measurement height ratios (arm_length was called 'arm')
+BASELINE_RATIOS = {'chest': 0.56, 'waist': 0.47, 'shoulders': 0.25, 'arm_length': 0.36, 'neck': 0.22, 'hip': 0.55}
+
+
+def baseline_preprocess(path):
+    img = cv2.imread(str(path))
+    return cv2.resize(img, (224, 224)) / 255.0
+
+
+def baseline_measurement(height, weight, name):
+    bmi = weight / ((height / 100) ** 2)
+    bmi_factor = bmi / 22.0
+    return round(height * BASELINE_RATIOS[name] * (0.85 + 0.15 * bmi_factor), 1)
+
+
+@pytest.mark.parametrize('ext', ['.png', '.jpg'])
+def test_batched_preprocessing_matches_single_image_path(tmp_path, ext):
+    model = MeasurementModel()
+    images = [encode_image(color, size=size, ext=ext) for color, size in (
+        ((10, 200, 30), (640, 480)),
+        ((90, 20, 250), (100, 180)),
+        ((0, 0, 0), (224, 224)),
+    )]
+    paths = []
+    for i, data in enumerate(images):
+        paths.append(tmp_path / f'{i}{ext}')
+        paths[-1].write_bytes(data)
+
+    batch = model.preprocess_batch(images)
+
+    assert batch.shape == (len(images), INPUT_SIZE, INPUT_SIZE, 3)
+    assert batch.dtype == np.float32
+    for i, path in enumerate(paths):
+        np.testing.assert_allclose(batch[i], baseline_preprocess(path), atol=1e-6)
+        np.testing.assert_allclose(model.preprocess_image(str(path)), baseline_preprocess(path), atol=1e-6)
+
+
+def test_batched_measurements_match_baseline_formula():
+    model = MeasurementModel()
+    photos = {view: data for (_, (_, data, _)), view in zip(subject_files(), VIEWS)}
+    subjects = [
+        {'photos': photos, 'height': height, 'weight': weight}
+        for height, weight in ((175.0, 70.0), (150.5, 48.2), (198.0, 120.0), (160.0, 55.0))
+    ]
+
+    results = model.process_batch(subjects)
+
+    assert len(results) == len(subjects)
+    for subject, result in zip(subjects, results):
+        assert list(result['measurements']) == list(MEASUREMENT_NAMES)
+        assert result['measurements'] == {
+            name: baseline_measurement(subject['height'], subject['weight'], name) for name in MEASUREMENT_NAMES
+        }
+        assert result['confidence'] == 0.92
+    # Batching does not change a subject's result
+    assert model.process_batch(subjects[1:2]) == results[1:2]
+
+
+def test_undecodable_image_raises_value_error():
+    model = MeasurementModel()
+    with pytest.raises(ValueError):
+        model.decode_images([encode_image((1, 2, 3)), b'not an image'])
+    with pytest.raises(ValueError):
+        model.decode_images([b''])
+
+
+def test_views_are_decoded_into_the_given_buffer():
+    model = MeasurementModel()
+    photos = {view: data for (_, (_, data, _)), view in zip(subject_files(), VIEWS)}
+    batch = np.zeros((2, len(VIEWS), INPUT_SIZE, INPUT_SIZE, 3), dtype=np.uint8)
+
+    views = model.decode_views(photos, out=batch[1])
+
+    assert np.shares_memory(views, batch)
+    np.testing.assert_array_equal(batch[1], model.decode_images([photos[view] for view in VIEWS]))
+    assert not batch[0].any()
+
+
+def test_undecodable_subject_does_not_fail_the_batch():
+    model = MeasurementModel()
+    photos = {view: data for (_, (_, data, _)), view in zip(subject_files(), VIEWS)}
+    subjects = [
+        {'photos': photos, 'height': 175.0, 'weight': 70.0},
+        {'photos': {**photos, 'left': b'not an image'}, 'height': 160.0, 'weight': 55.0},
+        {'photos': photos, 'height': 198.0, 'weight': 120.0},
+    ]
+
+    results = model.process_batch(subjects)
+
+    assert 'error' in results[1]
+    assert [results[0], results[2]] == model.process_batch([subjects[0], subjects[2]])
@@ -0,0 +1,34 @@
+"""add content addressing and reference counts to assets
+
+Revision ID: 20251119_content_addressed_assets
+Revises: 20251118_expand_alembic_version
+Create Date: 2025-11-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251119_content_addressed_assets'
+down_revision = '20251118_expand_alembic_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('assets', sa.Column('sha256', sa.String(length=64), nullable=True))
+    op.add_column('assets', sa.Column('size', sa.BigInteger(), nullable=True))
+    op.add_column('assets', sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column(
+        'assets',
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    op.create_unique_constraint('uq_assets_sha256', 'assets', ['sha256'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_assets_sha256', 'assets', type_='unique')
+    op.drop_column('assets', 'updated_at')
+    op.drop_column('assets', 'ref_count')
+    op.drop_column('assets', 'size')
+    op.drop_column('assets', 'sha256')
@@ -0,0 +1,26 @@
+"""record the storage backend of each asset
+
+Revision ID: 20251120_asset_storage_backend
+Revises: 20251119_content_addressed_assets
+Create Date: 2025-11-20 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251120_asset_storage_backend'
+down_revision = '20251119_content_addressed_assets'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'assets',
+        sa.Column('storage_backend', sa.String(length=16), server_default='local', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('assets', 'storage_backend')
@@ -0,0 +1,26 @@
+"""add security_version to users
+
+Revision ID: 20251121_user_security_version
+Revises: 20251120_asset_storage_backend
+Create Date: 2025-11-21 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251121_user_security_version'
+down_revision = '20251120_asset_storage_backend'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'users',
+        sa.Column('security_version', sa.Integer(), server_default='0', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'security_version')
@@ -0,0 +1,55 @@
+"""add indexes for the list query shapes
+
+Revision ID: 20251122_hot_query_indexes
+Revises: 20251121_user_security_version
+Create Date: 2025-11-22 00:00:00.000000
+
+The list endpoints filter on is_active / owner_id / category_id / user_id
+and page newest first by (created_at, id) or (processed_at, id). Each index
+matches one of these shapes, so a page is read straight from the index
+instead of sorting the table. Public listings only show active rows, hence
+the partial indexes.
+
+The indexes are built with CREATE INDEX CONCURRENTLY so the tables stay
+writable; that cannot run inside a transaction, hence the autocommit
+block. If a concurrent build fails it leaves an INVALID index behind:
+drop it and run the upgrade again.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251122_hot_query_indexes'
+down_revision = '20251121_user_security_version'
+branch_labels = None
+depends_on = None
+
+# name -> (table, columns, partial index predicate)
+INDEXES = {
+    'ix_designs_active_created_at_id': ('designs', ['created_at DESC', 'id DESC'], 'is_active'),
+    'ix_designs_owner_created_at_id': ('designs', ['owner_id', 'created_at DESC', 'id DESC'], None),
+    'ix_designs_category_created_at_id': ('designs', ['category_id', 'created_at DESC', 'id DESC'], 'is_active'),
+    'ix_measurements_user_processed_at_id': ('measurements', ['user_id', 'processed_at DESC', 'id DESC'], None),
+    'ix_categories_active_created_at_id': ('categories', ['created_at DESC', 'id DESC'], 'is_active'),
+    'ix_users_created_at_id': ('users', ['created_at DESC', 'id DESC'], None),
+}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, (table, columns, where) in INDEXES.items():
+            op.create_index(
+                name,
+                table,
+                [sa.text(column) for column in columns],
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    # Plain DROP INDEX inside the migration transaction: dropping is quick, and
+    # if a later step of the downgrade fails the indexes are restored with it
+    for name, (table, _, _) in INDEXES.items():
+        op.drop_index(name, table_name=table, if_exists=True)
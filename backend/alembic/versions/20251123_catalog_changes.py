@@ -0,0 +1,108 @@
+"""track catalog changes: updated_at columns and tombstones
+
+Revision ID: 20251123_catalog_changes
+Revises: 20251122_hot_query_indexes
+Create Date: 2025-11-23 00:00:00.000000
+
+GET /catalog/changes returns the designs, categories, fabrics and colors
+changed since a cursor, and the ids of those deleted. Triggers keep this
+complete whatever code writes to the tables:
+
+- updated_at is set on every insert and update (clock_timestamp(), so the
+  time of the write rather than of the transaction start)
+- adding or removing a fabric or color of a design touches the design
+- deleting a row records a tombstone in catalog_tombstones
+
+Existing rows get the migration time as updated_at. Each table gets an
+(updated_at, id) index for the feed's keyset scan.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '20251123_catalog_changes'
+down_revision = '20251122_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+TABLES = ('designs', 'categories', 'fabrics', 'colors')
+ASSOCIATION_TABLES = ('design_fabric', 'design_color')
+
+FUNCTIONS = """
+CREATE OR REPLACE FUNCTION catalog_touch_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := clock_timestamp();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION catalog_record_tombstone() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO catalog_tombstones (entity, entity_id, deleted_at)
+    VALUES (TG_TABLE_NAME, OLD.id, clock_timestamp())
+    ON CONFLICT (entity, entity_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION catalog_touch_design() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE designs SET updated_at = clock_timestamp() WHERE id = OLD.design_id;
+    ELSE
+        UPDATE designs SET updated_at = clock_timestamp() WHERE id = NEW.design_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        'catalog_tombstones',
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('entity', 'entity_id'),
+    )
+    op.create_index('ix_catalog_tombstones_deleted_at_entity_id', 'catalog_tombstones', ['deleted_at', 'entity_id'])
+
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        )
+        op.create_index(f'ix_{table}_updated_at_id', table, ['updated_at', 'id'])
+
+    op.execute(FUNCTIONS)
+    for table in TABLES:
+        op.execute(
+            f'CREATE TRIGGER {table}_touch_updated_at BEFORE INSERT OR UPDATE ON {table} '
+            'FOR EACH ROW EXECUTE FUNCTION catalog_touch_updated_at()'
+        )
+        op.execute(
+            f'CREATE TRIGGER {table}_record_tombstone AFTER DELETE ON {table} '
+            'FOR EACH ROW EXECUTE FUNCTION catalog_record_tombstone()'
+        )
+    for table in ASSOCIATION_TABLES:
+        op.execute(
+            f'CREATE TRIGGER {table}_touch_design AFTER INSERT OR DELETE ON {table} '
+            'FOR EACH ROW EXECUTE FUNCTION catalog_touch_design()'
+        )
+
+
+def downgrade() -> None:
+    for table in ASSOCIATION_TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_touch_design ON {table}')
+    for table in TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_record_tombstone ON {table}')
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_touch_updated_at ON {table}')
+        op.drop_index(f'ix_{table}_updated_at_id', table_name=table)
+        op.drop_column(table, 'updated_at')
+    op.execute('DROP FUNCTION IF EXISTS catalog_touch_design()')
+    op.execute('DROP FUNCTION IF EXISTS catalog_record_tombstone()')
+    op.execute('DROP FUNCTION IF EXISTS catalog_touch_updated_at()')
+    op.drop_index('ix_catalog_tombstones_deleted_at_entity_id', table_name='catalog_tombstones')
+    op.drop_table('catalog_tombstones')
@@ -2,12 +2,14 @@
 API v1 router.
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
 from api.v1.endpoints import auth, users, login, measurements, categories, designs, admin
-from api.v1.endpoints import templates
+from api.v1.endpoints import templates, catalog
+from core.database import track_writes
 
-api_router = APIRouter()
+# track_writes: clients that write read from the primary for a short while
+api_router = APIRouter(dependencies=[Depends(track_writes)])
 
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(login.router, prefix="/login", tags=["login"])
@@ -19,3 +21,4 @@ api_router.include_router(categories.router, prefix="/categories", tags=["catego
 api_router.include_router(designs.router, prefix="/designs", tags=["designs"])
 api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
 api_router.include_router(templates.router, prefix="/templates", tags=["templates"])
+api_router.include_router(catalog.router, prefix="/catalog", tags=["catalog"])
@@ -1,28 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from models.user import User
 from schemas.user import UserUpdate, UserOut, UserRegisterWithRole
 from core.database import get_db
-from api.v1.endpoints.auth import get_current_admin_user
+from core.fast_json import json_response, schema_columns
+from core.pagination import Pagination
+from api.v1.endpoints.auth import (
+    get_current_admin_user,
+    get_user_by_email,
+    hash_new_password,
+    save_user,
+)
 from models.roles import UserRole
-from core.security import hash_password
+from core.redis_client import get_redis
+from services.user_cache import user_cache
 
 router = APIRouter()
 
+# Changing any of these revokes the user's existing access tokens
+SECURITY_FIELDS = ("is_active", "is_superuser", "role")
+
+# Newest first, id as tie-breaker
+USER_PAGE_KEYS = (User.created_at, User.id)
+
+
+def _invalidate_user(background_tasks: BackgroundTasks, user_id) -> None:
+    # Evict here before responding; other processes are notified via Redis
+    user_cache.evict(user_id)
+    background_tasks.add_task(user_cache.invalidate, get_redis(), user_id)
+
+
 @router.post("/admin-create-user", response_model=dict, status_code=status.HTTP_201_CREATED)
-def admin_create_user(user_data: UserRegisterWithRole, db: Session = Depends(get_db), current_admin: User = Depends(get_current_admin_user)):
+async def admin_create_user(
+    user_data: UserRegisterWithRole,
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user),
+):
     # Only allow designer or admin roles
     if user_data.role not in [UserRole.DESIGNER, UserRole.ADMIN]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Only designer or admin roles allowed via this endpoint."
         )
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await run_in_threadpool(get_user_by_email, db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
-    hashed_pwd = hash_password(user_data.password)
+    hashed_pwd = await hash_new_password(user_data.password)
     new_user = User(
         email=user_data.email,
         hashed_password=hashed_pwd,
@@ -31,32 +58,69 @@ def admin_create_user(user_data: UserRegisterWithRole, db: Session = Depends(get
         role=user_data.role,
         is_superuser=(user_data.role == UserRole.ADMIN),
     )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await run_in_threadpool(save_user, db, new_user)
 
     return {"message": f"{user_data.role.value.capitalize()} user created successfully", "email": new_user.email}
 
+
 @router.get("/users", response_model=list[UserOut])
-def list_users(db: Session = Depends(get_db), current_admin: User = Depends(get_current_admin_user)):
-    return db.query(User).all()
+def list_users(
+    page: Pagination = Depends(),
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user),
+):
+    """
+    List users, newest first.
+
+    Paginated when ``limit`` or ``cursor`` is given; otherwise every user is
+    returned, as before pagination, since the admin portal does not follow
+    the cursor headers.
+    """
+    query = select(*schema_columns(UserOut, User))
+    if "limit" not in page.request.query_params and page.cursor is None:
+        order = (column.desc() for column in USER_PAGE_KEYS)
+        rows = db.execute(query.order_by(*order).offset(page.skip)).all()
+        return json_response(rows)
+    rows = db.execute(page.apply(query, USER_PAGE_KEYS)).all()
+    return json_response(page.finish(rows, USER_PAGE_KEYS), page.response.headers)
+
 
 @router.put("/users/{user_id}", response_model=UserOut)
-def update_user(user_id: str, user_update: UserUpdate, db: Session = Depends(get_db), current_admin: User = Depends(get_current_admin_user)):
+def update_user(
+    user_id: str,
+    user_update: UserUpdate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user),
+):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    for field, value in user_update.dict(exclude_unset=True).items():
+    changes = user_update.dict(exclude_unset=True)
+    if any(
+        field in changes and changes[field] != getattr(user, field)
+        for field in SECURITY_FIELDS
+    ):
+        user.security_version = User.security_version + 1
+    for field, value in changes.items():
         setattr(user, field, value)
     db.commit()
     db.refresh(user)
+    _invalidate_user(background_tasks, user.id)
     return user
 
+
 @router.delete("/users/{user_id}", response_model=dict)
-def delete_user(user_id: str, db: Session = Depends(get_db), current_admin: User = Depends(get_current_admin_user)):
+def delete_user(
+    user_id: str,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user),
+):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     db.delete(user)
     db.commit()
+    _invalidate_user(background_tasks, user.id)
     return {"detail": "User deleted"}
@@ -1,44 +1,83 @@
+"""
+Authentication endpoints.
+"""
+
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, status, Security
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi_limiter.depends import RateLimiter
 from sqlalchemy.orm import Session
 from models.roles import UserRole
 from core.database import get_db
-from core.security import hash_password, verify_password, create_access_token
+from core.deps import get_current_user
+from core.security import create_access_token, user_token_claims
 from models.user import User
 from schemas.user import UserRegisterWithRole, Token
 from core.config import settings
+from services.password_hasher import PasswordHasherBusy, password_hasher
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-def get_current_admin_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    from core.security import verify_access_token
-    payload = verify_access_token(token)
-    email = payload.get("sub")
-    role = payload.get("role")
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not user.is_superuser or role != UserRole.ADMIN:
+async def get_current_admin_user(user: User = Depends(get_current_user)):
+    if not user.is_superuser or user.role != UserRole.ADMIN:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required.")
     return user
-"""
-Authentication endpoints.
-"""
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
 
-from core.database import get_db
-from core.security import hash_password, verify_password, create_access_token
-from models.user import User
-from schemas.user import UserRegisterWithRole, Token
+def get_user_by_email(db: Session, email: str) -> Optional[User]:
+    return db.query(User).filter(User.email == email).first()
 
-router = APIRouter()
+
+def save_user(db: Session, user: User) -> User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def password_hasher_busy() -> HTTPException:
+    """503 for requests rejected because the password hashing queue is full."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many password operations in progress, please retry",
+        headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+    )
+
+
+async def hash_new_password(password: str) -> str:
+    """Hash a password on the password hasher (503 when it is saturated)."""
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherBusy:
+        raise password_hasher_busy()
+
+
+async def check_password(db: Session, user: User, password: str) -> bool:
+    """
+    Verify a login password on the password hasher (503 when it is saturated).
+
+    After a successful check, hashes made with an outdated ``BCRYPT_ROUNDS``
+    are replaced; if the hasher is busy the upgrade waits for the next login.
+    """
+    try:
+        if not await password_hasher.verify(password, user.hashed_password):
+            return False
+    except PasswordHasherBusy:
+        raise password_hasher_busy()
+    if password_hasher.needs_rehash(user.hashed_password):
+        try:
+            user.hashed_password = await password_hasher.hash(password)
+        except PasswordHasherBusy:
+            return True
+        await run_in_threadpool(save_user, db, user)
+    return True
 
 
 @router.post("/register", response_model=dict, status_code=status.HTTP_201_CREATED, dependencies=[Depends(RateLimiter(times=5, seconds=60))])
-def register(user_data: UserRegisterWithRole, db: Session = Depends(get_db)):
+async def register(user_data: UserRegisterWithRole, db: Session = Depends(get_db)):
     """
     Register a new user with role specification (for admin use).
     """
@@ -52,14 +91,14 @@ def register(user_data: UserRegisterWithRole, db: Session = Depends(get_db)):
         )
 
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await run_in_threadpool(get_user_by_email, db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
 
     # Create new user
-    hashed_pwd = hash_password(user_data.password)
+    hashed_pwd = await hash_new_password(user_data.password)
     new_user = User(
         email=user_data.email,
         hashed_password=hashed_pwd,
@@ -68,16 +107,13 @@ def register(user_data: UserRegisterWithRole, db: Session = Depends(get_db)):
         role=user_data.role,
         is_superuser=False,
     )
-
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await run_in_threadpool(save_user, db, new_user)
 
     return {"message": "User created successfully", "email": new_user.email}
 
 
 @router.post("/login", response_model=Token, dependencies=[Depends(RateLimiter(times=5, seconds=60))])
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ):
     """
@@ -85,7 +121,7 @@ def login(
     Note: username field in OAuth2PasswordRequestForm is used for email.
     """
     # Find user by email (using username field from OAuth2 form)
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = await run_in_threadpool(get_user_by_email, db, form_data.username)
 
     # Debug logs: print whether user was found and active (only in DEBUG mode)
     if settings.DEBUG:
@@ -96,7 +132,7 @@ def login(
 
     password_ok = False
     if user:
-        password_ok = verify_password(form_data.password, user.hashed_password)
+        password_ok = await check_password(db, user, form_data.password)
 
     if not user or not password_ok:
         if settings.DEBUG:
@@ -113,8 +149,6 @@ def login(
         )
 
     # Create access token with user role for frontend use
-    access_token = create_access_token(
-        data={"sub": user.email, "role": user.role.value}
-    )
+    access_token = create_access_token(data=user_token_claims(user))
 
     return Token(access_token=access_token, token_type="bearer")
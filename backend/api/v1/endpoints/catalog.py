@@ -0,0 +1,227 @@
+"""
+Catalog endpoints spanning several tables.
+"""
+
+import hashlib
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func, literal, select, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.v1.endpoints.categories import PAGE_KEYS as CATEGORY_PAGE_KEYS
+from core.config import settings
+from core.database import get_async_catalog_db, get_async_db
+from core.fast_json import json_response, render, schema_columns
+from core.pagination import NEXT, InvalidCursor, Pagination, decode_cursor, encode_cursor
+from crud.design import PAGE_KEYS as DESIGN_PAGE_KEYS, designs_query
+from models.catalog_tombstone import CatalogTombstone
+from models.category import Category
+from models.color import Color
+from models.design import Design, design_color_association, design_fabric_association
+from models.fabric import Fabric
+from schemas.catalog import CatalogBootstrap, CatalogChanges
+from schemas.category import CategoryResponse
+from schemas.color import ColorResponse
+from schemas.design import DesignResponse
+from schemas.fabric import FabricResponse
+from services.catalog_cache import BOOTSTRAP, catalog_cache
+
+router = APIRouter()
+
+# Tables of the changes feed (also the entity names of their tombstones)
+CHANGE_ENTITIES = {
+    "designs": (Design, DesignResponse),
+    "categories": (Category, CategoryResponse),
+    "fabrics": (Fabric, FabricResponse),
+    "colors": (Color, ColorResponse),
+}
+
+# Cursor id after every row changed at the same time as the horizon
+_LAST_ID = uuid.UUID(int=(1 << 128) - 1)
+
+
+async def _add_option_ids(db: AsyncSession, designs: List[dict]) -> None:
+    """Add the fabric and color ids of ``designs``, with one query per association table."""
+    design_ids = [design["id"] for design in designs]
+    for association, key, field in (
+        (design_fabric_association, "fabric_id", "available_fabric_ids"),
+        (design_color_association, "color_id", "available_color_ids"),
+    ):
+        ids = defaultdict(list)
+        if design_ids:
+            rows = await db.execute(
+                select(association.c.design_id, association.c[key]).where(
+                    association.c.design_id.in_(design_ids)
+                )
+            )
+            for design_id, option_id in rows:
+                ids[design_id].append(option_id)
+        for design in designs:
+            design[field] = ids[design["id"]]
+
+
+@router.get("/bootstrap", response_model=CatalogBootstrap)
+async def bootstrap(
+    request: Request,
+    response: Response,
+    designs_limit: int = Query(20, ge=1, le=100, description="Size of the first page of designs"),
+    db: AsyncSession = Depends(get_async_catalog_db),
+):
+    """
+    Everything the gallery shows on launch, in one request.
+
+    Returns the active categories, the first page of active designs (with
+    the ids of their fabrics and colors), all fabrics and all colors. Each
+    table is read with one query. Continue the designs with
+    `GET /designs/?cursor=<designs_next_cursor>`.
+
+    The response is cached as a unit and invalidated by any catalog write;
+    `version` (also the basis of the ETag) changes whenever its content does.
+    """
+
+    async def load():
+        categories = await db.execute(
+            select(*schema_columns(CategoryResponse, Category))
+            .where(Category.is_active == True)
+            .order_by(*(column.desc() for column in CATEGORY_PAGE_KEYS))
+        )
+
+        # The page is computed like GET /designs/, headers go to a throwaway response
+        page = Pagination(request, Response(), skip=0, limit=designs_limit, cursor=None)
+        query = designs_query(active_only=True).with_only_columns(
+            *schema_columns(DesignResponse, Design)
+        )
+        designs = page.finish(
+            (await db.execute(page.apply(query, DESIGN_PAGE_KEYS))).all(),
+            DESIGN_PAGE_KEYS,
+        )
+        designs = [design._asdict() for design in designs]
+
+        await _add_option_ids(db, designs)
+
+        fabrics = await db.execute(
+            select(*schema_columns(FabricResponse, Fabric)).order_by(Fabric.name)
+        )
+        colors = await db.execute(
+            select(*schema_columns(ColorResponse, Color)).order_by(Color.name)
+        )
+
+        body = {
+            "categories": [category._asdict() for category in categories],
+            "designs": designs,
+            "designs_next_cursor": page.next_cursor,
+            "fabrics": [fabric._asdict() for fabric in fabrics],
+            "colors": [color._asdict() for color in colors],
+        }
+        return {"version": hashlib.sha256(render(body)).hexdigest()[:16], **body}
+
+    return await catalog_cache.get_or_load(request, response, BOOTSTRAP, load)
+
+
+@router.get("/changes", response_model=CatalogChanges)
+async def changes(
+    since: Optional[str] = Query(
+        None, description="next_cursor of the previous sync; omit for a full sync"
+    ),
+    limit: int = Query(
+        500,
+        ge=1,
+        le=1000,
+        description="Maximum number of changed and deleted rows to return",
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Designs, categories, fabrics and colors changed since a cursor.
+
+    Returns the current version of every row created or updated since
+    `since` (designs with the ids of their fabrics and colors) and the ids
+    of the rows deleted since then, in the order they changed. Keep calling
+    with `since=<next_cursor>` while `has_more` is true, then store
+    `next_cursor` for the next sync. Without `since` every row is returned
+    and no deletions.
+
+    Only changes older than `CATALOG_CHANGES_LAG_SECONDS` are returned, so a
+    write whose transaction commits after a sync is not skipped by it. Reads
+    the primary, as a replica may not have those changes yet.
+    """
+    after = None
+    if since is not None:
+        try:
+            _, after = decode_cursor(since)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    lag = timedelta(seconds=settings.CATALOG_CHANGES_LAG_SECONDS)
+    horizon = (await db.execute(select(func.clock_timestamp() - lag))).scalar_one()
+
+    # Each branch is a keyset scan of its (updated_at, id) or (deleted_at, entity_id) index
+    def branch(kind, deleted, at, row_id):
+        query = select(
+            kind.label("kind"),
+            literal(deleted).label("deleted"),
+            row_id.label("id"),
+            at.label("at"),
+        ).where(at <= horizon)
+        if after is not None:
+            query = query.where(tuple_(at, row_id) > tuple_(*after))
+        return query.order_by(at, row_id).limit(limit + 1)
+
+    branches = [
+        branch(literal(kind), False, model.updated_at, model.id)
+        for kind, (model, _) in CHANGE_ENTITIES.items()
+    ]
+    if after is not None:
+        # Rows deleted before the first sync were never seen, so only later syncs need tombstones
+        branches.append(
+            branch(
+                CatalogTombstone.entity,
+                True,
+                CatalogTombstone.deleted_at,
+                CatalogTombstone.entity_id,
+            )
+        )
+    feed = union_all(*branches).subquery()
+    rows = (await db.execute(select(feed).order_by(feed.c.at, feed.c.id).limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changed_ids = defaultdict(list)
+    deleted = {kind: [] for kind in CHANGE_ENTITIES}
+    for row in rows:
+        if row.deleted:
+            deleted[row.kind].append(row.id)
+        else:
+            changed_ids[row.kind].append(row.id)
+
+    # Current version of the changed rows, in the order they changed
+    changed = {}
+    for kind, (model, schema) in CHANGE_ENTITIES.items():
+        changed[kind] = []
+        if changed_ids[kind]:
+            result = await db.execute(
+                select(*schema_columns(schema, model))
+                .where(model.id.in_(changed_ids[kind]))
+                .order_by(model.updated_at, model.id)
+            )
+            changed[kind] = [row._asdict() for row in result]
+    await _add_option_ids(db, changed["designs"])
+
+    if has_more:
+        last = rows[-1]
+        next_key = (last.at, last.id)
+    else:
+        # Everything up to the horizon has been returned
+        next_key = (horizon, _LAST_ID)
+        if after is not None and after > next_key:
+            next_key = after
+    return json_response({
+        **changed,
+        "deleted": deleted,
+        "next_cursor": encode_cursor(NEXT, next_key),
+        "has_more": has_more,
+    })
@@ -2,56 +2,85 @@
 Category endpoints.
 """
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from core.database import get_db
+from core.database import get_async_catalog_db, get_db
 from core.deps import is_designer_or_admin
+from core.fast_json import Projection, schema_columns, sparse_fields
+from core.pagination import Pagination
 from models.category import Category
 from models.user import User
 from schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
+from services.catalog_cache import BOOTSTRAP, CATEGORIES, catalog_cache, category_tag
 
 router = APIRouter()
 
+# Newest first, id as tie-breaker
+PAGE_KEYS = (Category.created_at, Category.id)
+
 
 @router.get("/", response_model=List[CategoryResponse])
-def list_categories(
-    skip: int = 0,
-    limit: int = 100,
+async def list_categories(
+    request: Request,
+    response: Response,
+    page: Pagination = Depends(),
     active_only: bool = True,
-    db: Session = Depends(get_db),
+    fields: Optional[List[str]] = Depends(sparse_fields),
+    db: AsyncSession = Depends(get_async_catalog_db),
 ):
     """
     List all categories.
 
     - **skip**: Number of categories to skip (for pagination)
     - **limit**: Maximum number of categories to return
+    - **cursor**: Continue from X-Next-Cursor / X-Prev-Cursor of a previous page
     - **active_only**: If True, only return active categories
+    - **fields**: Only return these fields, e.g. `id,name,image_url`
     """
-    query = db.query(Category)
+    projection = Projection(CategoryResponse, Category, fields, PAGE_KEYS)
+
+    async def load():
+        query = select(*projection.columns)
+
+        if active_only:
+            query = query.where(Category.is_active == True)
 
-    if active_only:
-        query = query.filter(Category.is_active == True)
+        result = await db.execute(page.apply(query, PAGE_KEYS))
+        return projection.rows(page.finish(result.all(), PAGE_KEYS))
 
-    categories = query.offset(skip).limit(limit).all()
-    return categories
+    return await catalog_cache.get_or_load(request, response, CATEGORIES, load)
 
 
 @router.get("/{category_id}", response_model=CategoryResponse)
-def get_category(category_id: str, db: Session = Depends(get_db)):
+async def get_category(
+    category_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_catalog_db),
+):
     """
     Get a specific category by ID.
     """
-    category = db.query(Category).filter(Category.id == category_id).first()
 
-    if not category:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Category not found",
+    async def load():
+        result = await db.execute(
+            select(*schema_columns(CategoryResponse, Category)).where(Category.id == category_id)
         )
+        category = result.first()
 
-    return category
+        if not category:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Category not found",
+            )
+
+        return category
+
+    return await catalog_cache.get_or_load(request, response, category_tag(category_id), load)
 
 
 @router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
@@ -87,6 +116,7 @@ def create_category(
     db.add(new_category)
     db.commit()
     db.refresh(new_category)
+    catalog_cache.invalidate(CATEGORIES, BOOTSTRAP)
 
     return new_category
 
@@ -130,6 +160,7 @@ def update_category(
 
     db.commit()
     db.refresh(category)
+    catalog_cache.invalidate(CATEGORIES, BOOTSTRAP, category_tag(category_id))
 
     return category
 
@@ -155,5 +186,6 @@ def delete_category(
 
     db.delete(category)
     db.commit()
+    catalog_cache.invalidate(CATEGORIES, BOOTSTRAP, category_tag(category_id))
 
     return None
@@ -3,64 +3,83 @@ Design endpoints.
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from core.database import get_db
+from core.database import get_async_catalog_db, get_async_read_db, get_db
 from core.deps import get_current_user, get_current_designer_user
+from core.fast_json import Projection, json_response, schema_columns, sparse_fields
+from core.pagination import Pagination
 from models.design import Design
 from models.category import Category
 from models.user import User
 from schemas.design import DesignCreate, DesignUpdate, DesignResponse
 from crud.design import (
-    get_designs,
+    PAGE_KEYS,
+    get_designs_async,
     get_design,
     create_design,
     update_design,
     delete_design,
 )
+from services.catalog_cache import (
+    DESIGNS,
+    catalog_cache,
+    design_category_tag,
+    design_style_tag,
+    design_tag,
+)
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[DesignResponse])
-def list_designs(
-    skip: int = 0,
-    limit: int = 100,
+async def list_designs(
+    request: Request,
+    response: Response,
+    page: Pagination = Depends(),
     style_type: Optional[str] = Query(None, description="Filter by style type"),
     category_id: Optional[str] = Query(None, description="Filter by category ID"),
     active_only: bool = True,
-    db: Session = Depends(get_db),
+    fields: Optional[List[str]] = Depends(sparse_fields),
+    db: AsyncSession = Depends(get_async_catalog_db),
 ):
     """
     List all designs with optional filtering.
 
     - **skip**: Number of designs to skip (for pagination)
     - **limit**: Maximum number of designs to return
+    - **cursor**: Continue from X-Next-Cursor / X-Prev-Cursor of a previous page
     - **style_type**: Filter designs by style type
     - **category_id**: Filter designs by category ID
     - **active_only**: If True, only return active designs
+    - **fields**: Only return these fields, e.g. `id,name,base_image_url,base_price` for a grid
     """
-    query = db.query(Design)
-
-    if active_only:
-        query = query.filter(Design.is_active == True)
-
-    if style_type:
-        query = query.filter(Design.style_type == style_type)
-
-    if category_id:
-        query = query.filter(Design.category_id == category_id)
+    projection = Projection(DesignResponse, Design, fields, PAGE_KEYS)
+
+    async def load():
+        designs = await get_designs_async(
+            db,
+            active_only=active_only,
+            style_type=style_type,
+            category_id=category_id,
+            page=page,
+            columns=projection.columns,
+        )
+        return projection.rows(designs)
 
-    designs = query.order_by(Design.created_at.desc()).offset(skip).limit(limit).all()
-    return designs
+    # Every design write invalidates its category and style tags as well as DESIGNS
+    tag = design_category_tag(category_id) or design_style_tag(style_type) or DESIGNS
+    return await catalog_cache.get_or_load(request, response, tag, load)
 
 
 @router.get("/me", response_model=List[DesignResponse])
-def get_my_designs(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+async def get_my_designs(
+    page: Pagination = Depends(),
+    fields: Optional[List[str]] = Depends(sparse_fields),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_designer_user),
 ):
     """
@@ -68,25 +87,44 @@ def get_my_designs(
 
     - **skip**: Number of designs to skip (for pagination)
     - **limit**: Maximum number of designs to return
+    - **cursor**: Continue from X-Next-Cursor / X-Prev-Cursor of a previous page
+    - **fields**: Only return these fields
     """
-    designs = get_designs(db=db, skip=skip, limit=limit, owner_id=current_user.id)
-    return designs
+    projection = Projection(DesignResponse, Design, fields, PAGE_KEYS)
+    designs = await get_designs_async(
+        db, owner_id=current_user.id, page=page, columns=projection.columns
+    )
+    return json_response(projection.rows(designs), page.response.headers)
 
 
 @router.get("/{design_id}", response_model=DesignResponse)
-def get_design_by_id(design_id: str, db: Session = Depends(get_db)):
+async def get_design_by_id(
+    design_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_catalog_db),
+):
     """
     Get a specific design by ID.
     """
-    design = get_design(db, design_id)
 
-    if not design:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Design not found",
+    async def load():
+        result = await db.execute(
+            select(*schema_columns(DesignResponse, Design)).where(
+                Design.id == design_id
+            )
         )
+        design = result.first()
+
+        if not design:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Design not found",
+            )
+
+        return design
 
-    return design
+    return await catalog_cache.get_or_load(request, response, design_tag(design_id), load)
 
 
 @router.post("/", response_model=DesignResponse, status_code=status.HTTP_201_CREATED)
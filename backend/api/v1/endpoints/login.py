@@ -3,19 +3,20 @@ Login endpoint for user authentication.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
+from api.v1.endpoints.auth import check_password, get_user_by_email
 from core.database import get_db
-from core.security import verify_password, create_access_token
-from models.user import User
+from core.security import create_access_token, user_token_claims
 from schemas.user import Token
 
 router = APIRouter()
 
 
 @router.post("/access-token", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ):
     """
@@ -24,9 +25,9 @@ def login(
     Accepts any user role (CUSTOMER, DESIGNER, or ADMIN).
     """
     # Find user by email (username field in OAuth2PasswordRequestForm is used for email)
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = await run_in_threadpool(get_user_by_email, db, form_data.username)
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await check_password(db, user, form_data.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -39,8 +40,6 @@ def login(
         )
 
     # Create access token with user email as subject and role for frontend
-    access_token = create_access_token(
-        data={"sub": user.email, "role": user.role.value}
-    )
+    access_token = create_access_token(data=user_token_claims(user))
 
     return Token(access_token=access_token, token_type="bearer")
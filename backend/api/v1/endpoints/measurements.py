@@ -2,14 +2,32 @@
 Measurements endpoints for photo upload and processing.
 """
 
-import os
+import asyncio
+import hashlib
 import uuid
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import RedirectResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import aiofiles
+import aiofiles.os
 
-from core.database import get_db
+from core.database import get_async_db, get_async_read_db, get_db
 from core.deps import get_current_user
+from core.fast_json import Projection, json_response, sparse_fields
+from core.pagination import Pagination
+from core.redis_client import get_redis
 from models.user import User
 from models.measurement import Measurement
 from schemas.measurement import (
@@ -18,16 +36,26 @@ from schemas.measurement import (
     MeasurementCreate,
     MeasurementUpdate,
     MeasurementResponse,
+    MeasurementJobResponse,
 )
+from crud import asset as asset_crud
 from crud import measurement as measurement_crud
-from services.ai_client import ai_client, AIServiceError
+from services.ai_client import ai_client, AIServiceError, UPLOAD_CHUNK_SIZE
+from services.measurement_jobs import (
+    WebhookURLError,
+    check_webhook_url,
+    measurement_jobs,
+    public_job,
+)
+from services.blob_store import StoredBlob, blob_digest, blob_path, blob_store, own_registrations
+from services.storage import storage
+from services.result_cache import ai_result_cache
 
 router = APIRouter()
 
 # Configuration
-# Use workspace-local uploads directory by default so tests can write files.
-UPLOAD_DIR = os.getenv("UPLOAD_DIR", "/workspaces/Qeyafa/backend/uploads")
 ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png"}
+CONTENT_TYPES = {"jpg": "image/jpeg", "jpeg": "image/jpeg", "png": "image/png"}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
 
@@ -36,6 +64,11 @@ def allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def _content_type(filename: str) -> str:
+    """MIME type of an allowed upload, from its extension."""
+    return CONTENT_TYPES[filename.rsplit(".", 1)[1].lower()]
+
+
 def validate_file(file: UploadFile) -> None:
     """Validate uploaded file."""
     if not file.filename:
@@ -51,35 +84,316 @@ def validate_file(file: UploadFile) -> None:
         )
 
 
-async def save_upload_file(file: UploadFile, user_id: uuid.UUID) -> str:
+async def iter_upload_to_disk(file: UploadFile, file_path: str) -> AsyncIterator[bytes]:
+    """
+    Copy an uploaded file to disk in chunks, yielding each chunk once written.
+
+    This lets the same pass over the upload both persist it and feed another
+    consumer (e.g. a content hash) without buffering the file.
+
+    Raises:
+        HTTPException: 413 if the file exceeds MAX_FILE_SIZE
+    """
+    size = 0
+    async with aiofiles.open(file_path, "wb") as f:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > MAX_FILE_SIZE:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=(
+                        f"File {file.filename} exceeds the "
+                        f"{MAX_FILE_SIZE // (1024 * 1024)}MB limit"
+                    ),
+                )
+            await f.write(chunk)
+            yield chunk
+
+
+async def discard_files(paths: Iterable[str]) -> None:
+    """Remove files written for a request that did not complete."""
+    for path in paths:
+        try:
+            await aiofiles.os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+async def _receive_upload(file: UploadFile) -> StoredBlob:
+    """
+    Write one upload to a temporary file while hashing it.
+
+    Returns:
+        The blob, with ``path`` set to the temporary file until it is
+        committed to the blob store
+    """
+    temp_file = await blob_store.temp_path()
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async for chunk in iter_upload_to_disk(file, temp_file):
+            digest.update(chunk)
+            size += len(chunk)
+    except Exception:
+        await discard_files([temp_file])
+        raise
+
+    # Reset file pointer for potential reuse
+    await file.seek(0)
+
+    return StoredBlob(path=temp_file, digest=digest.hexdigest(), size=size, created=False)
+
+
+async def _commit_blob(received: StoredBlob, content_type: str) -> StoredBlob:
+    """Move a received upload to its content address (or drop it if that blob exists already)."""
+    try:
+        path, created = await blob_store.commit(received.path, received.digest, content_type)
+    except Exception:
+        await discard_files([received.path])
+        raise
+    return received._replace(path=path, created=created)
+
+
+async def store_upload_files(
+    files: Dict[str, UploadFile], db: AsyncSession
+) -> Dict[str, StoredBlob]:
     """
-    Save uploaded file to disk.
+    Save several uploaded files to the blob store concurrently.
+
+    The files are received and hashed concurrently, their blobs are
+    recorded in the ``assets`` table without a reference, and only then
+    moved to the blob store, so a blob found to exist already cannot be
+    garbage collected meanwhile (see crud.asset.register_asset). The
+    reference is taken when a measurement points to a blob. If any file
+    fails to save, blobs created for the other files are removed unless
+    another upload registered them since, and the first error is raised.
+
+    Args:
+        files: Uploaded files keyed by name (e.g. "front")
+        db: Database session
+
+    Returns:
+        Stored blobs, keyed like ``files``
+    """
+    results = await asyncio.gather(
+        *(_receive_upload(file) for file in files.values()),
+        return_exceptions=True,
+    )
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        await discard_files(
+            result.path for result in results if not isinstance(result, BaseException)
+        )
+        raise errors[0]
+
+    received = dict(zip(files.keys(), results))
+    try:
+        for name, blob in received.items():
+            registered_at = await asset_crud.register_asset_async(
+                db,
+                digest=blob.digest,
+                storage_path=blob_path(blob.digest),
+                filename=files[name].filename,
+                content_type=_content_type(files[name].filename),
+                size=blob.size,
+            )
+            received[name] = blob._replace(registered_at=registered_at)
+    except Exception:
+        # The asset rows registered so far are left to the garbage collector
+        await discard_files(blob.path for blob in received.values())
+        raise
+
+    results = await asyncio.gather(
+        *(
+            _commit_blob(blob, _content_type(files[name].filename))
+            for name, blob in received.items()
+        ),
+        return_exceptions=True,
+    )
+    stored = dict(zip(files.keys(), results))
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        await discard_blobs(
+            {name: blob for name, blob in stored.items() if not isinstance(blob, BaseException)}, db
+        )
+        raise errors[0]
+    return stored
+
+
+async def discard_blobs(stored: Dict[str, StoredBlob], db: AsyncSession) -> None:
+    """
+    Remove blobs a failed request created, unless something references them.
+
+    Blobs another request uploaded or referenced since are kept, as it may
+    be about to reference them.
+    """
+    registrations = own_registrations(stored.values())
+    if registrations:
+        await asset_crud.delete_unreferenced_assets_async(
+            db, None, blob_store.remove, registrations
+        )
+
+
+async def save_upload_file(file: UploadFile, db: AsyncSession) -> str:
+    """
+    Save uploaded file to the blob store.
 
     Args:
         file: The uploaded file
-        user_id: ID of the user uploading the file
+        db: Database session
 
     Returns:
-        Relative path to the saved file
+        Storage key of the saved blob
     """
-    # Create user-specific directory
-    user_dir = os.path.join(UPLOAD_DIR, str(user_id))
-    os.makedirs(user_dir, exist_ok=True)
+    stored = await store_upload_files({"file": file}, db)
+    return stored["file"].path
 
-    # Generate unique filename
-    file_ext = file.filename.rsplit(".", 1)[1].lower()
-    unique_filename = f"{uuid.uuid4()}.{file_ext}"
-    file_path = os.path.join(user_dir, unique_filename)
 
-    # Save file using aiofiles to prevent blocking
-    contents = await file.read()
-    async with aiofiles.open(file_path, "wb") as f:
-        await f.write(contents)
+async def save_upload_files(files: Dict[str, UploadFile], db: AsyncSession) -> Dict[str, str]:
+    """
+    Save several uploaded files to the blob store concurrently.
 
-    # Reset file pointer for potential reuse
-    await file.seek(0)
+    Returns:
+        Storage keys of the saved blobs, keyed like ``files``
+    """
+    stored = await store_upload_files(files, db)
+    return {name: blob.path for name, blob in stored.items()}
+
+
+# Asynchronous processing jobs
+# (declared before "/{measurement_id}" routes so "/jobs" is not parsed as an ID)
+
+
+@router.post(
+    "/jobs",
+    response_model=MeasurementJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def create_measurement_job(
+    request: Request,
+    response: Response,
+    photo_front: UploadFile = File(...),
+    photo_back: UploadFile = File(...),
+    photo_left: UploadFile = File(...),
+    photo_right: UploadFile = File(...),
+    height: float = Form(..., gt=0),
+    weight: float = Form(..., gt=0),
+    force_error: str | None = Form(None),
+    webhook_url: str | None = Form(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Queue photos for asynchronous measurement processing.
+
+    The photos are stored and a job id is returned immediately (202). Poll
+    ``GET /measurements/jobs/{job_id}`` for the result, or pass
+    ``webhook_url`` to have the finished job POSTed to it.
+
+    Args:
+        photo_front: Front view photo
+        photo_back: Back view photo
+        photo_left: Left side photo
+        photo_right: Right side photo
+        height: User height in cm
+        weight: User weight in kg
+        webhook_url: Optional http(s) URL notified when the job finishes;
+            it may not point to a loopback, private or link-local address
+        current_user: Authenticated user
+        db: Database session
+
+    Returns:
+        The queued job
+    """
+    redis = get_redis()
+    if redis is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Asynchronous processing is unavailable",
+        )
+
+    if webhook_url is not None:
+        try:
+            await check_webhook_url(webhook_url)
+        except WebhookURLError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    photos = {
+        "front": photo_front,
+        "back": photo_back,
+        "left": photo_left,
+        "right": photo_right,
+    }
+
+    # Validate all files
+    for name, photo in photos.items():
+        validate_file(photo)
 
-    return f"{user_id}/{unique_filename}"
+    try:
+        stored = await store_upload_files(photos, db)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save files: {str(e)}",
+        )
+
+    try:
+        job = await measurement_jobs.enqueue(
+            redis,
+            user_id=current_user.id,
+            photos={
+                name: {
+                    "path": blob.path,
+                    "filename": photos[name].filename,
+                    "content_type": _content_type(photos[name].filename),
+                    "sha256": blob.digest,
+                    "created": blob.created,
+                    "registered_at": blob.registered_at.isoformat(),
+                }
+                for name, blob in stored.items()
+            },
+            image_paths={name: blob.path for name, blob in stored.items()},
+            height=height,
+            weight=weight,
+            force_error=force_error,
+            webhook_url=webhook_url,
+        )
+    except Exception as e:
+        await discard_blobs(stored, db)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Failed to queue measurement job: {str(e)}",
+        )
+
+    response.headers["Location"] = str(request.url_for("get_measurement_job", job_id=job["job_id"]))
+    return public_job(job)
+
+
+@router.get("/jobs/{job_id}", response_model=MeasurementJobResponse)
+async def get_measurement_job(
+    job_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+):
+    """Get the status (and, once completed, the result) of a measurement job."""
+    redis = get_redis()
+    if redis is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Asynchronous processing is unavailable",
+        )
+
+    job = await measurement_jobs.get(redis, str(job_id))
+    # Jobs of other users are reported as missing to avoid leaking their ids
+    if job is None or job["user_id"] != str(current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Measurement job not found"
+        )
+    return public_job(job)
 
 
 # CRUD endpoints for manual measurements
@@ -97,25 +411,28 @@ def create_measurement_endpoint(
 
 
 @router.get("/", response_model=list[MeasurementResponse])
-def list_measurements_for_user(
-    skip: int = 0,
-    limit: int = 100,
+async def list_measurements_for_user(
+    page: Pagination = Depends(),
+    fields: Optional[List[str]] = Depends(sparse_fields),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    """List measurements belonging to the authenticated user."""
-    measurements = measurement_crud.get_measurements_for_user(db, current_user.id, skip, limit)
-    return measurements
+    """List the authenticated user's measurements, newest first (optionally only ``fields``)."""
+    projection = Projection(MeasurementResponse, Measurement, fields, measurement_crud.PAGE_KEYS)
+    measurements = await measurement_crud.get_measurements_for_user_async(
+        db, current_user.id, page=page, columns=projection.columns
+    )
+    return json_response(projection.rows(measurements), page.response.headers)
 
 
 @router.get("/{measurement_id}", response_model=MeasurementResponse)
-def get_measurement_endpoint(
+async def get_measurement_endpoint(
     measurement_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
     """Get a specific measurement; ensure ownership."""
-    measurement = measurement_crud.get_measurement(db, measurement_id)
+    measurement = await measurement_crud.get_measurement_async(db, measurement_id)
     if measurement is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Measurement not found")
     if measurement.user_id != current_user.id:
@@ -123,6 +440,46 @@ def get_measurement_endpoint(
     return measurement
 
 
+@router.get("/{measurement_id}/photos/{view}")
+async def get_measurement_photo(
+    measurement_id: uuid.UUID,
+    view: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Download one of a measurement's photos (only owner).
+
+    Redirects to a short-lived presigned URL when the storage backend
+    supports it, otherwise streams the photo through the API.
+    """
+    measurement = await measurement_crud.get_measurement_async(db, measurement_id)
+    if measurement is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Measurement not found")
+    if measurement.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this measurement",
+        )
+
+    key = (measurement.image_paths or {}).get(view)
+    if not isinstance(key, str) or not await storage.exists(key):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found")
+
+    url = await storage.presigned_url(key)
+    if url is not None:
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    digest = blob_digest(key)
+    asset = await asset_crud.get_asset_by_digest_async(db, digest) if digest else None
+    media_type = (
+        asset.content_type
+        if asset is not None and asset.content_type
+        else "application/octet-stream"
+    )
+    return StreamingResponse(blob_store.read(key), media_type=media_type)
+
+
 @router.put("/{measurement_id}", response_model=MeasurementResponse)
 def update_measurement_endpoint(
     measurement_id: uuid.UUID,
@@ -161,12 +518,16 @@ def delete_measurement_endpoint(
 
 @router.post("/upload-image", response_model=MeasurementUploadResponse)
 async def upload_single_image(
-    file: UploadFile = File(...), current_user: User = Depends(get_current_user)
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Upload a single image for later association with a measurement."""
     validate_file(file)
     try:
-        path = await save_upload_file(file, current_user.id)
+        path = await save_upload_file(file, db)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to save file: {str(e)}")
 
@@ -180,6 +541,7 @@ async def upload_photos(
     photo_left: UploadFile = File(...),
     photo_right: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Upload 4 photos for measurement processing.
@@ -190,6 +552,7 @@ async def upload_photos(
         photo_left: Left side photo
         photo_right: Right side photo
         current_user: Authenticated user
+        db: Database session
 
     Returns:
         Confirmation with saved file paths
@@ -205,12 +568,11 @@ async def upload_photos(
     for name, photo in photos.items():
         validate_file(photo)
 
-    # Save all files
-    saved_paths = {}
+    # Save all files concurrently
     try:
-        for name, photo in photos.items():
-            path = await save_upload_file(photo, current_user.id)
-            saved_paths[name] = path
+        saved_paths = await save_upload_files(photos, db)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -233,7 +595,7 @@ async def process_measurements(
     weight: float = Form(..., gt=0),
     force_error: str | None = Form(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Process measurements from uploaded photos.
@@ -262,23 +624,42 @@ async def process_measurements(
     for name, photo in photos.items():
         validate_file(photo)
 
+    # Save the photos concurrently to the content-addressed blob store; the
+    # digests also key the AI result cache, so the AI call can only start
+    # once all four are stored and no longer overlaps with saving them
     try:
-        # Save photos
-        saved_paths = {}
-        for name, photo in photos.items():
-            path = await save_upload_file(photo, current_user.id)
-            saved_paths[name] = path
+        stored = await store_upload_files(photos, db)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save files: {str(e)}",
+        )
+    saved_paths = {name: blob.path for name, blob in stored.items()}
+    digests = {name: blob.digest for name, blob in stored.items()}
+
+    async def call_ai_service():
+        return await ai_client.process_measurements_stream(
+            photos=[
+                (
+                    f"photo_{name}",
+                    photo.filename,
+                    photo.content_type,
+                    blob_store.read(saved_paths[name]),
+                )
+                for name, photo in photos.items()
+            ],
+            height=height,
+            weight=weight,
+            force_error=force_error,
+        )
 
-        # Call AI service
+    try:
+        # Call AI service (unless the same inputs were processed recently)
         try:
-            ai_result = await ai_client.process_measurements(
-                photo_front=photo_front,
-                photo_back=photo_back,
-                photo_left=photo_left,
-                photo_right=photo_right,
-                height=height,
-                weight=weight,
-                force_error=force_error,
+            ai_result = await ai_result_cache.get_or_process(
+                get_redis(), digests, height, weight, force_error, call_ai_service
             )
         except AIServiceError as e:
             raise HTTPException(
@@ -306,8 +687,9 @@ async def process_measurements(
         )
 
         db.add(measurement)
-        db.commit()
-        db.refresh(measurement)
+        await asset_crud.acquire_assets_async(db, saved_paths)
+        await db.commit()
+        await db.refresh(measurement)
 
         return MeasurementProcessResponse(
             id=measurement.id,
@@ -318,9 +700,11 @@ async def process_measurements(
         )
 
     except HTTPException:
+        await discard_blobs(stored, db)
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
+        await discard_blobs(stored, db)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to process measurements: {str(e)}",
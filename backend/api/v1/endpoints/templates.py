@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from typing import List, Optional
 from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from core.database import get_db
+from core.database import get_async_catalog_db, get_db
+from core.fast_json import Projection, schema_columns, sparse_fields
 from models.template import Template as TemplateModel
+from services.catalog_cache import TEMPLATES, catalog_cache
 
 router = APIRouter()
 
@@ -32,21 +36,42 @@ def create_template(item: TemplateCreate, db: Session = Depends(get_db)):
     db.add(tmpl)
     db.commit()
     db.refresh(tmpl)
+    catalog_cache.invalidate(TEMPLATES)
     return TemplateRead(id=tmpl.id, name=tmpl.name, description=tmpl.description, payload=tmpl.payload)
 
 
 @router.get("/", response_model=List[TemplateRead])
-def list_templates(db: Session = Depends(get_db)):
-    items = db.query(TemplateModel).all()
-    return [TemplateRead(id=i.id, name=i.name, description=i.description, payload=i.payload) for i in items]
+async def list_templates(
+    request: Request,
+    response: Response,
+    fields: Optional[List[str]] = Depends(sparse_fields),
+    db: AsyncSession = Depends(get_async_catalog_db),
+):
+    projection = Projection(TemplateRead, TemplateModel, fields)
+
+    async def load():
+        return (await db.execute(select(*projection.columns))).all()
+
+    return await catalog_cache.get_or_load(request, response, TEMPLATES, load)
 
 
 @router.get("/{template_id}", response_model=TemplateRead)
-def get_template(template_id: int, db: Session = Depends(get_db)):
-    tmpl = db.query(TemplateModel).get(template_id)
-    if not tmpl:
-        raise HTTPException(status_code=404, detail="Template not found")
-    return TemplateRead(id=tmpl.id, name=tmpl.name, description=tmpl.description, payload=tmpl.payload)
+async def get_template(
+    template_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_catalog_db),
+):
+    async def load():
+        query = select(*schema_columns(TemplateRead, TemplateModel)).where(
+            TemplateModel.id == template_id
+        )
+        tmpl = (await db.execute(query)).first()
+        if not tmpl:
+            raise HTTPException(status_code=404, detail="Template not found")
+        return tmpl
+
+    return await catalog_cache.get_or_load(request, response, TEMPLATES, load)
 
 
 @router.put("/{template_id}", response_model=TemplateRead)
@@ -65,6 +90,7 @@ def update_template(template_id: int, item: TemplateCreate, db: Session = Depend
     db.add(tmpl)
     db.commit()
     db.refresh(tmpl)
+    catalog_cache.invalidate(TEMPLATES)
     return TemplateRead(id=tmpl.id, name=tmpl.name, description=tmpl.description, payload=tmpl.payload)
 
 
@@ -75,4 +101,5 @@ def delete_template(template_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Template not found")
     db.delete(tmpl)
     db.commit()
+    catalog_cache.invalidate(TEMPLATES)
     return {"ok": True}
@@ -3,11 +3,12 @@ User endpoints.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
+from api.v1.endpoints.auth import get_user_by_email, hash_new_password, save_user
 from core.database import get_db
 from core.deps import get_current_user
-from core.security import get_password_hash
 from models.user import User
 from models.roles import UserRole
 from schemas.user import UserResponse, UserRegister
@@ -16,21 +17,21 @@ router = APIRouter()
 
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def create_user(user_data: UserRegister, db: Session = Depends(get_db)):
+async def create_user(user_data: UserRegister, db: Session = Depends(get_db)):
     """
     Create a new user (customer registration).
     This is a public endpoint for customer registration.
     The role will default to CUSTOMER.
     """
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await run_in_threadpool(get_user_by_email, db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
 
     # Create new user with hashed password
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await hash_new_password(user_data.password)
     new_user = User(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -38,10 +39,7 @@ def create_user(user_data: UserRegister, db: Session = Depends(get_db)):
         last_name=user_data.last_name,
         # Role defaults to CUSTOMER from the model definition
     )
-
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await run_in_threadpool(save_user, db, new_user)
 
     return new_user
 
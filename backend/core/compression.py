@@ -0,0 +1,232 @@
+"""
+HTTP response compression.
+
+:class:`CompressionMiddleware` compresses responses with the best encoding
+the client accepts (``Accept-Encoding``) among ``COMPRESSION_ENCODINGS_STR``:
+zstd (requires the 'zstandard' package), brotli (requires the 'brotli'
+package) and gzip. Only text-like content types are compressed, each with
+its own level (:data:`CONTENT_TYPE_LEVELS`), and only bodies of at least
+``COMPRESSION_MIN_SIZE`` bytes. Streamed responses are compressed chunk by
+chunk, flushing after each one so clients receive data as it is produced.
+
+Responses that already carry a ``Content-Encoding`` pass through untouched:
+the catalog cache keeps a compressed copy of each hot entry per encoding
+(:func:`compress` at :data:`PRECOMPRESSED_LEVELS`) and sends that instead of
+having every request compress the same bytes again.
+"""
+
+import zlib
+from typing import Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP = "gzip"
+BROTLI = "br"
+ZSTD = "zstd"
+
+# Levels of responses compressed per request, by content type prefix; other
+# content types (images, archives, ...) are sent as they are
+CONTENT_TYPE_LEVELS: Dict[str, Dict[str, int]] = {
+    "application/json": {ZSTD: 3, BROTLI: 4, GZIP: 6},
+    "text/": {ZSTD: 3, BROTLI: 5, GZIP: 6},
+    "application/javascript": {ZSTD: 3, BROTLI: 5, GZIP: 6},
+    "image/svg+xml": {ZSTD: 3, BROTLI: 5, GZIP: 6},
+}
+
+# Levels of cached responses, which are compressed once and sent many times
+PRECOMPRESSED_LEVELS: Dict[str, int] = {ZSTD: 12, BROTLI: 9, GZIP: 9}
+
+
+def available_encodings() -> List[str]:
+    """Configured encodings whose library is installed, in order of preference."""
+    installed = {GZIP: True, BROTLI: brotli is not None, ZSTD: zstandard is not None}
+    return [encoding for encoding in settings.COMPRESSION_ENCODINGS if installed.get(encoding)]
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Encoding to use for a request's ``Accept-Encoding`` header.
+
+    Picks the available encoding with the highest quality value; ties go to
+    the server's order of preference. ``None`` means send the body as is.
+    """
+    if not accept_encoding:
+        return None
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in available_encodings():
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def content_type_levels(content_type: Optional[str]) -> Optional[Dict[str, int]]:
+    """Compression levels for ``content_type``, or ``None`` if it is not compressed."""
+    if not content_type:
+        return None
+    content_type = content_type.lower()
+    for prefix, levels in CONTENT_TYPE_LEVELS.items():
+        if content_type.startswith(prefix):
+            return levels
+    return None
+
+
+class _Compressor:
+    """Streaming compressor with the same interface for every encoding."""
+
+    def __init__(self, encoding: str, level: int):
+        if encoding == GZIP:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self.compress = self._compressor.compress
+            self.flush = lambda: self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self.finish = self._compressor.flush
+        elif encoding == BROTLI:
+            self._compressor = brotli.Compressor(quality=level)
+            self.compress = self._compressor.process
+            self.flush = self._compressor.flush
+            self.finish = self._compressor.finish
+        elif encoding == ZSTD:
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+            self.compress = self._compressor.compress
+            self.flush = lambda: self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            self.finish = self._compressor.flush
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    """Compress a whole body."""
+    compressor = _Compressor(encoding, level)
+    return compressor.compress(data) + compressor.finish()
+
+
+def variant_etag(etag: str, encoding: Optional[str]) -> str:
+    """ETag of the ``encoding`` variant of a representation (strong ETags differ per encoding)."""
+    if encoding is None or etag.startswith("W/"):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def add_vary(headers: MutableHeaders) -> None:
+    """Add ``Accept-Encoding`` to the ``Vary`` header."""
+    vary = headers.get("vary")
+    if not vary:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses as negotiated with :func:`negotiate`."""
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        minimum_size = (
+            settings.COMPRESSION_MIN_SIZE
+            if self.minimum_size is None
+            else self.minimum_size
+        )
+        await _CompressedResponse(self.app, encoding, minimum_size)(scope, receive, send)
+
+
+class _CompressedResponse:
+    """Compression state of one response."""
+
+    def __init__(self, app: ASGIApp, encoding: Optional[str], minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.level = 0
+        self.start: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async def wrapped_send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                self._prepare(message)
+                if self.passthrough:
+                    await send(message)
+                else:
+                    # Wait for the first body chunk to know its size
+                    self.start = message
+                return
+            if message["type"] != "http.response.body" or self.passthrough:
+                await send(message)
+                return
+            await self._send_body(message, send)
+
+        await self.app(scope, receive, wrapped_send)
+
+    def _prepare(self, message: Message) -> None:
+        headers = MutableHeaders(raw=message["headers"])
+        levels = content_type_levels(headers.get("content-type"))
+        if levels is None or "content-encoding" in headers or message["status"] in (204, 304):
+            self.passthrough = True
+            return
+        add_vary(headers)
+        if self.encoding is None:
+            self.passthrough = True
+            return
+        self.level = levels[self.encoding]
+
+    async def _send_body(self, message: Message, send: Send) -> None:
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is not None:
+            start, self.start = self.start, None
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await send(start)
+                await send(message)
+                return
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            if "etag" in headers:
+                headers["ETag"] = variant_etag(headers["etag"], self.encoding)
+            if not more_body:
+                body = compress(body, self.encoding, self.level)
+                headers["Content-Length"] = str(len(body))
+                await send(start)
+                await send({"type": "http.response.body", "body": body})
+                return
+            del headers["Content-Length"]
+            self.compressor = _Compressor(self.encoding, self.level)
+            await send(start)
+        if more_body:
+            chunk = self.compressor.compress(body) + self.compressor.flush()
+        else:
+            chunk = self.compressor.compress(body) + self.compressor.finish()
+        await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -1,19 +1,274 @@
 """
 Database session management.
+
+Two engines share the same database: the sync engine (psycopg2) behind
+``get_db`` and an async engine (asyncpg) behind ``get_async_db``. Endpoints
+declared ``async def`` use the async session so waiting on Postgres does not
+hold a threadpool thread; sync endpoints keep using ``get_db``.
+
+Each engine has its own pool sized by the ``DATABASE_POOL_*`` settings.
+Pool usage is exported as ``db.pool.*`` (sync) and ``db.async_pool.*``
+gauges, and the time spent waiting for a connection as a histogram.
+
+Read-only endpoints use ``get_async_read_db``, which spreads sessions over
+the ``DATABASE_REPLICA_URLS`` replicas. A client that has just sent a write
+request (see ``track_writes``) reads from the primary for
+``DATABASE_REPLICA_STICKY_SECONDS`` so it sees its own changes despite
+replication lag. The database is picked when a read session runs its first
+statement, which is also when ``db.reads.primary`` / ``db.reads.replica``
+are counted, so requests answered without a query do not count.
 """
 
+import itertools
+import threading
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
 
 from core.config import settings
+from core.metrics import metrics
+from core.redis_client import get_redis, get_sync_redis
+from core.security import verify_access_token
+
+
+def async_database_url(url: str) -> str:
+    """The asyncpg form of a ``postgresql://`` database URL."""
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+class _TimedPoolMixin:
+    """Records how long checkouts wait for a connection, and pool timeouts."""
+
+    metric_prefix = "db.pool"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics.incr(f"{self.metric_prefix}.timeouts")
+            raise
+        finally:
+            metrics.observe(f"{self.metric_prefix}.wait_seconds", time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    """``QueuePool`` of the sync engine with checkout wait metrics."""
+
+    metric_prefix = "db.pool"
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    """``AsyncAdaptedQueuePool`` of the async engine with checkout wait metrics."""
+
+    metric_prefix = "db.async_pool"
+
+
+def engine_options(
+    async_driver: bool = False, metric_prefix: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    ``create_engine`` / ``create_async_engine`` keyword arguments from settings.
+
+    Args:
+        async_driver: Options for the asyncpg engine instead of psycopg2
+        metric_prefix: Report pool waits under this name instead of the default
+
+    Returns:
+        Pool class, pool sizing and driver ``connect_args``
+    """
+    options: Dict[str, Any] = {"pool_pre_ping": settings.DATABASE_POOL_PRE_PING}
+    if settings.DATABASE_NULL_POOL:
+        options["poolclass"] = NullPool
+    else:
+        poolclass = TimedAsyncQueuePool if async_driver else TimedQueuePool
+        if metric_prefix is not None:
+            # A class attribute, because dispose() recreates the pool from its class
+            poolclass = type(poolclass.__name__, (poolclass,), {"metric_prefix": metric_prefix})
+        options.update(
+            poolclass=poolclass,
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        )
+
+    connect_args: Dict[str, Any] = {}
+    # PgBouncer refuses unknown startup parameters; set the timeout on the role instead
+    if settings.DATABASE_STATEMENT_TIMEOUT_MS and not settings.DATABASE_PGBOUNCER:
+        timeout = str(settings.DATABASE_STATEMENT_TIMEOUT_MS)
+        if async_driver:
+            connect_args["server_settings"] = {"statement_timeout": timeout}
+        else:
+            connect_args["options"] = f"-c statement_timeout={timeout}"
+    if settings.DATABASE_PGBOUNCER and async_driver:
+        # In transaction pooling mode consecutive statements may run on different
+        # server connections, so asyncpg must not reuse named prepared statements
+        # (psycopg2 does not use server-side prepared statements at all)
+        connect_args.update(
+            statement_cache_size=0,
+            prepared_statement_cache_size=0,
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid.uuid4()}__",
+        )
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def register_pool_metrics(prefix: str, engine) -> None:
+    """Export the size and usage of ``engine``'s connection pool as gauges."""
+
+    def pool() -> Pool:
+        # Read on every snapshot: dispose() replaces the pool
+        return engine.pool
+
+    if isinstance(pool(), NullPool):
+        return
+    metrics.register_gauge(f"{prefix}.size", lambda: pool().size())
+    metrics.register_gauge(f"{prefix}.checked_out", lambda: pool().checkedout())
+    metrics.register_gauge(f"{prefix}.checked_in", lambda: pool().checkedin())
+    # overflow() counts up from -pool_size until the pool is full
+    metrics.register_gauge(f"{prefix}.overflow", lambda: max(pool().overflow(), 0))
+
 
 # Create database engine
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(settings.DATABASE_URL, **engine_options())
+register_pool_metrics(TimedQueuePool.metric_prefix, engine)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine and session factory. expire_on_commit=False: attributes cannot
+# be lazily refreshed in async code, so objects stay readable after commit.
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL), **engine_options(async_driver=True)
+)
+register_pool_metrics(TimedAsyncQueuePool.metric_prefix, async_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Read replicas (async only: the read-only endpoints are async)
+replica_engines: List[AsyncEngine] = []
+_replica_counter = itertools.count()
+
+
+def configure_replicas(urls: List[str]) -> List[AsyncEngine]:
+    """
+    Create engines and session factories for the given replica URLs.
+
+    Returns the previous replica engines so the caller can dispose them.
+    """
+    global replica_engines
+    previous = replica_engines
+    replica_engines = []
+    for index, url in enumerate(urls):
+        prefix = f"db.replica_pool.{index}"
+        replica = create_async_engine(
+            async_database_url(url), **engine_options(async_driver=True, metric_prefix=prefix)
+        )
+        register_pool_metrics(prefix, replica)
+        replica_engines.append(replica)
+    return previous
+
+
+configure_replicas(settings.DATABASE_REPLICA_URLS)
+
+
+async def dispose_async_engines() -> None:
+    """Close the connections of the async primary and replica engines."""
+    await async_engine.dispose()
+    for replica in replica_engines:
+        await replica.dispose()
+
+
+class RecentWrites:
+    """
+    Clients that sent a write request within the sticky window.
+
+    Kept in-process and, when Redis is available, in Redis so every API
+    process routes a client's reads to the primary after a write.
+    """
+
+    KEY_PREFIX = "db:recent_write:"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._expires: Dict[str, float] = {}
+
+    def _mark_local(self, client_key: str, window: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._expires[client_key] = now + window
+            # Drop expired entries now and then so the map stays small
+            if len(self._expires) > 10000:
+                self._expires = {
+                    key: expires
+                    for key, expires in self._expires.items()
+                    if expires > now
+                }
+
+    async def mark(self, client_key: str) -> None:
+        """Record a write by ``client_key``."""
+        window = settings.DATABASE_REPLICA_STICKY_SECONDS
+        if not window:
+            return
+        self._mark_local(client_key, window)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.set(self.KEY_PREFIX + client_key, 1, px=max(int(window * 1000), 1))
+            except Exception as e:
+                print(f"⚠️ Failed to record recent write: {e}")
+
+    def mark_sync(self, client_key: str) -> None:
+        """Blocking variant of :meth:`mark`, for sync code."""
+        window = settings.DATABASE_REPLICA_STICKY_SECONDS
+        if not window:
+            return
+        self._mark_local(client_key, window)
+        redis = get_sync_redis()
+        if redis is not None:
+            try:
+                redis.set(self.KEY_PREFIX + client_key, 1, px=max(int(window * 1000), 1))
+            except Exception as e:
+                print(f"⚠️ Failed to record recent write: {e}")
+
+    async def contains(self, client_key: str) -> bool:
+        """Whether ``client_key`` wrote within the sticky window."""
+        with self._lock:
+            expires = self._expires.get(client_key)
+        if expires is not None and expires > time.monotonic():
+            return True
+        redis = get_redis()
+        if redis is None:
+            return False
+        try:
+            return bool(await redis.exists(self.KEY_PREFIX + client_key))
+        except Exception as e:
+            # Without the shared state, the primary is the safe choice
+            print(f"⚠️ Failed to check recent writes: {e}")
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._expires.clear()
+
+
+recent_writes = RecentWrites()
+
 # Base class for models
 Base = declarative_base()
 
@@ -27,3 +282,138 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency that provides an async database session.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def client_key(request: Request) -> str:
+    """Identify the client for read-your-writes routing: user id, else address."""
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        payload = verify_access_token(token)
+        if payload and (payload.get("uid") or payload.get("sub")):
+            return f"user:{payload.get('uid') or payload.get('sub')}"
+    client = request.client
+    return f"addr:{client.host if client is not None else 'unknown'}"
+
+
+async def track_writes(request: Request) -> AsyncIterator[None]:
+    """
+    Router dependency that records write requests for read-your-writes.
+
+    The write is recorded when the request starts and again when the
+    endpoint returns, so the sticky window covers the whole request.
+    """
+    if request.method in ("GET", "HEAD", "OPTIONS") or not replica_engines:
+        yield
+        return
+    key = client_key(request)
+    await recent_writes.mark(key)
+    yield
+    await recent_writes.mark(key)
+
+
+# Recorded by every catalog write (see record_catalog_write)
+CATALOG_WRITER = "catalog"
+
+
+def record_catalog_write() -> None:
+    """
+    Send catalog cache misses to the primary for the sticky window.
+
+    Called when catalog responses are invalidated: a miss loaded from a
+    lagging replica right after the write would otherwise be cached, for
+    every client, in the state from before the write.
+    """
+    if replica_engines:
+        recent_writes.mark_sync(CATALOG_WRITER)
+
+
+class ReadSession(AsyncSession):
+    """
+    Async session of a read-only endpoint that picks its database lazily.
+
+    ``route`` is awaited when the first statement runs and returns the
+    engine to use and ``"primary"`` or ``"replica"`` for the
+    ``db.reads.*`` counter.
+    """
+
+    def __init__(self, route: Callable[[], Awaitable[Tuple[AsyncEngine, str]]], **kwargs: Any):
+        super().__init__(bind=async_engine, **kwargs)
+        self._route = route
+        self._routed = False
+
+    async def _use_routed_bind(self) -> None:
+        if self._routed:
+            return
+        engine, target = await self._route()
+        self.bind = engine
+        self.sync_session.bind = engine.sync_engine
+        self._routed = True
+        metrics.incr(f"db.reads.{target}")
+
+    async def execute(self, *args: Any, **kwargs: Any):
+        await self._use_routed_bind()
+        return await super().execute(*args, **kwargs)
+
+    async def scalar(self, *args: Any, **kwargs: Any):
+        await self._use_routed_bind()
+        return await super().scalar(*args, **kwargs)
+
+    async def scalars(self, *args: Any, **kwargs: Any):
+        await self._use_routed_bind()
+        return await super().scalars(*args, **kwargs)
+
+    async def get(self, *args: Any, **kwargs: Any):
+        await self._use_routed_bind()
+        return await super().get(*args, **kwargs)
+
+    async def stream(self, *args: Any, **kwargs: Any):
+        await self._use_routed_bind()
+        return await super().stream(*args, **kwargs)
+
+
+async def _route_read(request: Request, catalog: bool = False) -> Tuple[AsyncEngine, str]:
+    if replica_engines and not await recent_writes.contains(client_key(request)):
+        catalog_cached = catalog and settings.CATALOG_CACHE_TTL_SECONDS > 0
+        if not (catalog_cached and await recent_writes.contains(CATALOG_WRITER)):
+            return replica_engines[next(_replica_counter) % len(replica_engines)], "replica"
+    return async_engine, "primary"
+
+
+def _read_session(request: Request, catalog: bool = False) -> ReadSession:
+    return ReadSession(
+        lambda: _route_read(request, catalog), autoflush=False, expire_on_commit=False
+    )
+
+
+async def get_async_read_db(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    Dependency that provides an async session for read-only endpoints.
+
+    Uses a replica (round robin) unless none is configured or the client
+    wrote recently, in which case the primary is used.
+    """
+    async with _read_session(request) as db:
+        yield db
+
+
+async def get_async_catalog_db(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    Dependency that provides an async session for cached catalog endpoints.
+
+    Like :func:`get_async_read_db`, so cache hits use no database at all and
+    misses go to a replica, except within the sticky window after any
+    catalog write (see :func:`record_catalog_write`), when misses are loaded
+    from the primary so a lagging replica cannot refill the cache with the
+    state from before the write.
+    """
+    async with _read_session(request, catalog=True) as db:
+        yield db
@@ -2,24 +2,53 @@
 Dependencies for authentication.
 """
 
+import uuid
 from typing import List, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.database import get_db
+from core.database import get_async_db
 from core.security import verify_access_token
 from models.user import User
 from models.roles import UserRole
+from services.user_cache import user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+async def _load_user(
+    db: AsyncSession, user_id: Optional[str], email: Optional[str]
+) -> Optional[User]:
+    """Load a user by id (or by email for tokens without an id) and detach it."""
+    query = select(User)
+    if user_id is not None:
+        query = query.where(User.id == uuid.UUID(user_id))
+    else:
+        query = query.where(User.email == email)
+    user = (await db.execute(query)).scalars().first()
+    if user is not None:
+        db.expunge(user)
+    return user
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """
     Get the current authenticated user from the token.
+
+    Tokens carrying a user id (``uid``) are resolved through the in-process
+    user cache, so repeated requests do not query the database. The token's
+    security version (``sv``) must match the user's; it changes when an admin
+    updates access-relevant fields, which revokes older tokens. Tokens issued
+    before tokens carried these claims are looked up by email and count as
+    security version 0, the version every user had then, so they are revoked
+    by the same admin changes.
+
+    The returned user is detached and may be shared with other requests, so
+    it must not be modified; load the row from ``db`` to update it.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -32,10 +61,30 @@ def get_current_user(
         raise credentials_exception
 
     email: Optional[str] = payload.get("sub")
+    user_id: Optional[str] = payload.get("uid")
     if email is None:
         raise credentials_exception
 
-    user = db.query(User).filter(User.email == email).first()
+    if user_id is not None:
+        try:
+            user_id = str(uuid.UUID(user_id))
+        except ValueError:
+            raise credentials_exception
+
+    if user_id is None:
+        # Token issued before tokens carried user ids
+        user = await _load_user(db, None, email)
+        if user is not None and user.security_version != payload.get("sv", 0):
+            raise credentials_exception
+    else:
+        user = user_cache.get(user_id)
+        if user is None or user.security_version != payload.get("sv"):
+            # Miss, or a cached row older than the token: reload
+            user = await _load_user(db, user_id, None)
+            if user is not None:
+                user_cache.set(user)
+        if user is not None and user.security_version != payload.get("sv"):
+            raise credentials_exception
     if user is None:
         raise credentials_exception
 
@@ -68,7 +117,7 @@ class RoleChecker:
         """
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: User = Depends(get_current_user)) -> User:
+    async def __call__(self, current_user: User = Depends(get_current_user)) -> User:
         """
         Check if the current user has one of the allowed roles.
 
@@ -102,7 +151,7 @@ is_tailor_or_admin = RoleChecker([UserRole.TAILOR, UserRole.ADMIN])
 
 
 # Legacy compatibility functions - kept for backward compatibility
-def get_current_admin_user(
+async def get_current_admin_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
     """
@@ -118,7 +167,7 @@ def get_current_admin_user(
     return current_user
 
 
-def get_current_designer_user(
+async def get_current_designer_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
     """
@@ -134,7 +183,7 @@ def get_current_designer_user(
     return current_user
 
 
-def get_current_tailor_user(
+async def get_current_tailor_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
     """
@@ -0,0 +1,126 @@
+"""
+Fast JSON rendering for list endpoints.
+
+By default FastAPI renders a ``response_model`` list by validating every ORM
+object through its pydantic ``orm_mode`` model, converting the result with
+``jsonable_encoder`` and encoding that with the stdlib ``json``; for a page
+of 100 rows this costs more CPU than the query. Endpoints opt in to a
+cheaper path: they select only the columns of their response schema
+(:func:`schema_columns`) with a Core ``select()`` and return the row tuples
+as JSON bytes encoded by orjson (:func:`json_response`), which handles
+UUIDs, datetimes and enums natively. Rows are not validated; the selected
+columns are the schema's fields, so the body has the same shape, and the
+``response_model`` still documents it in OpenAPI.
+
+``scripts/bench_json_lists.py`` compares the CPU time per page of both paths.
+
+List endpoints also accept ``fields=id,name,...`` (:func:`sparse_fields`);
+:class:`Projection` then selects only those columns (plus the pagination
+keys), so grid views skip large columns in the query as well as the body.
+"""
+
+import uuid
+from typing import Any, List, Mapping, Optional, Sequence, Type
+
+import orjson
+from fastapi import HTTPException, Query, Response, status
+from pydantic import BaseModel
+
+
+class JSONBytesResponse(Response):
+    """Response whose content is already encoded JSON."""
+    media_type = "application/json"
+
+
+def schema_columns(schema: Type[BaseModel], entity) -> List:
+    """Columns of the mapped class ``entity`` named like the fields of ``schema``."""
+    return [getattr(entity, name) for name in schema.__fields__]
+
+
+def sparse_fields(
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to return (default: all), e.g. id,name,base_image_url",
+    ),
+) -> Optional[List[str]]:
+    """Dependency parsing the ``fields`` query parameter."""
+    if not fields:
+        return None
+    return [name.strip() for name in fields.split(",") if name.strip()]
+
+
+class Projection:
+    """
+    Columns of a response schema to select, restricted to ``fields`` if given.
+
+    ``columns`` also contains ``keys`` (pagination keys) so cursors can be
+    computed; :meth:`rows` drops them again unless they were requested.
+    """
+
+    def __init__(
+        self,
+        schema: Type[BaseModel],
+        entity,
+        fields: Optional[List[str]] = None,
+        keys: Sequence = (),
+    ):
+        """
+        Args:
+            schema: Response schema of one row
+            entity: Mapped class with a column for each schema field
+            fields: Requested field names (all schema fields if empty)
+            keys: Columns the rows must include, e.g. the page keys
+
+        Raises:
+            HTTPException: 400 if a requested field is not in the schema
+        """
+        available = list(schema.__fields__)
+        unknown = [name for name in fields or () if name not in available]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(available)}",
+            )
+        self.names = list(dict.fromkeys(fields)) if fields else available
+        extra = [key.key for key in keys if key.key not in self.names]
+        self.columns = [getattr(entity, name) for name in self.names + extra]
+        self._trim = bool(extra)
+
+    def rows(self, rows: Sequence) -> List:
+        """The requested fields of ``rows`` (result rows selected with :attr:`columns`)."""
+        if not self._trim:
+            return list(rows)
+        return [{name: getattr(row, name) for name in self.names} for row in rows]
+
+
+def _default(value: Any) -> Any:
+    # asyncpg returns its own UUID type, which orjson does not recognise
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def render(body: Any) -> bytes:
+    """
+    Encode ``body`` as JSON.
+
+    ``body`` may be a result row, a list of rows or any value orjson
+    encodes (dicts, lists, UUIDs, datetimes, enums, ...).
+    """
+    if hasattr(body, "_asdict"):
+        body = body._asdict()
+    elif isinstance(body, list) and body and hasattr(body[0], "_asdict"):
+        body = [row._asdict() for row in body]
+    return orjson.dumps(body, default=_default)
+
+
+def json_response(body: Any, headers: Optional[Mapping[str, str]] = None) -> JSONBytesResponse:
+    """
+    Response with ``body`` encoded by orjson, bypassing the response_model.
+
+    Args:
+        body: Result rows or any JSON-compatible value
+        headers: Headers to send, e.g. those set on the endpoint's ``Response``
+            parameter (which FastAPI ignores when a response is returned)
+    """
+    return JSONBytesResponse(render(body), headers=dict(headers or {}))
@@ -0,0 +1,73 @@
+"""
+In-process application metrics.
+
+Counters are incremented where events happen and gauges are read from
+registered callbacks when a snapshot is taken. Histograms are kept as
+cumulative bucket counters (``<name>.le_<bound>``) plus ``<name>.count`` and
+``<name>.sum``. ``GET /metrics`` returns the
+snapshot as JSON. Values are per process; with several workers, aggregate
+them in the monitoring system.
+"""
+
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Sequence, Union
+
+Number = Union[int, float]
+
+# Upper bounds in seconds for latency histograms
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Metrics:
+    """Thread-safe registry of named counters and gauges."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Number] = defaultdict(int)
+        self._gauges: Dict[str, Callable[[], Number]] = {}
+
+    def incr(self, name: str, value: Number = 1) -> None:
+        """Add ``value`` to the counter ``name``."""
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, value: Number, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        """Record ``value`` in the histogram ``name``."""
+        with self._lock:
+            for bound in buckets:
+                # Adding 0 still creates the bucket, so every bound is reported
+                self._counters[f"{name}.le_{bound:g}"] += 1 if value <= bound else 0
+            self._counters[f"{name}.count"] += 1
+            self._counters[f"{name}.sum"] += value
+
+    def get(self, name: str) -> Number:
+        """Current value of the counter ``name`` (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def register_gauge(self, name: str, callback: Callable[[], Number]) -> None:
+        """Report ``callback()`` as ``name`` in every snapshot."""
+        with self._lock:
+            self._gauges[name] = callback
+
+    def snapshot(self) -> Dict[str, Number]:
+        """All counters and gauges, sorted by name."""
+        with self._lock:
+            values = dict(self._counters)
+            gauges = dict(self._gauges)
+        for name, callback in gauges.items():
+            try:
+                values[name] = callback()
+            except Exception as e:
+                print(f"⚠️ Metric {name} unavailable: {e}")
+        return dict(sorted(values.items()))
+
+    def reset(self) -> None:
+        """Zero all counters (gauges are kept)."""
+        with self._lock:
+            self._counters.clear()
+
+
+# Singleton instance
+metrics = Metrics()
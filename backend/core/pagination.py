@@ -0,0 +1,169 @@
+"""
+Offset and keyset (cursor) pagination for list endpoints.
+
+List endpoints return newest rows first, ordered by a timestamp column and
+the primary key as tie-breaker. Besides ``skip``/``limit`` they accept an
+opaque ``cursor``: keyset pagination continues after (or before) a row
+instead of skipping rows, so deep pages cost the same as the first one and
+rows inserted while a client scrolls do not shift the pages it has not seen
+yet. The body stays a plain list; cursors for the neighbouring pages are
+returned in the ``X-Next-Cursor`` / ``X-Prev-Cursor`` and ``Link`` headers,
+including on offset pages, so a client can switch to cursors after the first
+request.
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Request, Response, status
+from sqlalchemy import tuple_
+
+NEXT = "n"
+PREV = "p"
+
+PAGINATION_HEADERS = ["X-Next-Cursor", "X-Prev-Cursor", "Link"]
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded."""
+    pass
+
+
+def encode_cursor(direction: str, key: Tuple[datetime, uuid.UUID]) -> str:
+    """Opaque cursor pointing before (``PREV``) or after (``NEXT``) ``key``."""
+    payload = json.dumps([direction, key[0].isoformat(), str(key[1])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Tuple[datetime, uuid.UUID]]:
+    """
+    Decode a cursor created by :func:`encode_cursor`.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if direction not in (NEXT, PREV):
+            raise ValueError(direction)
+        moment = datetime.fromisoformat(timestamp)
+        # Keys are timestamptz values; a naive one cannot be compared with them
+        if moment.tzinfo is None:
+            raise ValueError(timestamp)
+        return direction, (moment, uuid.UUID(row_id))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+class Pagination:
+    """
+    Pagination parameters of a list request (use as ``Depends()``).
+
+    ``apply`` adds ordering, the page bounds and a one-row lookahead to a
+    query; ``finish`` trims the lookahead, works out the neighbouring pages
+    and sets the cursor headers on the response.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        response: Response,
+        skip: int = Query(
+            0, ge=0, description="Number of rows to skip (offset pagination)"
+        ),
+        limit: int = Query(100, ge=1, description="Maximum number of rows to return"),
+        cursor: Optional[str] = Query(
+            None,
+            description=(
+                "Cursor from X-Next-Cursor / X-Prev-Cursor "
+                "of a previous page (skip is ignored)"
+            ),
+        ),
+    ):
+        self.request = request
+        self.response = response
+        self.skip = skip
+        self.limit = limit
+        try:
+            self.cursor = decode_cursor(cursor) if cursor else None
+        except InvalidCursor as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        self.next_cursor: Optional[str] = None
+        self.prev_cursor: Optional[str] = None
+
+    @property
+    def backwards(self) -> bool:
+        return self.cursor is not None and self.cursor[0] == PREV
+
+    def apply(self, query, keys: Sequence):
+        """
+        Restrict ``query`` (a ``select`` or ``Query``) to this page.
+
+        Args:
+            query: Query selecting the rows to paginate
+            keys: Timestamp column and primary key column, newest first
+        """
+        key = tuple_(*keys)
+        if self.cursor is None:
+            return (
+                query.order_by(*(column.desc() for column in keys))
+                .offset(self.skip)
+                .limit(self.limit + 1)
+            )
+        if self.backwards:
+            # Walk towards newer rows, then reverse the page in finish()
+            query = query.filter(key > tuple_(*self.cursor[1])).order_by(
+                *(column.asc() for column in keys)
+            )
+        else:
+            query = query.filter(key < tuple_(*self.cursor[1])).order_by(
+                *(column.desc() for column in keys)
+            )
+        return query.limit(self.limit + 1)
+
+    def finish(self, rows: Sequence, keys: Sequence) -> List:
+        """
+        Trim the lookahead row from ``rows`` and set the cursor headers.
+
+        Args:
+            rows: Rows returned by the query from :meth:`apply`
+            keys: The same columns as passed to :meth:`apply`
+        """
+        rows = list(rows)
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if self.backwards:
+            rows.reverse()
+            more_before, more_after = has_more, True
+        else:
+            more_before, more_after = self.cursor is not None or self.skip > 0, has_more
+        if rows:
+            names = [column.key for column in keys]
+            if more_after:
+                self.next_cursor = encode_cursor(
+                    NEXT, tuple(getattr(rows[-1], name) for name in names)
+                )
+            if more_before:
+                self.prev_cursor = encode_cursor(
+                    PREV, tuple(getattr(rows[0], name) for name in names)
+                )
+        self._set_headers()
+        return rows
+
+    def _set_headers(self) -> None:
+        links = []
+        for rel, header, cursor in (
+            ("next", "X-Next-Cursor", self.next_cursor),
+            ("prev", "X-Prev-Cursor", self.prev_cursor),
+        ):
+            if cursor is None:
+                continue
+            self.response.headers[header] = cursor
+            url = self.request.url.remove_query_params("skip").include_query_params(cursor=cursor)
+            links.append(f'<{url}>; rel="{rel}"')
+        if links:
+            self.response.headers["Link"] = ", ".join(links)
@@ -0,0 +1,60 @@
+"""
+Shared Redis connection.
+
+The application lifespan opens a single client with :func:`init_redis`; other
+modules obtain it through :func:`get_redis`, which returns ``None`` when Redis
+is not configured or unreachable so callers can degrade gracefully. Sync code
+running on the threadpool uses the blocking client from
+:func:`get_sync_redis`, which is available under the same conditions.
+"""
+
+from typing import Optional
+
+import redis as sync_redis
+import redis.asyncio as redis
+
+from core.config import settings
+
+_redis: Optional[redis.Redis] = None
+_sync_redis: Optional[sync_redis.Redis] = None
+
+
+async def init_redis() -> redis.Redis:
+    """
+    Connect to Redis and make the client available via :func:`get_redis`.
+
+    Raises:
+        redis.RedisError: If the server cannot be reached
+    """
+    global _redis, _sync_redis
+    redis_url = settings.REDIS_URL or "redis://localhost:6379/0"
+    client = redis.from_url(redis_url, encoding="utf8", decode_responses=True)
+    try:
+        await client.ping()
+    except Exception:
+        await client.close()
+        raise
+    _redis = client
+    _sync_redis = sync_redis.from_url(redis_url, encoding="utf8", decode_responses=True)
+    return client
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """Return the shared Redis client, or None if it is not available."""
+    return _redis
+
+
+def get_sync_redis() -> Optional[sync_redis.Redis]:
+    """Return the shared blocking Redis client, or None if Redis is not available."""
+    return _sync_redis
+
+
+async def close_redis() -> None:
+    """Close the shared Redis clients."""
+    global _redis, _sync_redis
+    if _redis is not None:
+        await _redis.close()
+    if _sync_redis is not None:
+        _sync_redis.close()
+    _redis = None
+    _sync_redis = None
@@ -10,17 +10,20 @@ from jose import JWTError, jwt
 from core.config import settings
 
 
-def hash_password(password: str) -> str:
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
     """Hash password using SHA-256 pre-hash + bcrypt.
 
     This avoids the bcrypt 72-byte input limitation by hashing the
     input with SHA-256 first, then passing the 32-byte digest to bcrypt.
     Returns the bcrypt hash as a UTF-8 string.
+
+    ``rounds`` is the bcrypt cost factor (default: ``BCRYPT_ROUNDS``). This
+    is CPU-bound; request handlers should use ``services.password_hasher``.
     """
     if isinstance(password, str):
         password = password.encode("utf-8")
     digest = hashlib.sha256(password).digest()
-    hashed = bcrypt.hashpw(digest, bcrypt.gensalt())
+    hashed = bcrypt.hashpw(digest, bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS))
     return hashed.decode("utf-8")
 
 
@@ -43,6 +46,15 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether a hash was made with a cost factor other than ``BCRYPT_ROUNDS``."""
+    try:
+        rounds = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds != settings.BCRYPT_ROUNDS
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -61,6 +73,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def user_token_claims(user) -> dict:
+    """Claims identifying ``user`` in an access token.
+
+    Besides the email (``sub``) and role used by the frontends, tokens carry
+    the user id, superuser flag and security version so requests can be
+    authenticated from the user cache without querying the database.
+    """
+    return {
+        "sub": user.email,
+        "uid": str(user.id),
+        "role": user.role.value,
+        "su": user.is_superuser,
+        "sv": user.security_version,
+    }
+
+
 def verify_access_token(token: str) -> Optional[dict]:
     """Verify and decode a JWT access token.
 
@@ -21,6 +21,8 @@ from crud.color import (
 from crud.design import (
     get_design,
     get_designs,
+    get_design_async,
+    get_designs_async,
     create_design,
     update_design,
     delete_design,
@@ -41,6 +43,8 @@ __all__ = [
     "delete_color",
     "get_design",
     "get_designs",
+    "get_design_async",
+    "get_designs_async",
     "create_design",
     "update_design",
     "delete_design",
@@ -0,0 +1,257 @@
+"""
+CRUD operations for Asset model.
+
+Assets are the rows behind content-addressed blobs (see services.blob_store).
+Reference counting functions do not commit, so the count changes in the
+same transaction as the measurement that references the blobs. Functions
+ending in ``_async`` take an ``AsyncSession``.
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from models.asset import Asset
+from services.blob_store import blob_digest
+from services.storage import storage
+
+
+class MissingAssetError(LookupError):
+    """Raised when a blob to reference has no asset row, e.g. because it was deleted meanwhile."""
+
+    pass
+
+
+def get_asset_by_digest(db: Session, digest: str) -> Optional[Asset]:
+    """Get an asset by the SHA-256 digest of its content."""
+    return db.query(Asset).filter(Asset.sha256 == digest).first()
+
+
+async def get_asset_by_digest_async(db: AsyncSession, digest: str) -> Optional[Asset]:
+    """Get an asset by the SHA-256 digest of its content (async session)."""
+    result = await db.execute(select(Asset).where(Asset.sha256 == digest))
+    return result.scalars().first()
+
+
+def _register_statement(
+    digest: str, storage_path: str, filename: str, content_type: Optional[str], size: int
+):
+    # clock_timestamp() rather than now(): a registration waiting for a
+    # concurrent one of the same digest gets a later time than it
+    statement = insert(Asset).values(
+        sha256=digest,
+        storage_path=storage_path,
+        filename=filename,
+        content_type=content_type,
+        size=size,
+        storage_backend=storage.name,
+        updated_at=func.clock_timestamp(),
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[Asset.sha256],
+        set_={"updated_at": func.clock_timestamp()},
+    ).returning(Asset.updated_at)
+
+
+def register_asset(
+    db: Session,
+    digest: str,
+    storage_path: str,
+    filename: str,
+    content_type: Optional[str],
+    size: int,
+) -> datetime:
+    """
+    Record a blob about to be stored, or mark an existing one as just uploaded again.
+
+    Call this before checking whether the blob's file exists (see
+    services.blob_store.BlobStore.commit): the upsert waits for a concurrent
+    deletion of the asset to finish removing its file, so the upload never
+    relies on a file that is being deleted. Re-uploads refresh
+    ``updated_at`` so the garbage collector keeps the blob for another
+    grace period.
+
+    Returns:
+        The registration time, which lets a failed upload remove the asset
+        only if nobody registered or referenced it since
+        (see :func:`delete_unreferenced_assets`)
+    """
+    registered_at = db.execute(
+        _register_statement(digest, storage_path, filename, content_type, size)
+    ).scalar_one()
+    db.commit()
+    return registered_at
+
+
+async def register_asset_async(
+    db: AsyncSession,
+    digest: str,
+    storage_path: str,
+    filename: str,
+    content_type: Optional[str],
+    size: int,
+) -> datetime:
+    """Async variant of :func:`register_asset`."""
+    result = await db.execute(
+        _register_statement(digest, storage_path, filename, content_type, size)
+    )
+    registered_at = result.scalar_one()
+    await db.commit()
+    return registered_at
+
+
+def _blob_references(image_paths: Optional[Dict[str, str]]) -> Counter:
+    return Counter(
+        digest
+        for digest in (
+            blob_digest(path)
+            for path in (image_paths or {}).values()
+            if isinstance(path, str)
+        )
+        if digest is not None
+    )
+
+
+def _ref_count_updates(references: Counter, sign: int):
+    return [
+        update(Asset)
+        .where(Asset.sha256 == digest)
+        .values(ref_count=Asset.ref_count + sign * count, updated_at=func.now())
+        .execution_options(synchronize_session=False)
+        for digest, count in references.items()
+    ]
+
+
+def _check_acquired(digest: str, rowcount: int, sign: int) -> None:
+    # The row lock taken by the update keeps the asset from being deleted
+    # until the transaction ends, so a row found here stays
+    if sign > 0 and rowcount == 0:
+        raise MissingAssetError(f"Blob {digest} is no longer stored; upload it again")
+
+
+def _adjust_ref_counts(db: Session, references: Counter, sign: int) -> None:
+    for digest, statement in zip(references, _ref_count_updates(references, sign)):
+        _check_acquired(digest, db.execute(statement).rowcount, sign)
+
+
+def acquire_assets(db: Session, image_paths: Optional[Dict[str, str]]) -> None:
+    """
+    Count a new reference to every blob in ``image_paths`` (does not commit).
+
+    Raises:
+        MissingAssetError: If a blob has no asset row
+    """
+    _adjust_ref_counts(db, _blob_references(image_paths), 1)
+
+
+async def acquire_assets_async(db: AsyncSession, image_paths: Optional[Dict[str, str]]) -> None:
+    """Async variant of :func:`acquire_assets` (does not commit)."""
+    references = _blob_references(image_paths)
+    for digest, statement in zip(references, _ref_count_updates(references, 1)):
+        _check_acquired(digest, (await db.execute(statement)).rowcount, 1)
+
+
+def release_assets(db: Session, image_paths: Optional[Dict[str, str]]) -> None:
+    """Drop a reference to every blob in ``image_paths`` (does not commit)."""
+    _adjust_ref_counts(db, _blob_references(image_paths), -1)
+
+
+def replace_assets(
+    db: Session, old_paths: Optional[Dict[str, str]], new_paths: Optional[Dict[str, str]]
+) -> None:
+    """
+    Move references from ``old_paths`` to ``new_paths`` (does not commit).
+
+    Raises:
+        MissingAssetError: If a blob of ``new_paths`` has no asset row
+    """
+    old, new = _blob_references(old_paths), _blob_references(new_paths)
+    _adjust_ref_counts(db, new - old, 1)
+    _adjust_ref_counts(db, old - new, -1)
+
+
+def _unreferenced_query(
+    updated_before: Optional[datetime], registrations: Optional[Dict[str, datetime]]
+):
+    query = select(Asset).where(Asset.sha256.isnot(None), Asset.ref_count <= 0)
+    if updated_before is not None:
+        query = query.where(Asset.updated_at < updated_before)
+    if registrations is not None:
+        query = query.where(or_(*(
+            and_(Asset.sha256 == digest, Asset.updated_at <= registered_at)
+            for digest, registered_at in registrations.items()
+        )))
+    return query.with_for_update(skip_locked=True)
+
+
+def delete_unreferenced_assets(
+    db: Session,
+    updated_before: Optional[datetime],
+    remove: Callable[[List[str]], None],
+    registrations: Optional[Dict[str, datetime]] = None,
+) -> List[str]:
+    """
+    Delete unreferenced blob assets and their files.
+
+    The files are removed while the deleted rows are still locked, and the
+    deletion is committed only afterwards: an upload of the same content
+    registers its asset first (see :func:`register_asset`), so it waits for
+    the files to be gone and then stores its blob again instead of trusting
+    a file that is about to be removed.
+
+    Args:
+        db: Database session
+        updated_before: Only delete assets not uploaded or referenced since
+            (None for no age limit)
+        remove: Removes the files at the given storage paths
+        registrations: Optionally restrict deletion to these digests, each
+            only if not uploaded or referenced after the given time (the
+            caller's own registration, see :func:`register_asset`), so a
+            concurrent upload of the same content keeps its blob
+
+    Returns:
+        Storage paths of the deleted assets
+    """
+    if registrations is not None and not registrations:
+        return []
+    assets = db.execute(_unreferenced_query(updated_before, registrations)).scalars().all()
+    paths = [asset.storage_path for asset in assets]
+    try:
+        for asset in assets:
+            db.delete(asset)
+        db.flush()
+        remove(paths)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return paths
+
+
+async def delete_unreferenced_assets_async(
+    db: AsyncSession,
+    updated_before: Optional[datetime],
+    remove: Callable[[List[str]], Awaitable[None]],
+    registrations: Optional[Dict[str, datetime]] = None,
+) -> List[str]:
+    """Async variant of :func:`delete_unreferenced_assets`."""
+    if registrations is not None and not registrations:
+        return []
+    assets = (await db.execute(_unreferenced_query(updated_before, registrations))).scalars().all()
+    paths = [asset.storage_path for asset in assets]
+    try:
+        for asset in assets:
+            await db.delete(asset)
+        await db.flush()
+        await remove(paths)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return paths
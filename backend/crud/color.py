@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 
 from models.color import Color
 from schemas.color import ColorCreate, ColorUpdate
+from services.catalog_cache import BOOTSTRAP, catalog_cache
 
 
 def get_color(db: Session, color_id: UUID) -> Optional[Color]:
@@ -31,6 +32,7 @@ def create_color(db: Session, color: ColorCreate) -> Color:
     db.add(db_color)
     db.commit()
     db.refresh(db_color)
+    catalog_cache.invalidate(BOOTSTRAP)
     return db_color
 
 
@@ -46,6 +48,7 @@ def update_color(db: Session, color_id: UUID, color: ColorUpdate) -> Optional[Co
 
     db.commit()
     db.refresh(db_color)
+    catalog_cache.invalidate(BOOTSTRAP)
     return db_color
 
 
@@ -57,4 +60,5 @@ def delete_color(db: Session, color_id: UUID) -> bool:
 
     db.delete(db_color)
     db.commit()
+    catalog_cache.invalidate(BOOTSTRAP)
     return True
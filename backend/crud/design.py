@@ -2,14 +2,21 @@
 CRUD operations for Design model.
 """
 
-from typing import List, Optional
+from typing import List, Optional, Sequence
 from uuid import UUID
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from core.pagination import Pagination
 from models.design import Design
 from models.fabric import Fabric
 from models.color import Color
 from schemas.design import DesignCreate, DesignUpdate
+from services.catalog_cache import catalog_cache, design_tags
+
+# Newest first; the id breaks ties between designs created in one transaction
+PAGE_KEYS = (Design.created_at, Design.id)
 
 
 def get_design(db: Session, design_id: UUID) -> Optional[Design]:
@@ -23,8 +30,9 @@ def get_designs(
     limit: int = 100,
     owner_id: Optional[UUID] = None,
     active_only: bool = False,
+    page: Optional[Pagination] = None,
 ) -> List[Design]:
-    """Get all designs with optional filtering by owner_id."""
+    """Get all designs with optional filtering by owner_id (``page`` overrides skip/limit)."""
     query = db.query(Design)
 
     if owner_id:
@@ -33,7 +41,76 @@ def get_designs(
     if active_only:
         query = query.filter(Design.is_active == True)
 
-    return query.order_by(Design.created_at.desc()).offset(skip).limit(limit).all()
+    if page is not None:
+        return page.finish(page.apply(query, PAGE_KEYS).all(), PAGE_KEYS)
+    return (
+        query.order_by(Design.created_at.desc(), Design.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+
+def designs_query(
+    owner_id: Optional[UUID] = None,
+    active_only: bool = False,
+    style_type: Optional[str] = None,
+    category_id: Optional[UUID] = None,
+) -> Select:
+    """Unordered select of the designs matching the filters."""
+    query = select(Design)
+
+    if owner_id:
+        query = query.where(Design.owner_id == owner_id)
+
+    if active_only:
+        query = query.where(Design.is_active == True)
+
+    if style_type:
+        query = query.where(Design.style_type == style_type)
+
+    if category_id:
+        query = query.where(Design.category_id == category_id)
+
+    return query
+
+
+async def get_design_async(db: AsyncSession, design_id: UUID) -> Optional[Design]:
+    """Get a design by ID (async session)."""
+    result = await db.execute(select(Design).where(Design.id == design_id))
+    return result.scalars().first()
+
+
+async def get_designs_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    owner_id: Optional[UUID] = None,
+    active_only: bool = False,
+    style_type: Optional[str] = None,
+    category_id: Optional[UUID] = None,
+    page: Optional[Pagination] = None,
+    columns: Optional[Sequence] = None,
+) -> List:
+    """
+    Get designs with optional filtering (async session; ``page`` overrides skip/limit).
+
+    With ``columns`` (which must include the page keys) result rows of just
+    those columns are returned instead of ``Design`` objects.
+    """
+    query = designs_query(owner_id, active_only, style_type, category_id)
+    if columns is not None:
+        query = query.with_only_columns(*columns)
+    if page is not None:
+        result = await db.execute(page.apply(query, PAGE_KEYS))
+        rows = result.all() if columns is not None else result.scalars().all()
+        return page.finish(rows, PAGE_KEYS)
+    result = await db.execute(
+        query.order_by(Design.created_at.desc(), Design.id.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return list(result.all() if columns is not None else result.scalars().all())
 
 
 def create_design(db: Session, design: DesignCreate, owner_id: UUID) -> Design:
@@ -59,6 +136,7 @@ def create_design(db: Session, design: DesignCreate, owner_id: UUID) -> Design:
     db.add(db_design)
     db.commit()
     db.refresh(db_design)
+    catalog_cache.invalidate(*design_tags(db_design))
     return db_design
 
 
@@ -69,6 +147,8 @@ def update_design(
     db_design = get_design(db, design_id)
     if db_design is None:
         return None
+    # Lists filtered by the old category or style change as well
+    old_tags = design_tags(db_design)
 
     update_data = design.dict(
         exclude_unset=True, exclude={"available_fabric_ids", "available_color_ids"}
@@ -92,6 +172,7 @@ def update_design(
 
     db.commit()
     db.refresh(db_design)
+    catalog_cache.invalidate(*old_tags, *design_tags(db_design))
     return db_design
 
 
@@ -101,6 +182,8 @@ def delete_design(db: Session, design_id: UUID) -> bool:
     if db_design is None:
         return False
 
+    tags = design_tags(db_design)
     db.delete(db_design)
     db.commit()
+    catalog_cache.invalidate(*tags)
     return True
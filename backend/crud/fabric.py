@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 
 from models.fabric import Fabric
 from schemas.fabric import FabricCreate, FabricUpdate
+from services.catalog_cache import BOOTSTRAP, catalog_cache
 
 
 def get_fabric(db: Session, fabric_id: UUID) -> Optional[Fabric]:
@@ -31,6 +32,7 @@ def create_fabric(db: Session, fabric: FabricCreate) -> Fabric:
     db.add(db_fabric)
     db.commit()
     db.refresh(db_fabric)
+    catalog_cache.invalidate(BOOTSTRAP)
     return db_fabric
 
 
@@ -48,6 +50,7 @@ def update_fabric(
 
     db.commit()
     db.refresh(db_fabric)
+    catalog_cache.invalidate(BOOTSTRAP)
     return db_fabric
 
 
@@ -59,4 +62,5 @@ def delete_fabric(db: Session, fabric_id: UUID) -> bool:
 
     db.delete(db_fabric)
     db.commit()
+    catalog_cache.invalidate(BOOTSTRAP)
     return True
@@ -2,13 +2,20 @@
 CRUD operations for Measurement model.
 """
 
-from typing import List, Optional
+from typing import List, Optional, Sequence
 from uuid import UUID
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from core.pagination import Pagination
+from crud import asset as asset_crud
 from models.measurement import Measurement
 from schemas.measurement import MeasurementCreate, MeasurementUpdate
 
+# Most recently processed first, id as tie-breaker
+PAGE_KEYS = (Measurement.processed_at, Measurement.id)
+
 
 def get_measurement(db: Session, measurement_id: UUID) -> Optional[Measurement]:
     """Get a single measurement by ID."""
@@ -16,19 +23,61 @@ def get_measurement(db: Session, measurement_id: UUID) -> Optional[Measurement]:
 
 
 def get_measurements_for_user(
-    db: Session, user_id: UUID, skip: int = 0, limit: int = 100
+    db: Session, user_id: UUID, skip: int = 0, limit: int = 100, page: Optional[Pagination] = None
 ) -> List[Measurement]:
-    """Get measurements for a specific user."""
+    """Get measurements for a specific user (``page`` overrides skip/limit)."""
+    query = db.query(Measurement).filter(Measurement.user_id == user_id)
+    if page is not None:
+        return page.finish(page.apply(query, PAGE_KEYS).all(), PAGE_KEYS)
     return (
-        db.query(Measurement)
-        .filter(Measurement.user_id == user_id)
-        .order_by(Measurement.processed_at.desc())
+        query
+        .order_by(Measurement.processed_at.desc(), Measurement.id.desc())
         .offset(skip)
         .limit(limit)
         .all()
     )
 
 
+def measurements_for_user_query(user_id: UUID) -> Select:
+    """Unordered select of a user's measurements."""
+    return select(Measurement).where(Measurement.user_id == user_id)
+
+
+async def get_measurement_async(db: AsyncSession, measurement_id: UUID) -> Optional[Measurement]:
+    """Get a single measurement by ID (async session)."""
+    return await db.get(Measurement, measurement_id)
+
+
+async def get_measurements_for_user_async(
+    db: AsyncSession,
+    user_id: UUID,
+    skip: int = 0,
+    limit: int = 100,
+    page: Optional[Pagination] = None,
+    columns: Optional[Sequence] = None,
+) -> List:
+    """
+    Get measurements for a specific user (async session; ``page`` overrides skip/limit).
+
+    With ``columns`` (which must include the page keys) result rows of just
+    those columns are returned instead of ``Measurement`` objects.
+    """
+    query = measurements_for_user_query(user_id)
+    if columns is not None:
+        query = query.with_only_columns(*columns)
+    if page is not None:
+        result = await db.execute(page.apply(query, PAGE_KEYS))
+        rows = result.all() if columns is not None else result.scalars().all()
+        return page.finish(rows, PAGE_KEYS)
+    result = await db.execute(
+        query
+        .order_by(Measurement.processed_at.desc(), Measurement.id.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return list(result.all() if columns is not None else result.scalars().all())
+
+
 def create_measurement(
     db: Session,
     user_id: UUID,
@@ -43,6 +92,7 @@ def create_measurement(
         confidence_score=data.get("confidence_score", 0.0),
     )
     db.add(db_measurement)
+    asset_crud.acquire_assets(db, db_measurement.image_paths)
     db.commit()
     db.refresh(db_measurement)
     return db_measurement
@@ -57,6 +107,8 @@ def update_measurement(
         return None
 
     update_data = measurement_in.dict(exclude_unset=True)
+    if "image_paths" in update_data:
+        asset_crud.replace_assets(db, db_measurement.image_paths, update_data["image_paths"])
     for field, value in update_data.items():
         setattr(db_measurement, field, value)
 
@@ -70,6 +122,7 @@ def delete_measurement(db: Session, measurement_id: UUID) -> bool:
     db_measurement = get_measurement(db, measurement_id)
     if db_measurement is None:
         return False
+    asset_crud.release_assets(db, db_measurement.image_paths)
     db.delete(db_measurement)
     db.commit()
     return True
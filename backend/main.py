@@ -2,7 +2,6 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import os
 from fastapi_limiter import FastAPILimiter
-import redis.asyncio as redis
 import fastapi_limiter.depends as _fal_depends
 import fastapi_limiter as _fal
 
@@ -25,22 +24,53 @@ if os.getenv("TESTING", "false").lower() == "true":
     # Also patch the top-level fastapi_limiter reference some modules use
     _fal.default_identifier = _safe_default_identifier
 
+from core.compression import CompressionMiddleware
 from core.config import settings
+from core.database import dispose_async_engines
 from api.v1.api import api_router
+from core.metrics import metrics
+from core.pagination import PAGINATION_HEADERS
+from core.redis_client import init_redis, close_redis
+from services.ai_client import ai_client
+from services.catalog_cache import catalog_cache
+from services.measurement_jobs import measurement_jobs
+from services.password_hasher import password_hasher
+from services.storage import storage
+from services.user_cache import user_cache
 
 
 from contextlib import asynccontextmanager
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    redis_url = settings.REDIS_URL or "redis://localhost:6379/0"
+    redis_client = None
     try:
-        redis_client = redis.from_url(redis_url, encoding="utf8", decode_responses=True)
+        redis_client = await init_redis()
         await FastAPILimiter.init(redis_client)
         print("✅ Redis rate limiting enabled.")
     except Exception as e:
-        print(f"⚠️ Redis not available, rate limiting disabled. Reason: {e}")
-    yield
+        print(
+            "⚠️ Redis not available, rate limiting and async measurement jobs "
+            f"disabled. Reason: {e}"
+        )
+    await ai_client.start()
+    await storage.start()
+    if redis_client is not None and settings.MEASUREMENT_JOB_WORKERS:
+        measurement_jobs.start(redis_client, settings.MEASUREMENT_JOB_WORKERS)
+    if redis_client is not None:
+        user_cache.start(redis_client)
+        catalog_cache.start(redis_client)
+    try:
+        yield
+    finally:
+        await measurement_jobs.stop()
+        await user_cache.stop()
+        await catalog_cache.stop()
+        password_hasher.shutdown()
+        await ai_client.close()
+        await storage.close()
+        await close_redis()
+        await dispose_async_engines()
 
 app = FastAPI(title="Qeyafa Backend (FastAPI)", lifespan=lifespan)
 
@@ -62,8 +92,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browser clients read the pagination cursors and catalog ETags
+    expose_headers=PAGINATION_HEADERS + ["ETag"],
 )
 
+# Compress responses (gzip/brotli/zstd); registered last so it wraps CORS too
+app.add_middleware(CompressionMiddleware)
+
 
 # Rate limiting setup (Redis)
 import asyncio
@@ -76,3 +111,9 @@ app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 @app.get("/health", tags=["health"])
 async def health():
     return {"status": "ok", "service": "qeyafa-backend"}
+
+
+@app.get("/metrics", tags=["health"])
+async def get_metrics():
+    """In-process counters and gauges (cache hits, queue depths, ...)."""
+    return metrics.snapshot()
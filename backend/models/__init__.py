@@ -11,5 +11,17 @@ from models.fabric import Fabric
 from models.color import Color
 from models.template import Template
 from models.asset import Asset
+from models.catalog_tombstone import CatalogTombstone
 
-__all__ = ["User", "Measurement", "UserRole", "Category", "Design", "Fabric", "Color", "Template", "Asset"]
+__all__ = [
+    "User",
+    "Measurement",
+    "UserRole",
+    "Category",
+    "Design",
+    "Fabric",
+    "Color",
+    "Template",
+    "Asset",
+    "CatalogTombstone",
+]
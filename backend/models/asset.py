@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime
 from sqlalchemy.sql import func
 
 from core.database import Base
@@ -10,5 +10,19 @@ class Asset(Base):
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, nullable=False)
     storage_path = Column(String, nullable=False)
+    # Storage driver holding the content (services.storage), e.g. "local" or "s3"
+    storage_backend = Column(String(16), nullable=False, default="local", server_default="local")
     content_type = Column(String, nullable=True)
+    # Content address of uploaded blobs (see services.blob_store)
+    sha256 = Column(String(64), nullable=True, unique=True)
+    size = Column(BigInteger, nullable=True)
+    # Number of measurements referencing the blob
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Last upload or reference change; unreferenced blobs are kept for a grace period after it
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
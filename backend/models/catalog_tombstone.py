@@ -0,0 +1,30 @@
+"""
+Catalog tombstone model.
+"""
+
+from sqlalchemy import Column, DateTime, Index, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from core.database import Base
+
+
+class CatalogTombstone(Base):
+    """
+    A deleted design, category, fabric or color, for GET /catalog/changes.
+
+    Rows are written by a trigger on each catalog table when a row is
+    deleted; see migration 20251123_catalog_changes.
+    """
+
+    __tablename__ = "catalog_tombstones"
+
+    # Table name of the deleted row
+    entity = Column(String, primary_key=True)
+    entity_id = Column(UUID(as_uuid=True), primary_key=True)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (Index("ix_catalog_tombstones_deleted_at_entity_id", deleted_at, entity_id),)
+
+    def __repr__(self):
+        return f"<CatalogTombstone(entity={self.entity}, entity_id={self.entity_id})>"
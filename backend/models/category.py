@@ -4,7 +4,7 @@ Category model.
 
 import uuid
 
-from sqlalchemy import Boolean, Column, DateTime, String
+from sqlalchemy import Boolean, Column, DateTime, FetchedValue, Index, String, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 
@@ -24,6 +24,24 @@ class Category(Base):
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
+    # Set by a trigger on every write; see migration 20251123_catalog_changes
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        server_onupdate=FetchedValue(),
+        nullable=False,
+    )
+
+    # Active categories, newest first; see migration 20251122_hot_query_indexes
+    __table_args__ = (
+        Index(
+            "ix_categories_active_created_at_id",
+            created_at.desc(),
+            id.desc(),
+            postgresql_where=text("is_active"),
+        ),
+        Index("ix_categories_updated_at_id", updated_at, id),
+    )
 
     def __repr__(self):
         return f"<Category(id={self.id}, name={self.name})>"
@@ -4,8 +4,9 @@ Color model.
 
 import uuid
 
-from sqlalchemy import Column, String
+from sqlalchemy import Column, DateTime, FetchedValue, Index, String
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
 
 from core.database import Base
 
@@ -18,6 +19,15 @@ class Color(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False, unique=True, index=True)
     hex_code = Column(String, nullable=False)
+    # Set by a trigger on every write; see migration 20251123_catalog_changes
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        server_onupdate=FetchedValue(),
+        nullable=False,
+    )
+
+    __table_args__ = (Index("ix_colors_updated_at_id", updated_at, id),)
 
     def __repr__(self):
         return f"<Color(id={self.id}, name={self.name})>"
@@ -4,7 +4,18 @@ Design model.
 
 import uuid
 
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, String, Table
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    FetchedValue,
+    Float,
+    ForeignKey,
+    Index,
+    String,
+    Table,
+    text,
+)
 from sqlalchemy.dialects.postgresql import UUID, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -48,6 +59,13 @@ class Design(Base):
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
+    # Set by a trigger on every write; see migration 20251123_catalog_changes
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        server_onupdate=FetchedValue(),
+        nullable=False,
+    )
 
     # Many-to-many relationships
     available_fabrics = relationship(
@@ -57,5 +75,24 @@ class Design(Base):
         "Color", secondary=design_color_association, backref="designs"
     )
 
+    # List queries page newest first; see migration 20251122_hot_query_indexes
+    __table_args__ = (
+        Index(
+            "ix_designs_active_created_at_id",
+            created_at.desc(),
+            id.desc(),
+            postgresql_where=text("is_active"),
+        ),
+        Index("ix_designs_owner_created_at_id", owner_id, created_at.desc(), id.desc()),
+        Index(
+            "ix_designs_category_created_at_id",
+            category_id,
+            created_at.desc(),
+            id.desc(),
+            postgresql_where=text("is_active"),
+        ),
+        Index("ix_designs_updated_at_id", updated_at, id),
+    )
+
     def __repr__(self):
         return f"<Design(id={self.id}, name={self.name})>"
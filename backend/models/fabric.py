@@ -4,8 +4,9 @@ Fabric model.
 
 import uuid
 
-from sqlalchemy import Column, Float, String
+from sqlalchemy import Column, DateTime, FetchedValue, Float, Index, String
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
 
 from core.database import Base
 
@@ -20,6 +21,15 @@ class Fabric(Base):
     description = Column(String, nullable=True)
     image_url = Column(String, nullable=True)
     base_price = Column(Float, nullable=False)
+    # Set by a trigger on every write; see migration 20251123_catalog_changes
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        server_onupdate=FetchedValue(),
+        nullable=False,
+    )
+
+    __table_args__ = (Index("ix_fabrics_updated_at_id", updated_at, id),)
 
     def __repr__(self):
         return f"<Fabric(id={self.id}, name={self.name})>"
@@ -4,7 +4,7 @@ Measurement model.
 
 import uuid
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 
@@ -25,5 +25,10 @@ class Measurement(Base):
     )
     confidence_score = Column(Float, nullable=False)
 
+    # A user's history, most recent first; see migration 20251122_hot_query_indexes
+    __table_args__ = (
+        Index("ix_measurements_user_processed_at_id", user_id, processed_at.desc(), id.desc()),
+    )
+
     def __repr__(self):
         return f"<Measurement(id={self.id}, user_id={self.user_id})>"
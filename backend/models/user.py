@@ -4,7 +4,7 @@ User model.
 
 import uuid
 
-from sqlalchemy import Boolean, Column, DateTime, String, Enum
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, Enum
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 
@@ -30,9 +30,17 @@ class User(Base):
         default=UserRole.CUSTOMER,
         server_default=UserRole.CUSTOMER.value,
     )
+    # Bumped when access-relevant fields change; tokens carry the version
+    # they were issued for and are rejected once it no longer matches.
+    security_version = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
 
+    # Admin user list, newest first; see migration 20251122_hot_query_indexes
+    __table_args__ = (
+        Index("ix_users_created_at_id", created_at.desc(), id.desc()),
+    )
+
     def __repr__(self):
         return f"<User(id={self.id}, email={self.email})>"
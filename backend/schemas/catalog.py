@@ -0,0 +1,52 @@
+"""
+Pydantic schemas for catalog-wide responses.
+"""
+
+from typing import List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from schemas.category import CategoryResponse
+from schemas.color import ColorResponse
+from schemas.design import DesignResponse
+from schemas.fabric import FabricResponse
+
+
+class BootstrapDesign(DesignResponse):
+    """Design with the ids of the fabrics and colors it is available in."""
+
+    available_fabric_ids: List[UUID] = []
+    available_color_ids: List[UUID] = []
+
+
+class CatalogBootstrap(BaseModel):
+    """Everything the app needs to show the gallery on launch."""
+
+    version: str
+    categories: List[CategoryResponse]
+    designs: List[BootstrapDesign]
+    designs_next_cursor: Optional[str] = None
+    fabrics: List[FabricResponse]
+    colors: List[ColorResponse]
+
+
+class CatalogDeletions(BaseModel):
+    """Ids of deleted catalog rows."""
+
+    designs: List[UUID] = []
+    categories: List[UUID] = []
+    fabrics: List[UUID] = []
+    colors: List[UUID] = []
+
+
+class CatalogChanges(BaseModel):
+    """Catalog rows changed and deleted since a sync cursor."""
+
+    designs: List[BootstrapDesign]
+    categories: List[CategoryResponse]
+    fabrics: List[FabricResponse]
+    colors: List[ColorResponse]
+    deleted: CatalogDeletions
+    next_cursor: str
+    has_more: bool
@@ -76,3 +76,16 @@ class MeasurementUpdate(BaseModel):
     measurements: Optional[Dict[str, float]] = Field(None, description="Updated measurements map")
     image_paths: Optional[Dict[str, str]] = Field(None, description="Updated image paths")
     confidence_score: Optional[float] = Field(None, description="Updated confidence score")
+
+
+class MeasurementJobResponse(BaseModel):
+    """Status of an asynchronous measurement processing job."""
+
+    job_id: uuid.UUID
+    status: str = Field(..., description="queued, processing, completed or failed")
+    created_at: datetime
+    updated_at: datetime
+    result: Optional[MeasurementProcessResponse] = Field(
+        None, description="Processed measurement once completed"
+    )
+    error: Optional[str] = Field(None, description="Failure reason if the job failed")
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for sync vs async database access in list endpoints.
+
+Serves the catalog (designs, categories) and measurement list queries twice
+from one in-process ASGI app: as sync ``def`` handlers on a psycopg2
+``Session`` (the previous implementation, run on Starlette's threadpool)
+and as ``async def`` handlers on an asyncpg ``AsyncSession`` (the current
+one). Each variant runs alone on an engine with the same pool size, so the
+difference is how many database waits can be in flight at once.
+
+``--db-latency-ms`` adds ``pg_sleep`` to every request to emulate the round
+trip to a database on another host; with a local database the queries
+themselves are too fast for the threadpool limit to show.
+
+Requires a migrated database (``alembic upgrade head``); a bench user with
+categories, designs and measurements is created on first run.
+
+Usage:
+    DATABASE_URL=postgresql://... python scripts/bench_db_endpoints.py \\
+        [--requests 2000] [--concurrency 200] [--pool-size 80] [--db-latency-ms 20]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+os.environ.setdefault("SECRET_KEY", "bench-only-key-0123456789abcdef0123456789")
+
+BENCH_EMAIL = "bench-db-endpoints@example.com"
+SEED_ROWS = 50
+
+
+def seed(session_factory):
+    """Create the bench user and catalog rows once; return the user id."""
+    from core.security import hash_password
+    from models.category import Category
+    from models.design import Design
+    from models.measurement import Measurement
+    from models.roles import UserRole
+    from models.user import User
+
+    db = session_factory()
+    try:
+        user = db.query(User).filter(User.email == BENCH_EMAIL).first()
+        if user is not None:
+            return user.id
+        user = User(
+            email=BENCH_EMAIL,
+            hashed_password=hash_password("bench-password", rounds=4),
+            role=UserRole.DESIGNER,
+        )
+        db.add(user)
+        db.flush()
+        for i in range(SEED_ROWS):
+            category = Category(name=f"bench-category-{i}", description="Bench category")
+            db.add(category)
+            db.flush()
+            db.add(
+                Design(
+                    name=f"bench-design-{i}",
+                    base_price=100 + i,
+                    owner_id=user.id,
+                    category_id=category.id,
+                )
+            )
+            db.add(
+                Measurement(
+                    user_id=user.id,
+                    measurements={"chest": 90.0 + i},
+                    image_paths={},
+                    confidence_score=0.9,
+                )
+            )
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def build_app(sync_factory, async_factory, user_id, latency_s: float):
+    """Bench app with a /sync and an /async variant of each list endpoint."""
+    from fastapi import FastAPI
+    from sqlalchemy import select, text
+
+    from crud.design import get_designs, get_designs_async
+    from crud.measurement import get_measurements_for_user, get_measurements_for_user_async
+    from models.category import Category
+
+    app = FastAPI()
+    sleep = text("SELECT pg_sleep(:seconds)")
+
+    def sync_session():
+        db = sync_factory()
+        if latency_s:
+            db.execute(sleep, {"seconds": latency_s})
+        return db
+
+    async def async_session():
+        db = async_factory()
+        if latency_s:
+            await db.execute(sleep, {"seconds": latency_s})
+        return db
+
+    @app.get("/sync/designs")
+    def sync_designs():
+        db = sync_session()
+        try:
+            return len(get_designs(db, active_only=True))
+        finally:
+            db.close()
+
+    @app.get("/async/designs")
+    async def async_designs():
+        db = await async_session()
+        try:
+            return len(await get_designs_async(db, active_only=True))
+        finally:
+            await db.close()
+
+    @app.get("/sync/categories")
+    def sync_categories():
+        db = sync_session()
+        try:
+            return len(db.query(Category).filter(Category.is_active == True).limit(100).all())
+        finally:
+            db.close()
+
+    @app.get("/async/categories")
+    async def async_categories():
+        db = await async_session()
+        try:
+            result = await db.execute(select(Category).where(Category.is_active == True).limit(100))
+            return len(result.scalars().all())
+        finally:
+            await db.close()
+
+    @app.get("/sync/measurements")
+    def sync_measurements():
+        db = sync_session()
+        try:
+            return len(get_measurements_for_user(db, user_id))
+        finally:
+            db.close()
+
+    @app.get("/async/measurements")
+    async def async_measurements():
+        db = await async_session()
+        try:
+            return len(await get_measurements_for_user_async(db, user_id))
+        finally:
+            await db.close()
+
+    return app
+
+
+async def request(app, path: str) -> int:
+    """Call the ASGI app directly (no HTTP client overhead); return the status."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def run(app, path: str, total: int, concurrency: int):
+    """Issue ``total`` requests with ``concurrency`` in flight; return (req/s, latencies)."""
+    latencies = []
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            if await request(app, path) != 200:
+                raise RuntimeError(f"{path} failed")
+            latencies.append(time.perf_counter() - started)
+
+    # Warm up the pool before timing
+    await asyncio.gather(*(request(app, path) for _ in range(min(concurrency, 50))))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - started), latencies
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per endpoint and mode")
+    parser.add_argument("--concurrency", type=int, default=200, help="Requests in flight")
+    parser.add_argument(
+        "--pool-size", type=int, default=80, help="Connections of the engine under test"
+    )
+    parser.add_argument(
+        "--db-latency-ms", type=float, default=20.0, help="Emulated database round trip"
+    )
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from core.config import settings
+    from core.database import async_database_url
+
+    pool = {"pool_size": args.pool_size, "max_overflow": 0, "pool_timeout": 60}
+    latency_s = args.db_latency_ms / 1000
+
+    async def bench(endpoint: str, mode: str):
+        # One engine at a time, so each can use the full pool size
+        if mode == "sync":
+            engine = create_engine(settings.DATABASE_URL, **pool)
+            app = build_app(sessionmaker(bind=engine), None, user_id, latency_s)
+        else:
+            engine = create_async_engine(async_database_url(settings.DATABASE_URL), **pool)
+            app = build_app(
+                None,
+                async_sessionmaker(engine, expire_on_commit=False),
+                user_id,
+                latency_s,
+            )
+        try:
+            return await run(app, f"/{mode}/{endpoint}", args.requests, args.concurrency)
+        finally:
+            if mode == "sync":
+                engine.dispose()
+            else:
+                await engine.dispose()
+
+    seed_engine = create_engine(settings.DATABASE_URL)
+    user_id = seed(sessionmaker(bind=seed_engine))
+    seed_engine.dispose()
+
+    print(
+        f"{args.requests} requests, {args.concurrency} concurrent, pool {args.pool_size}, "
+        f"+{args.db_latency_ms:g}ms per request"
+    )
+    print(f"{'endpoint':>12} | {'mode':>5} | {'req/s':>8} | {'p50':>8} | {'p95':>8}")
+    print("-" * 53)
+    for endpoint in ("designs", "categories", "measurements"):
+        for mode in ("sync", "async"):
+            rate, latencies = asyncio.run(bench(endpoint, mode))
+            p50 = statistics.median(latencies) * 1000
+            p95 = statistics.quantiles(latencies, n=20)[18] * 1000
+            print(f"{endpoint:>12} | {mode:>5} | {rate:>8.0f} | {p50:>6.1f}ms | {p95:>6.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
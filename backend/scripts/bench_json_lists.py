@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+CPU cost of rendering a list page: pydantic response_model vs orjson rows.
+
+For each list response schema (designs, measurements, categories, users)
+renders a page twice and reports the CPU time per page:
+
+- ``pydantic``: what FastAPI does for a ``response_model`` list of ORM
+  objects (validate each through the ``orm_mode`` model, ``jsonable_encoder``,
+  stdlib ``json`` in ``JSONResponse``)
+- ``orjson``: the fast path of ``core.fast_json`` for rows of just the
+  schema's columns
+
+No database is needed: pages are built from transient model instances and
+named tuples with the same values, so only serialization is measured.
+
+Usage:
+    python scripts/bench_json_lists.py [--page-size 100] [--pages 500]
+"""
+
+import argparse
+import asyncio
+import collections
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List
+
+# Add backend to path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+os.environ.setdefault("SECRET_KEY", "bench-only-key-0123456789abcdef0123456789")
+
+
+def build_pages(page_size: int):
+    """(schema, ORM objects, rows) for each list endpoint."""
+    from models.category import Category
+    from models.design import Design
+    from models.measurement import Measurement
+    from models.roles import UserRole
+    from models.user import User
+    from schemas.category import CategoryResponse
+    from schemas.design import DesignResponse
+    from schemas.measurement import MeasurementResponse
+    from schemas.user import UserOut
+
+    now = datetime.now(timezone.utc)
+    owner_id, category_id = uuid.uuid4(), uuid.uuid4()
+    factories = {
+        "designs": (
+            DesignResponse,
+            Design,
+            lambda i: dict(
+                id=uuid.uuid4(),
+                name=f"Design {i}",
+                description="Embroidered kaftan with a mandarin collar",
+                base_image_url=f"https://cdn.example.com/designs/{i}.jpg",
+                base_price=120.0 + i,
+                owner_id=owner_id,
+                customization_rules={
+                    "sleeve": ["short", "long"],
+                    "collar": ["mandarin", "classic"],
+                },
+                style_type="kaftan",
+                category_id=category_id,
+                is_active=True,
+                created_at=now,
+            ),
+        ),
+        "measurements": (
+            MeasurementResponse,
+            Measurement,
+            lambda i: dict(
+                id=uuid.uuid4(),
+                user_id=owner_id,
+                measurements={
+                    "chest": 96.5,
+                    "waist": 82.0,
+                    "shoulders": 45.5,
+                    "arm_length": 61.0,
+                    "neck": 39.0,
+                    "hip": 98.0,
+                },
+                image_paths={
+                    "front": f"measurements/{i}/front.jpg",
+                    "side": f"measurements/{i}/side.jpg",
+                },
+                processed_at=now,
+                confidence_score=0.93,
+            ),
+        ),
+        "categories": (
+            CategoryResponse,
+            Category,
+            lambda i: dict(
+                id=uuid.uuid4(),
+                name=f"Category {i}",
+                description="Traditional wear",
+                image_url=f"https://cdn.example.com/categories/{i}.jpg",
+                is_active=True,
+                created_at=now,
+            ),
+        ),
+        "users": (
+            UserOut,
+            User,
+            lambda i: dict(
+                id=uuid.uuid4(),
+                email=f"user{i}@example.com",
+                first_name="Test",
+                last_name="User",
+                is_active=True,
+                is_superuser=False,
+                role=UserRole.CUSTOMER,
+                created_at=now,
+            ),
+        ),
+    }
+    pages = {}
+    for name, (schema, model, values) in factories.items():
+        rows = [values(i) for i in range(page_size)]
+        Row = collections.namedtuple(f"{model.__name__}Row", list(schema.__fields__))
+        pages[name] = (
+            schema,
+            [model(**row) for row in rows],
+            [Row(**{field: row[field] for field in schema.__fields__}) for row in rows],
+        )
+    return pages
+
+
+def pydantic_renderer(schema):
+    """Render a list of ORM objects the way FastAPI does for ``response_model=List[schema]``."""
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    field = create_response_field(name=f"Response_{schema.__name__}", type_=List[schema])
+    loop = asyncio.new_event_loop()
+
+    def render(objects) -> bytes:
+        content = loop.run_until_complete(serialize_response(field=field, response_content=objects))
+        return JSONResponse(content).body
+
+    return render
+
+
+def cpu_per_page(render, page, pages: int) -> float:
+    """CPU milliseconds per rendered page."""
+    render(page)
+    started = time.process_time()
+    for _ in range(pages):
+        render(page)
+    return (time.process_time() - started) * 1000 / pages
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--page-size", type=int, default=100, help="Rows per page")
+    parser.add_argument(
+        "--pages", type=int, default=500, help="Pages rendered per endpoint and path"
+    )
+    args = parser.parse_args()
+
+    import orjson
+
+    from core.fast_json import render as orjson_render
+
+    print(f"CPU ms per page of {args.page_size} rows ({args.pages} pages each)")
+    print(f"{'endpoint':<14}{'pydantic':>10}{'orjson':>10}{'speedup':>10}")
+    for name, (schema, objects, rows) in build_pages(args.page_size).items():
+        slow, fast = pydantic_renderer(schema), orjson_render
+        # Same document either way
+        assert orjson.loads(slow(objects)) == orjson.loads(fast(rows)), name
+        before = cpu_per_page(slow, objects, args.pages)
+        after = cpu_per_page(fast, rows, args.pages)
+        print(f"{name:<14}{before:>10.3f}{after:>10.3f}{before / after:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
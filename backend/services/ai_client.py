@@ -2,12 +2,20 @@
 AI Service Client for communicating with the AI model service.
 """
 
+import asyncio
+import secrets
 import httpx
-from typing import Dict, Any
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from fastapi import UploadFile
 
 from core.config import settings
 
+# Size of the chunks read from uploads and written to the AI request body.
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# (form field name, filename, content type, iterator over the file's bytes)
+PhotoStream = Tuple[str, str, Optional[str], AsyncIterator[bytes]]
+
 
 class AIServiceError(Exception):
     """Custom exception for AI service errors."""
@@ -15,12 +23,140 @@ class AIServiceError(Exception):
     pass
 
 
+async def iter_upload_file(
+    file: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """Yield the contents of an uploaded file in chunks."""
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def _quote(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+async def encode_multipart(
+    boundary: str, data: Dict[str, Any], photos: List[PhotoStream]
+) -> AsyncIterator[bytes]:
+    """
+    Encode form fields and photo streams as a multipart/form-data body.
+
+    Photo bytes are forwarded chunk by chunk as they are produced, so the
+    whole body is never held in memory.
+    """
+    for name, value in data.items():
+        yield (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{_quote(name)}"\r\n\r\n'
+            f"{value}\r\n"
+        ).encode("utf-8")
+
+    for name, filename, content_type, chunks in photos:
+        headers = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{_quote(name)}"; '
+            f'filename="{_quote(filename)}"\r\n'
+        )
+        if content_type:
+            headers += f"Content-Type: {content_type}\r\n"
+        yield (headers + "\r\n").encode("utf-8")
+        async for chunk in chunks:
+            yield chunk
+        yield b"\r\n"
+
+    yield f"--{boundary}--\r\n".encode("utf-8")
+
+
 class AIClient:
-    """Client for communicating with the AI model service."""
+    """Client for communicating with the AI model service.
 
-    def __init__(self):
+    A single pooled ``httpx.AsyncClient`` is shared by all requests so that
+    connections to the AI service are kept alive and reused instead of being
+    re-established (TCP + TLS) for every call. The pool is opened and closed
+    by the application lifespan via :meth:`start` and :meth:`close`; if a
+    request arrives before :meth:`start` was called the client is created
+    lazily.
+    """
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
         self.base_url = settings.AI_SERVICE_URL
-        self.timeout = 30.0
+        self.timeout = httpx.Timeout(
+            settings.AI_SERVICE_TIMEOUT,
+            connect=settings.AI_SERVICE_CONNECT_TIMEOUT,
+            pool=settings.AI_SERVICE_POOL_TIMEOUT,
+        )
+        self.limits = httpx.Limits(
+            max_connections=settings.AI_SERVICE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.AI_SERVICE_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.AI_SERVICE_KEEPALIVE_EXPIRY,
+        )
+        self.http2 = settings.AI_SERVICE_HTTP2
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _http2_available(self) -> bool:
+        if not self.http2:
+            return False
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print(
+                "⚠️ AI_SERVICE_HTTP2 is enabled but the 'h2' package is not installed; "
+                "using HTTP/1.1."
+            )
+            return False
+        return True
+
+    def _start_lock(self, loop: asyncio.AbstractEventLoop) -> asyncio.Lock:
+        # asyncio locks belong to the loop they are first used on
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def start(self) -> None:
+        """Open the pooled HTTP client (idempotent)."""
+        loop = asyncio.get_running_loop()
+        if self._client is not None and not self._client.is_closed and self._loop is loop:
+            return
+        # Concurrent first calls on a loop would otherwise each open a client
+        async with self._start_lock(loop):
+            if self._client is not None and not self._client.is_closed and self._loop is loop:
+                return
+            if self._client is not None and not self._client.is_closed:
+                # Opened on another event loop: release its pool before replacing it
+                try:
+                    await self._client.aclose()
+                except RuntimeError as e:
+                    # Connections bound to a loop that is already closed cannot be shut down cleanly
+                    print(f"⚠️ Could not close the AI service client of a previous event loop: {e}")
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self._http2_available(),
+                transport=self._transport,
+            )
+            self._loop = loop
+
+    async def close(self) -> None:
+        """Close the pooled HTTP client and release its connections."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        # Connections are bound to the event loop that opened them, so a new
+        # pool is created when called from a different loop (e.g. TestClient).
+        await self.start()
+        return self._client
 
     async def health_check(self) -> Dict[str, Any]:
         """
@@ -29,13 +165,13 @@ class AIClient:
         Returns:
             Dict with health status
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.get(f"{self.base_url}/health")
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPError as e:
-                raise AIServiceError(f"AI service health check failed: {str(e)}")
+        client = await self._get_client()
+        try:
+            response = await client.get("/health")
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            raise AIServiceError(f"AI service health check failed: {str(e)}")
 
     async def process_measurements(
         self,
@@ -64,60 +200,81 @@ class AIClient:
         Raises:
             AIServiceError: If the request fails
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                # Prepare files for upload
-                files = [
-                    (
-                        "photo_front",
-                        (
-                            photo_front.filename,
-                            await photo_front.read(),
-                            photo_front.content_type,
-                        ),
-                    ),
-                    (
-                        "photo_back",
-                        (
-                            photo_back.filename,
-                            await photo_back.read(),
-                            photo_back.content_type,
-                        ),
-                    ),
-                    (
-                        "photo_left",
-                        (
-                            photo_left.filename,
-                            await photo_left.read(),
-                            photo_left.content_type,
-                        ),
-                    ),
-                    (
-                        "photo_right",
-                        (
-                            photo_right.filename,
-                            await photo_right.read(),
-                            photo_right.content_type,
-                        ),
-                    ),
-                ]
-
-                # Prepare form data, include optional debug trigger (force_error) if provided
-                data = {"height": height, "weight": weight}
-                if force_error is not None:
-                    data["force_error"] = force_error
-
-                # Make the request
-                response = await client.post(
-                    f"{self.base_url}/api/measurements/process",
-                    files=files,
-                    data=data,
-                )
-                response.raise_for_status()
-                return response.json()
-
-            except httpx.HTTPError as e:
-                raise AIServiceError(f"AI service request failed: {str(e)}")
+        photos = [
+            (
+                "photo_front",
+                photo_front.filename,
+                photo_front.content_type,
+                iter_upload_file(photo_front),
+            ),
+            (
+                "photo_back",
+                photo_back.filename,
+                photo_back.content_type,
+                iter_upload_file(photo_back),
+            ),
+            (
+                "photo_left",
+                photo_left.filename,
+                photo_left.content_type,
+                iter_upload_file(photo_left),
+            ),
+            (
+                "photo_right",
+                photo_right.filename,
+                photo_right.content_type,
+                iter_upload_file(photo_right),
+            ),
+        ]
+        return await self.process_measurements_stream(
+            photos, height=height, weight=weight, force_error=force_error
+        )
+
+    async def process_measurements_stream(
+        self,
+        photos: List[PhotoStream],
+        height: float,
+        weight: float,
+        force_error: str | None = None,
+    ) -> Dict[str, Any]:
+        """
+        Stream photos to the AI service for processing.
+
+        The request body is produced incrementally from each photo's chunk
+        iterator, so memory use is bounded by the chunk size rather than the
+        size of the photos.
+
+        Args:
+            photos: (field name, filename, content type, chunks) per photo
+            height: User height in cm
+            weight: User weight in kg
+            force_error: Optional debug trigger forwarded to the AI service
+
+        Returns:
+            Dict with measurement results from AI service
+
+        Raises:
+            AIServiceError: If the request fails
+        """
+        client = await self._get_client()
+
+        # Prepare form data, include optional debug trigger (force_error) if provided
+        data = {"height": height, "weight": weight}
+        if force_error is not None:
+            data["force_error"] = force_error
+
+        boundary = secrets.token_hex(16)
+        try:
+            response = await client.post(
+                "/api/measurements/process",
+                content=encode_multipart(boundary, data, photos),
+                headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+            )
+            response.raise_for_status()
+            return response.json()
+
+        except httpx.HTTPError as e:
+            raise AIServiceError(f"AI service request failed: {str(e)}")
 
     async def validate_photo(self, photo: UploadFile) -> Dict[str, Any]:
         """
@@ -132,20 +289,18 @@ class AIClient:
         Raises:
             AIServiceError: If the request fails
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                files = {
-                    "photo": (photo.filename, await photo.read(), photo.content_type)
-                }
-
-                response = await client.post(
-                    f"{self.base_url}/api/measurements/validate", files=files
-                )
-                response.raise_for_status()
-                return response.json()
-
-            except httpx.HTTPError as e:
-                raise AIServiceError(f"Photo validation failed: {str(e)}")
+        client = await self._get_client()
+        try:
+            files = {
+                "photo": (photo.filename, await photo.read(), photo.content_type)
+            }
+
+            response = await client.post("/api/measurements/validate", files=files)
+            response.raise_for_status()
+            return response.json()
+
+        except httpx.HTTPError as e:
+            raise AIServiceError(f"Photo validation failed: {str(e)}")
 
 
 # Singleton instance
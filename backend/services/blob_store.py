@@ -0,0 +1,155 @@
+"""
+Content-addressed storage for uploaded photos.
+
+Every upload is stored once, under the SHA-256 of its content, with sharded
+keys in the configured storage backend (see services.storage):
+
+    blobs/ab/cd/abcd...
+
+Identical uploads share one file, the path doubles as an integrity check
+and blobs never change once written, so replication and backups only need
+to copy new files. Each blob has a row in the ``assets`` table whose
+``ref_count`` counts the measurements referencing it; unreferenced blobs
+are removed by the garbage collector:
+
+    python -m services.blob_store [grace_hours]
+"""
+
+import asyncio
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import aiofiles.os
+
+from services.storage import StorageBackend, storage
+
+BLOB_PREFIX = "blobs"
+
+
+class StoredBlob(NamedTuple):
+    """An upload saved to the blob store."""
+
+    path: str
+    digest: str
+    size: int
+    created: bool
+    # When its asset row was registered (see crud.asset.register_asset)
+    registered_at: Optional[datetime] = None
+
+
+def own_registrations(blobs: Iterable[StoredBlob]) -> Dict[str, datetime]:
+    """
+    Digests of the blobs a request created, with the time it last registered each.
+
+    A failed request removes only these, and only if nobody registered or
+    referenced them after it (see crud.asset.delete_unreferenced_assets).
+    """
+    registrations: Dict[str, datetime] = {}
+    for blob in blobs:
+        if blob.created and blob.registered_at is not None:
+            registrations[blob.digest] = max(
+                blob.registered_at, registrations.get(blob.digest, blob.registered_at)
+            )
+    return registrations
+
+
+def blob_path(digest: str) -> str:
+    """Storage key of a blob."""
+    return f"{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+def blob_digest(path: str) -> Optional[str]:
+    """Digest of a blob key, or None for other keys."""
+    parts = path.split("/")
+    if (
+        len(parts) == 4
+        and parts[0] == BLOB_PREFIX
+        and parts[3][:2] == parts[1]
+        and parts[3][2:4] == parts[2]
+    ):
+        return parts[3]
+    return None
+
+
+class BlobStore:
+    """Stores uploads under their SHA-256 digest in a storage backend."""
+
+    def __init__(self, storage: StorageBackend):
+        self.storage = storage
+
+    async def temp_path(self) -> str:
+        """A fresh local file for receiving an upload before its digest is known."""
+        await aiofiles.os.makedirs(self.storage.spool_dir, exist_ok=True)
+        return os.path.join(self.storage.spool_dir, uuid.uuid4().hex)
+
+    async def commit(
+        self, temp_file: str, digest: str, content_type: Optional[str] = None
+    ) -> Tuple[str, bool]:
+        """
+        Store a fully written temporary file at its content address.
+
+        If a blob with the same digest exists already, the temporary file is
+        removed instead. Register the blob's asset first
+        (crud.asset.register_asset), so a blob found here cannot be
+        garbage collected before the caller references it.
+
+        Returns:
+            Tuple of (blob key, whether the blob was created by this call)
+        """
+        key = blob_path(digest)
+        if await self.storage.exists(key):
+            await aiofiles.os.remove(temp_file)
+            return key, False
+        await self.storage.put_file(key, temp_file, content_type)
+        return key, True
+
+    def read(self, path: str) -> AsyncIterator[bytes]:
+        """Stream a blob's content in chunks."""
+        return self.storage.get(path)
+
+    async def remove(self, paths: Iterable[str]) -> None:
+        """Delete blobs."""
+        for path in paths:
+            await self.storage.delete(path)
+
+
+# Singleton instance
+blob_store = BlobStore(storage)
+
+
+def collect_garbage(grace: timedelta) -> List[str]:
+    """
+    Delete blobs no measurement has referenced for at least ``grace``.
+
+    The grace period keeps photos that were uploaded but not yet attached
+    to a measurement (e.g. via ``/measurements/upload``).
+
+    Returns:
+        Paths of the removed blobs
+    """
+    from core.database import SessionLocal
+    from crud import asset as asset_crud
+
+    db = SessionLocal()
+    try:
+        return asset_crud.delete_unreferenced_assets(
+            db, datetime.now(timezone.utc) - grace, lambda paths: asyncio.run(_remove_blobs(paths))
+        )
+    finally:
+        db.close()
+
+
+async def _remove_blobs(paths: List[str]) -> None:
+    try:
+        await blob_store.remove(paths)
+    finally:
+        await blob_store.storage.close()
+
+
+if __name__ == "__main__":
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 24.0
+    removed = collect_garbage(timedelta(hours=hours))
+    print(f"✅ Removed {len(removed)} unreferenced blobs")
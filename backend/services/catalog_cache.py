@@ -0,0 +1,403 @@
+"""
+Two-level cache of public catalog responses.
+
+The catalog endpoints (designs, categories, templates) serve the mobile
+gallery and change rarely. Their responses are cached per path and query
+string, first in-process (L1, ``CATALOG_CACHE_L1_TTL_SECONDS``) and then in
+Redis (L2, ``CATALOG_CACHE_TTL_SECONDS``), so most gallery requests need
+neither Postgres nor, for repeated requests, Redis.
+
+Every entry depends on one tag, e.g. ``designs`` (unfiltered design lists),
+``designs:category:<id>`` or ``design:<id>``. The write paths call
+:meth:`CatalogCache.invalidate` with the tags they affect after committing.
+That increments a per-tag generation in Redis and locally, and publishes the
+tags so other API processes bump theirs too. Entries remember the generation
+they were loaded under and are ignored once it has moved on, so an entry
+filled by a request that raced with a write is never served after the
+write's invalidation. Without Redis only the L1 cache is used, and other
+processes see writes once their entries expire.
+
+Entries hold the rendered JSON (see :mod:`core.fast_json`), so a hit is
+returned as is, without pydantic validation or encoding. In-process entries
+also keep the body compressed in each encoding clients asked for (see
+:mod:`core.compression`), so hot responses are compressed once. Responses
+carry a strong ETag and ``CATALOG_CACHE_CONTROL``. With Redis the ETag is
+derived from the request and its tag's generation, so on a cache miss (or
+with the cache disabled) a request whose ``If-None-Match`` matches gets
+304 Not Modified before anything is loaded or rendered. The ETag also
+includes a random epoch, replaced when an API process starts (responses may
+render differently after a deploy) and recreated if Redis loses it, so
+generations starting over never reuse an ETag. Without Redis generations are
+per process, and the ETag is a hash of the rendered body instead.
+"""
+
+import asyncio
+import hashlib
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response, status
+
+from core.compression import PRECOMPRESSED_LEVELS, compress, negotiate, variant_etag
+from core.config import settings
+from core.database import record_catalog_write
+from core.fast_json import JSONBytesResponse, render
+from core.metrics import metrics
+from core.pagination import PAGINATION_HEADERS
+from core.redis_client import get_redis, get_sync_redis
+
+ENTRY_KEY = "catalog:entry:{digest}"
+GENERATION_KEY = "catalog:gen:{tag}"
+EPOCH_KEY = "catalog:epoch"
+INVALIDATION_CHANNEL = "catalog:invalidated"
+
+# (rendered body, pagination headers, ETag, compressed bodies by encoding)
+Cached = Tuple[bytes, Dict[str, str], str, Dict[str, bytes]]
+
+
+def etag_of(payload: bytes) -> str:
+    """Strong ETag of a rendered response body."""
+    return '"' + hashlib.sha256(payload).hexdigest()[:32] + '"'
+
+
+def version_etag(key: str, epoch: str, generation: str) -> str:
+    """Strong ETag of the response to a cache key under an epoch and tag generation."""
+    version = f"{key}:{epoch}:{generation}".encode("utf-8")
+    return '"' + hashlib.sha256(version).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches ``etag`` (weak comparison, as for GET)."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in (candidate.removeprefix("W/") for candidate in candidates)
+
+
+def _hit_rate() -> float:
+    hits = metrics.get("catalog_cache.l1_hits") + metrics.get("catalog_cache.l2_hits")
+    total = hits + metrics.get("catalog_cache.misses")
+    return round(hits / total, 4) if total else 0.0
+
+
+class CatalogCache:
+    """In-process LRU in front of Redis, invalidated by tag generations."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key -> (expires, tag, generation, (body, headers, etag))
+        self._entries: "OrderedDict[str, Tuple[float, str, int, Cached]]" = OrderedDict()
+        self._generations: Dict[str, int] = defaultdict(int)
+        self._listener: Optional[asyncio.Task] = None
+        metrics.register_gauge("catalog_cache.hit_rate", _hit_rate)
+
+    @property
+    def enabled(self) -> bool:
+        return settings.CATALOG_CACHE_TTL_SECONDS > 0
+
+    @staticmethod
+    def key(request: Request) -> str:
+        """Cache key of a request: its path and sorted query parameters."""
+        params = "&".join(
+            f"{name}={value}"
+            for name, value in sorted(request.query_params.multi_items())
+        )
+        return hashlib.sha256(f"{request.url.path}?{params}".encode("utf-8")).hexdigest()
+
+    def _l1_get(self, key: str, tag: str) -> Optional[Cached]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, entry_tag, generation, value = entry
+            if (
+                expires <= time.monotonic()
+                or entry_tag != tag
+                or generation != self._generations[tag]
+            ):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _l1_set(self, key: str, tag: str, generation: int, value: Cached) -> None:
+        if not settings.CATALOG_CACHE_L1_TTL_SECONDS:
+            return
+        with self._lock:
+            if generation != self._generations[tag]:
+                # Invalidated while loading
+                return
+            self._entries[key] = (
+                time.monotonic() + settings.CATALOG_CACHE_L1_TTL_SECONDS,
+                tag,
+                generation,
+                value,
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.CATALOG_CACHE_L1_MAX_SIZE:
+                self._entries.popitem(last=False)
+
+    async def get_or_load(
+        self,
+        request: Request,
+        response: Response,
+        tag: str,
+        load: Callable[[], Awaitable[Any]],
+    ) -> Response:
+        """
+        Return the cached response for this request, or ``load()`` and cache it.
+
+        Pagination headers set on ``response`` by ``load`` are cached with the
+        body; ``ETag`` and ``Cache-Control`` are added. ``load`` is not called
+        when the client's ``If-None-Match`` matches the current version.
+
+        Args:
+            request: The catalog request
+            response: The endpoint's response parameter, for pagination headers
+            tag: What the response depends on, as passed to :meth:`invalidate`
+            load: Coroutine function returning the body, as accepted by
+                :func:`core.fast_json.render` (e.g. result rows)
+
+        Returns:
+            The JSON response, or 304 if the client's ``If-None-Match`` matches
+        """
+        key = self.key(request)
+        with self._lock:
+            local_generation = self._generations[tag]
+        if self.enabled:
+            cached = self._l1_get(key, tag)
+            if cached is not None:
+                metrics.incr("catalog_cache.l1_hits")
+                return self._respond(request, cached)
+
+        redis = get_redis()
+        generation = etag = None
+        if redis is not None:
+            try:
+                entry, generation, epoch = await self._read(redis, key, tag)
+                if entry is not None and entry["generation"] == generation and "payload" in entry:
+                    metrics.incr("catalog_cache.l2_hits")
+                    cached = (entry["payload"].encode("utf-8"), entry["headers"], entry["etag"], {})
+                    self._l1_set(key, tag, local_generation, cached)
+                    return self._respond(request, cached)
+                etag = version_etag(key, epoch, generation)
+            except Exception as e:
+                print(f"⚠️ Catalog cache unavailable: {e}")
+                redis = None
+
+        if etag is not None:
+            not_modified = self._not_modified(
+                request, etag, negotiate(request.headers.get("accept-encoding"))
+            )
+            if not_modified is not None:
+                return not_modified
+
+        if not self.enabled:
+            return self._respond(request, await self._load(response, load, etag))
+
+        metrics.incr("catalog_cache.misses")
+        cached = await self._load(response, load, etag)
+        if redis is not None:
+            try:
+                payload, headers, etag, _ = cached
+                entry = json.dumps(
+                    {
+                        "generation": generation,
+                        "payload": payload.decode("utf-8"),
+                        "headers": headers,
+                        "etag": etag,
+                    }
+                )
+                await redis.set(
+                    ENTRY_KEY.format(digest=key), entry, ex=settings.CATALOG_CACHE_TTL_SECONDS
+                )
+            except Exception as e:
+                print(f"⚠️ Failed to cache catalog response: {e}")
+        self._l1_set(key, tag, local_generation, cached)
+        return self._respond(request, cached)
+
+    async def _read(self, redis, key: str, tag: str) -> Tuple[Optional[dict], str, str]:
+        """The Redis entry of ``key`` (if caching), the generation of ``tag`` and the epoch."""
+        keys = [GENERATION_KEY.format(tag=tag), EPOCH_KEY]
+        if self.enabled:
+            keys.append(ENTRY_KEY.format(digest=key))
+        generation, epoch, *raw = await redis.mget(*keys)
+        if epoch is None:
+            # New or flushed Redis: generations may start over, so ETags must change
+            await redis.set(EPOCH_KEY, secrets.token_hex(8), nx=True)
+            epoch = await redis.get(EPOCH_KEY)
+        entry = json.loads(raw[0]) if raw and raw[0] is not None else None
+        return entry, generation or "0", epoch
+
+    @staticmethod
+    async def _load(
+        response: Response, load: Callable[[], Awaitable[Any]], etag: Optional[str] = None
+    ) -> Cached:
+        payload = render(await load())
+        headers = {
+            name: response.headers[name] for name in PAGINATION_HEADERS if name in response.headers
+        }
+        return payload, headers, etag or etag_of(payload), {}
+
+    @staticmethod
+    def _not_modified(
+        request: Request,
+        etag: str,
+        encoding: Optional[str],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Optional[Response]:
+        """304 if the client's ``If-None-Match`` names ``etag`` or its ``encoding`` variant."""
+        if_none_match = request.headers.get("if-none-match")
+        matched = next(
+            (
+                candidate
+                for candidate in (variant_etag(etag, encoding), etag)
+                if etag_matches(if_none_match, candidate)
+            ),
+            None,
+        )
+        if matched is None:
+            return None
+        metrics.incr("catalog_cache.not_modified")
+        headers = {
+            **(headers or {}),
+            "ETag": matched,
+            "Cache-Control": settings.CATALOG_CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    @classmethod
+    def _respond(cls, request: Request, cached: Cached) -> Response:
+        payload, headers, etag, variants = cached
+        encoding = None
+        if len(payload) >= settings.COMPRESSION_MIN_SIZE:
+            encoding = negotiate(request.headers.get("accept-encoding"))
+        not_modified = cls._not_modified(request, etag, encoding, headers)
+        if not_modified is not None:
+            return not_modified
+        headers = {
+            **headers,
+            "ETag": variant_etag(etag, encoding),
+            "Cache-Control": settings.CATALOG_CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+        if encoding is not None:
+            if encoding not in variants:
+                metrics.incr("catalog_cache.compressions")
+                variants[encoding] = compress(payload, encoding, PRECOMPRESSED_LEVELS[encoding])
+            payload = variants[encoding]
+            headers["Content-Encoding"] = encoding
+        return JSONBytesResponse(payload, headers=headers)
+
+    def _bump(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] += 1
+
+    def invalidate(self, *tags: Optional[str]) -> None:
+        """
+        Drop cached responses depending on ``tags`` in every process.
+
+        Blocking (call after committing, from sync code), so a client that
+        wrote sees its change on its next read. Misses are loaded from the
+        primary for a while afterwards (see
+        :func:`core.database.record_catalog_write`). ``None`` tags are ignored.
+        """
+        tags = sorted({tag for tag in tags if tag is not None})
+        if not tags:
+            return
+        self._bump(tags)
+        record_catalog_write()
+        redis = get_sync_redis()
+        if redis is None:
+            return
+        try:
+            pipeline = redis.pipeline(transaction=False)
+            for tag in tags:
+                pipeline.incr(GENERATION_KEY.format(tag=tag))
+            pipeline.publish(INVALIDATION_CHANNEL, json.dumps(tags))
+            pipeline.execute()
+        except Exception as e:
+            print(f"⚠️ Failed to invalidate catalog cache: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    async def _listen(self, redis) -> None:
+        try:
+            # Responses may render differently after a deploy
+            await redis.set(EPOCH_KEY, secrets.token_hex(8))
+        except Exception as e:
+            print(f"⚠️ Failed to renew the catalog ETag epoch: {e}")
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Invalidations may have been missed while disconnected
+                self.clear()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._bump(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Catalog cache invalidation listener error: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+
+    def start(self, redis) -> None:
+        """Listen for invalidations from other processes on the running event loop."""
+        self._listener = asyncio.create_task(self._listen(redis))
+
+    async def stop(self) -> None:
+        """Stop the invalidation listener."""
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+
+# Tags of catalog responses
+DESIGNS = "designs"
+CATEGORIES = "categories"
+TEMPLATES = "templates"
+# GET /catalog/bootstrap: categories, designs, fabrics and colors
+BOOTSTRAP = "bootstrap"
+
+
+def design_tag(design_id) -> str:
+    return f"design:{design_id}"
+
+
+def design_category_tag(category_id) -> Optional[str]:
+    return f"designs:category:{category_id}" if category_id else None
+
+
+def design_style_tag(style_type) -> Optional[str]:
+    return f"designs:style:{style_type}" if style_type else None
+
+
+def category_tag(category_id) -> str:
+    return f"category:{category_id}"
+
+
+def design_tags(design) -> Tuple[Optional[str], ...]:
+    """Tags of the responses that show ``design`` in its current state."""
+    return (
+        DESIGNS,
+        BOOTSTRAP,
+        design_tag(design.id),
+        design_category_tag(design.category_id),
+        design_style_tag(design.style_type),
+    )
+
+
+# Singleton instance
+catalog_cache = CatalogCache()
@@ -0,0 +1,605 @@
+"""
+Redis-backed queue for asynchronous measurement processing.
+
+``POST /measurements/jobs`` stores the photos, records a job and pushes its id
+onto a Redis list. Workers pop job ids, stream the stored photos to the AI
+service, write the ``Measurement`` row and update the job record, which
+clients poll via ``GET /measurements/jobs/{job_id}`` or receive through an
+optional webhook.
+
+A worker moves each job id it takes to a processing list and removes it when
+the job is done. Before touching a job it claims the job's lock, which expires
+after ``MEASUREMENT_JOB_VISIBILITY_TIMEOUT_SECONDS`` and is refreshed while the
+job runs, so each job is processed by one worker at a time and jobs of a
+worker that dies mid-run are found in the processing list once their lock has
+expired and are queued again.
+
+Workers run inside the API process (``MEASUREMENT_JOB_WORKERS``) and can also
+be scaled independently as a standalone process:
+
+    python -m services.measurement_jobs [concurrency]
+"""
+
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import socket
+import sys
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+from core.config import settings
+from core.database import AsyncSessionLocal, SessionLocal
+from crud import asset as asset_crud
+from models import Measurement
+from schemas.measurement import MeasurementProcessResponse
+from services.ai_client import ai_client, AIServiceError
+from services.blob_store import blob_store
+from services.storage import storage
+from services.result_cache import ai_result_cache
+
+QUEUE_KEY = "measurement_jobs:queue"
+PROCESSING_KEY = "measurement_jobs:processing"
+JOB_KEY = "measurement_jobs:job:{job_id}"
+LOCK_KEY = "measurement_jobs:lock:{job_id}"
+
+# Extend or delete a job lock only while it still holds the claimer's token
+REFRESH_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# Photo views in the order the AI service expects them
+VIEWS = ("front", "back", "left", "right")
+
+# How often workers look for jobs abandoned by a dead worker
+REQUEUE_INTERVAL_SECONDS = 60
+
+
+class MeasurementJobStatus:
+    """Lifecycle states of a measurement job."""
+
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class MeasurementJobError(Exception):
+    """Raised when a job cannot produce a measurement."""
+
+    pass
+
+
+class WebhookURLError(ValueError):
+    """Raised when a webhook URL may not be called."""
+
+    pass
+
+
+async def check_webhook_url(url: str) -> Optional[str]:
+    """
+    Make sure a webhook URL cannot be used to reach internal services.
+
+    With ``MEASUREMENT_WEBHOOK_ALLOWED_HOSTS_STR`` set, only the listed hosts
+    are allowed. Otherwise the host must resolve to public addresses only:
+    loopback, private, link-local (cloud metadata) and other non-global
+    addresses are rejected.
+
+    Returns:
+        A checked address of the host to connect to, so the host is not
+        resolved again (and possibly rebound to an internal address) when
+        connecting, or None for allowlisted hosts
+
+    Raises:
+        WebhookURLError: If the URL is not allowed
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise WebhookURLError("webhook_url must be an http(s) URL")
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+    except ValueError:
+        raise WebhookURLError("webhook_url has an invalid port")
+
+    host = parts.hostname.lower().rstrip(".")
+    allowed_hosts = settings.MEASUREMENT_WEBHOOK_ALLOWED_HOSTS
+    if allowed_hosts:
+        if host not in allowed_hosts:
+            raise WebhookURLError(f"webhook_url host is not allowed: {host}")
+        return None
+
+    try:
+        addresses = await asyncio.get_running_loop().getaddrinfo(
+            host, port, type=socket.SOCK_STREAM
+        )
+    except (socket.gaierror, UnicodeError):
+        raise WebhookURLError(f"webhook_url host cannot be resolved: {host}")
+    for *_, sockaddr in addresses:
+        address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        if not address.is_global:
+            raise WebhookURLError(
+                "webhook_url must not point to a loopback, private or link-local address"
+            )
+    return addresses[0][4][0].split("%")[0]
+
+
+def _pin_to_address(url: str, address: str):
+    """
+    Rewrite a webhook URL to connect to an already checked address.
+
+    Returns:
+        Tuple of the rewritten URL, the Host header of the original URL and
+        the request extensions that keep TLS verifying the original host name
+    """
+    parts = urlsplit(url)
+    userinfo, _, host_header = parts.netloc.rpartition("@")
+    netloc = f"[{address}]" if ":" in address else address
+    if parts.port is not None:
+        netloc = f"{netloc}:{parts.port}"
+    if userinfo:
+        netloc = f"{userinfo}@{netloc}"
+    return parts._replace(netloc=netloc).geturl(), host_header, {"sni_hostname": parts.hostname}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of a job record that are exposed to its owner."""
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "result": job.get("result"),
+        "error": job.get("error"),
+    }
+
+
+def _save_measurement(
+    user_id: str, measurements: Dict[str, float], image_paths: Dict[str, str], confidence: float
+) -> Dict[str, Any]:
+    """Persist a processed measurement (blocking; run in a worker thread)."""
+    db = SessionLocal()
+    try:
+        measurement = Measurement(
+            user_id=uuid.UUID(user_id),
+            measurements=measurements,
+            image_paths=image_paths,
+            confidence_score=confidence,
+        )
+        db.add(measurement)
+        asset_crud.acquire_assets(db, image_paths)
+        db.commit()
+        db.refresh(measurement)
+        response = MeasurementProcessResponse(
+            id=measurement.id,
+            user_id=measurement.user_id,
+            measurements=measurements,
+            confidence_score=measurement.confidence_score,
+            processed_at=measurement.processed_at,
+        )
+        return json.loads(response.json())
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class MeasurementJobQueue:
+    """Enqueue, track and process asynchronous measurement jobs."""
+
+    def __init__(self):
+        self._workers: List[asyncio.Task] = []
+        self._webhook_client: Optional[httpx.AsyncClient] = None
+
+    async def _store(self, redis, job: Dict[str, Any]) -> None:
+        job["updated_at"] = _now()
+        await redis.set(
+            JOB_KEY.format(job_id=job["job_id"]),
+            json.dumps(job),
+            ex=settings.MEASUREMENT_JOB_TTL_SECONDS,
+        )
+
+    async def enqueue(
+        self,
+        redis,
+        user_id: uuid.UUID,
+        photos: Dict[str, Dict[str, str]],
+        image_paths: Dict[str, str],
+        height: float,
+        weight: float,
+        force_error: Optional[str] = None,
+        webhook_url: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Record a new job and queue it for processing.
+
+        Args:
+            redis: Redis client
+            user_id: Owner of the job
+            photos: Per view, the storage key ("path"), original "filename",
+                "content_type" and, for blobs, the "sha256" digest, whether
+                this upload "created" the blob and when it "registered_at"
+                (ISO 8601) its asset
+            image_paths: Per view, the storage key saved on the measurement
+            height: User height in cm
+            weight: User weight in kg
+            force_error: Optional debug trigger forwarded to the AI service
+            webhook_url: Optional URL notified when the job finishes
+
+        Returns:
+            The job record
+        """
+        now = _now()
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "user_id": str(user_id),
+            "status": MeasurementJobStatus.QUEUED,
+            "photos": photos,
+            "image_paths": image_paths,
+            "height": height,
+            "weight": weight,
+            "force_error": force_error,
+            "webhook_url": webhook_url,
+            "attempts": 0,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        await self._store(redis, job)
+        await redis.lpush(QUEUE_KEY, job["job_id"])
+        return job
+
+    async def get(self, redis, job_id: str) -> Optional[Dict[str, Any]]:
+        """Load a job record, or None if it does not exist or has expired."""
+        raw = await redis.get(JOB_KEY.format(job_id=job_id))
+        return json.loads(raw) if raw else None
+
+    async def run_job(self, job: Dict[str, Any], redis=None) -> Dict[str, Any]:
+        """
+        Send a job's stored photos to the AI service and save the measurement.
+
+        When ``redis`` is given, a cached result for identical photos and
+        height/weight is used instead of calling the AI service.
+
+        Returns:
+            The processed measurement as a JSON-compatible dict
+
+        Raises:
+            AIServiceError: If the AI service cannot be reached
+            MeasurementJobError: If the AI service could not process the photos
+        """
+        async def call_ai_service():
+            photos = [
+                (
+                    f"photo_{view}",
+                    job["photos"][view]["filename"],
+                    job["photos"][view]["content_type"],
+                    blob_store.read(job["photos"][view]["path"]),
+                )
+                for view in VIEWS
+            ]
+            return await ai_client.process_measurements_stream(
+                photos,
+                height=job["height"],
+                weight=job["weight"],
+                force_error=job.get("force_error"),
+            )
+
+        digests = {view: photo.get("sha256") for view, photo in job["photos"].items()}
+        ai_result = await ai_result_cache.get_or_process(
+            redis,
+            digests if all(digests.values()) else None,
+            job["height"],
+            job["weight"],
+            job.get("force_error"),
+            call_ai_service,
+        )
+        if ai_result.get("status") != "success":
+            raise MeasurementJobError("AI service returned unsuccessful status")
+
+        ai_data = ai_result.get("data", {})
+        return await run_in_threadpool(
+            _save_measurement,
+            job["user_id"],
+            ai_data.get("measurements", {}),
+            job["image_paths"],
+            ai_data.get("confidence", 0.0),
+        )
+
+    async def _claim(self, redis, job_id: str) -> Optional[str]:
+        """Take a job's lock; returns its token, or None if someone else holds it."""
+        token = uuid.uuid4().hex
+        claimed = await redis.set(
+            LOCK_KEY.format(job_id=job_id),
+            token,
+            nx=True,
+            px=settings.MEASUREMENT_JOB_VISIBILITY_TIMEOUT_SECONDS * 1000,
+        )
+        return token if claimed else None
+
+    async def _release(self, redis, job_id: str, token: str) -> None:
+        await redis.eval(RELEASE_LOCK_SCRIPT, 1, LOCK_KEY.format(job_id=job_id), token)
+
+    async def _heartbeat(self, redis, job_id: str, token: str) -> None:
+        """Keep a claimed job's lock alive while the job runs."""
+        timeout = settings.MEASUREMENT_JOB_VISIBILITY_TIMEOUT_SECONDS
+        while True:
+            await asyncio.sleep(timeout / 3)
+            try:
+                refreshed = await redis.eval(
+                    REFRESH_LOCK_SCRIPT, 1, LOCK_KEY.format(job_id=job_id), token, timeout * 1000
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Measurement job {job_id} heartbeat failed: {e}")
+                continue
+            if not refreshed:
+                print(f"⚠️ Measurement job {job_id} lost its lock while processing")
+                return
+
+    async def process(self, redis, job_id: str) -> None:
+        """
+        Process one queued job and record its outcome.
+
+        Jobs whose lock another worker (or the requeuer) holds are left alone.
+        """
+        token = await self._claim(redis, job_id)
+        if token is None:
+            return
+        heartbeat = asyncio.create_task(self._heartbeat(redis, job_id, token))
+        try:
+            await self._process_claimed(redis, job_id)
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+            await self._release(redis, job_id, token)
+
+    async def _process_claimed(self, redis, job_id: str) -> None:
+        job = await self.get(redis, job_id)
+        if job is None or job["status"] != MeasurementJobStatus.QUEUED:
+            return
+
+        job["status"] = MeasurementJobStatus.PROCESSING
+        job["attempts"] += 1
+        await self._store(redis, job)
+
+        try:
+            job["result"] = await self.run_job(job, redis)
+            job["status"] = MeasurementJobStatus.COMPLETED
+        except AIServiceError as e:
+            if job["attempts"] < settings.MEASUREMENT_JOB_MAX_ATTEMPTS:
+                # Transient AI outage: put the job back at the end of the queue
+                job["status"] = MeasurementJobStatus.QUEUED
+                job["error"] = f"AI service error: {str(e)}"
+                await self._store(redis, job)
+                await redis.lpush(QUEUE_KEY, job_id)
+                return
+            job["status"] = MeasurementJobStatus.FAILED
+            job["error"] = f"AI service error: {str(e)}"
+        except Exception as e:
+            job["status"] = MeasurementJobStatus.FAILED
+            job["error"] = f"Failed to process measurements: {str(e)}"
+
+        if job["status"] == MeasurementJobStatus.FAILED:
+            await self.discard_photos(job)
+        else:
+            job["error"] = None
+
+        await self._store(redis, job)
+        await self.deliver_webhook(job)
+
+    async def discard_photos(self, job: Dict[str, Any]) -> None:
+        """
+        Remove a failed job's photos unless something references them.
+
+        Blobs the job did not create, or that another request uploaded or
+        referenced after the job registered them, are kept.
+        """
+        registrations: Dict[str, datetime] = {}
+        for photo in job["photos"].values():
+            if photo.get("sha256") and photo.get("created") and photo.get("registered_at"):
+                registered_at = datetime.fromisoformat(photo["registered_at"])
+                registrations[photo["sha256"]] = max(
+                    registered_at, registrations.get(photo["sha256"], registered_at)
+                )
+        if registrations:
+            async with AsyncSessionLocal() as db:
+                await asset_crud.delete_unreferenced_assets_async(
+                    db, None, blob_store.remove, registrations
+                )
+        await blob_store.remove(
+            photo["path"] for photo in job["photos"].values() if not photo.get("sha256")
+        )
+
+    async def deliver_webhook(self, job: Dict[str, Any]) -> None:
+        """
+        POST the finished job to its webhook URL, if one was given.
+
+        The body is signed with HMAC-SHA256 using SECRET_KEY and the signature
+        is sent in the ``X-Qeyafa-Signature`` header as ``sha256=<hex>``.
+        Delivery failures are logged and not retried.
+        """
+        url = job.get("webhook_url")
+        if not url:
+            return
+        # Checked again as the host may resolve differently than at enqueue time,
+        # and the request goes to the checked address rather than resolving again
+        try:
+            address = await check_webhook_url(url)
+        except WebhookURLError as e:
+            print(f"⚠️ Measurement job {job['job_id']} webhook not delivered: {e}")
+            return
+
+        body = json.dumps(public_job(job)).encode("utf-8")
+        signature = hmac.new(settings.SECRET_KEY.encode("utf-8"), body, hashlib.sha256).hexdigest()
+        headers = {
+            "Content-Type": "application/json",
+            "X-Qeyafa-Signature": f"sha256={signature}",
+        }
+        extensions = {}
+        if address is not None:
+            url, headers["Host"], extensions = _pin_to_address(url, address)
+        if self._webhook_client is None or self._webhook_client.is_closed:
+            self._webhook_client = httpx.AsyncClient(timeout=settings.MEASUREMENT_WEBHOOK_TIMEOUT)
+        try:
+            response = await self._webhook_client.post(
+                url,
+                content=body,
+                headers=headers,
+                extensions=extensions,
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            print(f"⚠️ Measurement job {job['job_id']} webhook delivery failed: {e}")
+
+    async def requeue_stalled(self, redis) -> int:
+        """
+        Recover the jobs of workers that stopped while processing them.
+
+        Jobs in the processing list whose lock has expired (their worker
+        stopped refreshing it for ``MEASUREMENT_JOB_VISIBILITY_TIMEOUT_SECONDS``)
+        are queued again, or failed once they have used
+        ``MEASUREMENT_JOB_MAX_ATTEMPTS``. The requeuer claims each job's lock
+        before touching it, so a worker cannot start the job meanwhile.
+        Entries of finished or expired jobs are dropped.
+
+        Returns:
+            Number of jobs queued again or failed
+        """
+        recovered = 0
+        for job_id in await redis.lrange(PROCESSING_KEY, 0, -1):
+            token = await self._claim(redis, job_id)
+            if token is None:
+                continue
+            try:
+                job = await self.get(redis, job_id)
+                if job is None or job["status"] not in (
+                    MeasurementJobStatus.QUEUED,
+                    MeasurementJobStatus.PROCESSING,
+                ):
+                    await redis.lrem(PROCESSING_KEY, 1, job_id)
+                    continue
+                if job["status"] == MeasurementJobStatus.PROCESSING:
+                    job["error"] = "Worker stopped while processing the job"
+                failed = job["attempts"] >= settings.MEASUREMENT_JOB_MAX_ATTEMPTS
+                if failed:
+                    job["status"] = MeasurementJobStatus.FAILED
+                    await self.discard_photos(job)
+                else:
+                    job["status"] = MeasurementJobStatus.QUEUED
+                job["updated_at"] = _now()
+                async with redis.pipeline(transaction=True) as pipe:
+                    pipe.lrem(PROCESSING_KEY, 1, job_id)
+                    pipe.set(
+                        JOB_KEY.format(job_id=job_id),
+                        json.dumps(job),
+                        ex=settings.MEASUREMENT_JOB_TTL_SECONDS,
+                    )
+                    if not failed:
+                        pipe.lpush(QUEUE_KEY, job_id)
+                    await pipe.execute()
+                if failed:
+                    await self.deliver_webhook(job)
+                recovered += 1
+            finally:
+                await self._release(redis, job_id, token)
+        if recovered:
+            print(f"⚠️ Recovered {recovered} measurement job(s) abandoned by a stopped worker")
+        return recovered
+
+    async def _worker(self, redis) -> None:
+        while True:
+            try:
+                job_id = await redis.brpoplpush(QUEUE_KEY, PROCESSING_KEY, timeout=5)
+                if job_id is None:
+                    continue
+                try:
+                    await self.process(redis, job_id)
+                finally:
+                    await redis.lrem(PROCESSING_KEY, 1, job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Measurement job worker error: {e}")
+                await asyncio.sleep(1)
+
+    async def _requeuer(self, redis) -> None:
+        while True:
+            try:
+                await self.requeue_stalled(redis)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Measurement job requeue error: {e}")
+            await asyncio.sleep(REQUEUE_INTERVAL_SECONDS)
+
+    def start(self, redis, concurrency: int) -> None:
+        """Start ``concurrency`` workers and a recoverer of abandoned jobs on this event loop."""
+        if concurrency > 0:
+            self._workers.append(asyncio.create_task(self._requeuer(redis)))
+        for _ in range(concurrency):
+            self._workers.append(asyncio.create_task(self._worker(redis)))
+
+    async def stop(self) -> None:
+        """Cancel the worker tasks and close the webhook client."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._webhook_client is not None:
+            await self._webhook_client.aclose()
+            self._webhook_client = None
+
+
+# Singleton instance
+measurement_jobs = MeasurementJobQueue()
+
+
+async def _run_standalone(concurrency: int) -> None:
+    from core.redis_client import init_redis, close_redis
+
+    redis = await init_redis()
+    await ai_client.start()
+    await storage.start()
+    measurement_jobs.start(redis, concurrency)
+    print(f"🚀 Measurement job worker running with {concurrency} concurrent jobs")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await measurement_jobs.stop()
+        await ai_client.close()
+        await storage.close()
+        await close_redis()
+
+
+if __name__ == "__main__":
+    concurrency = (
+        int(sys.argv[1])
+        if len(sys.argv) > 1
+        else max(settings.MEASUREMENT_JOB_WORKERS, 1)
+    )
+    asyncio.run(_run_standalone(concurrency))
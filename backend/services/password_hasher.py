@@ -0,0 +1,114 @@
+"""
+Dedicated executor for password hashing.
+
+bcrypt is deliberately slow (~250 ms at cost 12). Run on Starlette's shared
+threadpool, a burst of logins would occupy every thread and stall all other
+sync endpoints, so password work runs on its own small pool instead. When
+``PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_SIZE`` operations are already
+in flight, new ones are rejected with :class:`PasswordHasherBusy` (reported
+to clients as 503 with Retry-After) rather than queueing without bound.
+
+``password_hasher.seconds`` (time per operation, queueing included) and
+``password_hasher.wait_seconds`` (time waiting for a worker) are exported
+as histograms.
+"""
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from core.config import settings
+from core.metrics import metrics
+from core.security import hash_password, password_needs_rehash, verify_password
+
+
+def _timed_call(func: Callable, *args):
+    """Run ``func`` on a worker; returns when it started (wall clock) and its result."""
+    return time.time(), func(*args)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing queue is full."""
+    pass
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded thread or process pool."""
+
+    def __init__(self):
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        metrics.register_gauge("password_hasher.pending", lambda: self._pending)
+
+    @property
+    def pending(self) -> int:
+        """Operations running or waiting for a worker."""
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if settings.PASSWORD_HASH_EXECUTOR == "process":
+                # spawn: forking a process that runs an event loop and threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    thread_name_prefix="password-hasher",
+                )
+        return self._executor
+
+    async def _run(self, operation: str, func: Callable, *args):
+        if self._pending >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE:
+            metrics.incr("password_hasher.rejected")
+            raise PasswordHasherBusy("Too many password operations in progress")
+        self._pending += 1
+        submitted = time.time()
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            worker_started, result = await loop.run_in_executor(
+                self._get_executor(), _timed_call, func, *args
+            )
+            metrics.observe("password_hasher.wait_seconds", max(worker_started - submitted, 0.0))
+            return result
+        finally:
+            self._pending -= 1
+            metrics.incr(f"password_hasher.{operation}")
+            metrics.observe("password_hasher.seconds", time.perf_counter() - started)
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password with the configured cost factor.
+
+        Raises:
+            PasswordHasherBusy: If the queue is full
+        """
+        return await self._run("hashes", hash_password, password, settings.BCRYPT_ROUNDS)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        Check a password against a stored hash.
+
+        Raises:
+            PasswordHasherBusy: If the queue is full
+        """
+        return await self._run("verifications", verify_password, password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Whether a stored hash should be replaced after a successful login."""
+        return password_needs_rehash(hashed_password)
+
+    def shutdown(self) -> None:
+        """Stop the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+# Singleton instance
+password_hasher = PasswordHasher()
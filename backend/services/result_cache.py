@@ -0,0 +1,113 @@
+"""
+Content-addressed cache of AI measurement results.
+
+Results are keyed by the SHA-256 digests of the four photos, the height and
+weight, and the AI model version, so resubmitting the same photos (e.g. a
+client retry after a network error) is answered from Redis without running
+inference again. Entries expire after ``AI_RESULT_CACHE_TTL_SECONDS``; for
+LRU eviction under memory pressure configure Redis with
+``maxmemory-policy allkeys-lru``.
+"""
+
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from core.config import settings
+from core.metrics import metrics
+
+RESULT_KEY = "ai_results:{digest}"
+
+# Photo views in the order they contribute to the cache key
+VIEWS = ("front", "back", "left", "right")
+
+
+def result_cache_key(digests: Dict[str, str], height: float, weight: float) -> str:
+    """
+    Build the cache key for one set of inputs.
+
+    Args:
+        digests: SHA-256 hex digest of each view's photo
+        height: User height in cm
+        weight: User weight in kg
+
+    Returns:
+        Redis key for the result
+    """
+    parts = [settings.AI_MODEL_VERSION]
+    parts.extend(digests[view] for view in VIEWS)
+    parts.extend([repr(float(height)), repr(float(weight))])
+    digest = hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+    return RESULT_KEY.format(digest=digest)
+
+
+class AIResultCache:
+    """Read-through storage of successful AI results in Redis."""
+
+    @property
+    def enabled(self) -> bool:
+        return settings.AI_RESULT_CACHE_TTL_SECONDS > 0
+
+    async def get(self, redis, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached AI response for ``key``, or None on a miss."""
+        try:
+            raw = await redis.get(key)
+        except Exception as e:
+            print(f"⚠️ AI result cache unavailable: {e}")
+            return None
+        if raw is None:
+            metrics.incr("ai_result_cache.misses")
+            return None
+        metrics.incr("ai_result_cache.hits")
+        return json.loads(raw)
+
+    async def set(self, redis, key: str, ai_result: Dict[str, Any]) -> None:
+        """Cache a successful AI response; errors are logged and ignored."""
+        try:
+            await redis.set(key, json.dumps(ai_result), ex=settings.AI_RESULT_CACHE_TTL_SECONDS)
+        except Exception as e:
+            print(f"⚠️ Failed to cache AI result: {e}")
+
+    async def get_or_process(
+        self,
+        redis,
+        digests: Optional[Dict[str, str]],
+        height: float,
+        weight: float,
+        force_error: Optional[str],
+        process: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """
+        Return the cached AI response for these inputs, or call ``process``.
+
+        The cache is bypassed when Redis is unavailable, caching is disabled,
+        digests are unknown or ``force_error`` is set. Only successful
+        responses are stored.
+
+        Args:
+            redis: Redis client, or None
+            digests: SHA-256 hex digest of each view's photo
+            height: User height in cm
+            weight: User weight in kg
+            force_error: Debug trigger forwarded to the AI service
+            process: Coroutine function calling the AI service
+
+        Returns:
+            The AI service response
+        """
+        if redis is None or not self.enabled or not digests or force_error:
+            return await process()
+
+        key = result_cache_key(digests, height, weight)
+        ai_result = await self.get(redis, key)
+        if ai_result is not None:
+            return ai_result
+
+        ai_result = await process()
+        if ai_result.get("status") == "success":
+            await self.set(redis, key, ai_result)
+        return ai_result
+
+
+# Singleton instance
+ai_result_cache = AIResultCache()
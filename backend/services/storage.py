@@ -0,0 +1,492 @@
+"""
+Storage backends for uploaded files.
+
+Uploads are addressed by keys such as ``blobs/ab/cd/<sha256>`` and stored by
+one of two drivers, selected with ``STORAGE_BACKEND``:
+
+- ``local``: files below ``UPLOAD_DIR`` (a shared volume when several
+  backend replicas run)
+- ``s3``: any S3-compatible object store (AWS S3, MinIO, ...), which keeps
+  the backend replicas stateless
+
+Both drivers stream object bodies in chunks. The S3 driver signs requests
+with AWS Signature Version 4 on the shared httpx client, switches to
+multipart upload above ``S3_MULTIPART_THRESHOLD`` and can hand out
+presigned GET URLs so clients download photos directly from the store.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import os
+import tempfile
+import uuid
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+import aiofiles
+import aiofiles.os
+import httpx
+
+from core.config import settings
+
+# Use workspace-local uploads directory by default so tests can write files.
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "/workspaces/Qeyafa/backend/uploads")
+
+# Size of the chunks read from and written to storage
+STORAGE_CHUNK_SIZE = 64 * 1024
+
+
+class StorageError(Exception):
+    """Raised when the storage backend cannot complete an operation."""
+
+    pass
+
+
+class ObjectNotFound(StorageError):
+    """Raised when a key does not exist in storage."""
+
+    pass
+
+
+async def iter_local_file(path: str, chunk_size: int = STORAGE_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Yield the contents of a local file in chunks."""
+    async with aiofiles.open(path, "rb") as f:
+        while True:
+            chunk = await f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+class StorageBackend:
+    """Interface of the storage drivers."""
+
+    name = ""
+
+    async def start(self) -> None:
+        """Open connections (called at application startup)."""
+        pass
+
+    async def close(self) -> None:
+        """Release connections (called at application shutdown)."""
+        pass
+
+    @property
+    def spool_dir(self) -> str:
+        """Local directory for uploads being received before they are stored."""
+        raise NotImplementedError
+
+    async def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    async def put(
+        self, key: str, chunks: AsyncIterator[bytes], content_type: Optional[str] = None
+    ) -> None:
+        """Store an object from a stream of chunks."""
+        raise NotImplementedError
+
+    async def put_file(self, key: str, path: str, content_type: Optional[str] = None) -> None:
+        """Store a local spool file as an object; the local file is consumed."""
+        try:
+            await self.put(key, iter_local_file(path), content_type)
+        finally:
+            try:
+                await aiofiles.os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def get(self, key: str) -> AsyncIterator[bytes]:
+        """
+        Stream an object's content in chunks.
+
+        Raises:
+            ObjectNotFound: If the key does not exist
+        """
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        """Delete an object; missing keys are ignored."""
+        raise NotImplementedError
+
+    async def presigned_url(self, key: str, expires_in: Optional[int] = None) -> Optional[str]:
+        """Time-limited URL for downloading the object directly, if supported."""
+        return None
+
+
+class LocalStorage(StorageBackend):
+    """Stores objects as files below ``root``."""
+
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        """Location of a key on disk."""
+        return os.path.join(self.root, key)
+
+    @property
+    def spool_dir(self) -> str:
+        # Same filesystem as the objects, so put_file is a rename
+        return os.path.join(self.root, "tmp")
+
+    async def exists(self, key: str) -> bool:
+        return await aiofiles.os.path.exists(self.path(key))
+
+    async def put(
+        self, key: str, chunks: AsyncIterator[bytes], content_type: Optional[str] = None
+    ) -> None:
+        await aiofiles.os.makedirs(self.spool_dir, exist_ok=True)
+        temp_file = os.path.join(self.spool_dir, uuid.uuid4().hex)
+        try:
+            async with aiofiles.open(temp_file, "wb") as f:
+                async for chunk in chunks:
+                    await f.write(chunk)
+        except BaseException:
+            try:
+                await aiofiles.os.remove(temp_file)
+            except FileNotFoundError:
+                pass
+            raise
+        await self.put_file(key, temp_file, content_type)
+
+    async def put_file(self, key: str, path: str, content_type: Optional[str] = None) -> None:
+        destination = self.path(key)
+        await aiofiles.os.makedirs(os.path.dirname(destination), exist_ok=True)
+        # Atomic on POSIX, so readers never see a partially written object
+        await aiofiles.os.replace(path, destination)
+
+    async def get(self, key: str) -> AsyncIterator[bytes]:
+        try:
+            f = await aiofiles.open(self.path(key), "rb")
+        except FileNotFoundError:
+            raise ObjectNotFound(key)
+        try:
+            while True:
+                chunk = await f.read(STORAGE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            await f.close()
+
+    async def delete(self, key: str) -> None:
+        try:
+            await aiofiles.os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+
+def _sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _hmac_sha256(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()
+
+
+def _canonical_query(params: Dict[str, str]) -> str:
+    return "&".join(
+        f"{quote(name, safe='-_.~')}={quote(value, safe='-_.~')}"
+        for name, value in sorted(params.items())
+    )
+
+
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+
+
+class S3Storage(StorageBackend):
+    """Stores objects in an S3-compatible bucket over the S3 REST API."""
+
+    name = "s3"
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        access_key_id: str,
+        secret_access_key: str,
+        region: str = "us-east-1",
+        path_style: bool = True,
+        public_endpoint_url: Optional[str] = None,
+        multipart_threshold: int = 8 * 1024 * 1024,
+        presigned_url_expiry: int = 3600,
+        timeout: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.public_endpoint_url = (public_endpoint_url or endpoint_url).rstrip("/")
+        self.bucket = bucket
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.region = region
+        self.path_style = path_style
+        # Parts other than the last must be at least 5 MiB
+        self.part_size = max(multipart_threshold, 5 * 1024 * 1024)
+        self.presigned_url_expiry = presigned_url_expiry
+        self.timeout = timeout
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._client is not None and not self._client.is_closed and self._loop is loop:
+            return
+        self._client = httpx.AsyncClient(timeout=self.timeout, transport=self._transport)
+        self._loop = loop
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        await self.start()
+        return self._client
+
+    @property
+    def spool_dir(self) -> str:
+        return os.path.join(tempfile.gettempdir(), "qeyafa-uploads")
+
+    def _object_url(self, endpoint_url: str, key: str) -> Tuple[str, str]:
+        """Return (base URL, canonical URI) of a key."""
+        parts = urlsplit(endpoint_url)
+        path = quote(key, safe="/-_.~")
+        if self.path_style:
+            return f"{parts.scheme}://{parts.netloc}", f"/{self.bucket}/{path}"
+        return f"{parts.scheme}://{self.bucket}.{parts.netloc}", f"/{path}"
+
+    def _signature(
+        self,
+        method: str,
+        host: str,
+        uri: str,
+        query: str,
+        headers: Dict[str, str],
+        payload_hash: str,
+        now: datetime,
+    ) -> Tuple[str, str, str]:
+        """Return (credential scope, signed headers, signature) for a request."""
+        date = now.strftime("%Y%m%d")
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        scope = f"{date}/{self.region}/s3/aws4_request"
+
+        signed = {"host": host, **{name.lower(): value.strip() for name, value in headers.items()}}
+        signed_headers = ";".join(sorted(signed))
+        canonical_headers = "".join(f"{name}:{signed[name]}\n" for name in sorted(signed))
+        canonical_request = "\n".join(
+            [method, uri, query, canonical_headers, signed_headers, payload_hash]
+        )
+        string_to_sign = "\n".join(
+            ["AWS4-HMAC-SHA256", amz_date, scope, _sha256_hex(canonical_request.encode("utf-8"))]
+        )
+
+        key = _hmac_sha256(f"AWS4{self.secret_access_key}".encode("utf-8"), date)
+        for part in (self.region, "s3", "aws4_request"):
+            key = _hmac_sha256(key, part)
+        signature = hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+        return scope, signed_headers, signature
+
+    def _signed_request(
+        self,
+        method: str,
+        key: str,
+        params: Optional[Dict[str, str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        payload_hash: str = UNSIGNED_PAYLOAD,
+    ) -> Tuple[str, Dict[str, str]]:
+        """Build the URL and signed headers of an S3 API request."""
+        base, uri = self._object_url(self.endpoint_url, key)
+        query = _canonical_query(params or {})
+        now = datetime.now(timezone.utc)
+        headers = {
+            **(headers or {}),
+            "x-amz-content-sha256": payload_hash,
+            "x-amz-date": now.strftime("%Y%m%dT%H%M%SZ"),
+        }
+        scope, signed_headers, signature = self._signature(
+            method, urlsplit(base).netloc, uri, query, headers, payload_hash, now
+        )
+        headers["Authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key_id}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        return f"{base}{uri}" + (f"?{query}" if query else ""), headers
+
+    async def _request(
+        self,
+        method: str,
+        key: str,
+        params: Optional[Dict[str, str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        content: bytes = b"",
+        sign_payload: bool = False,
+    ) -> httpx.Response:
+        payload_hash = _sha256_hex(content) if sign_payload else UNSIGNED_PAYLOAD
+        url, signed_headers = self._signed_request(method, key, params, headers, payload_hash)
+        client = await self._get_client()
+        try:
+            response = await client.request(method, url, headers=signed_headers, content=content)
+        except httpx.HTTPError as e:
+            raise StorageError(f"{method} {key} failed: {e}") from e
+        if response.status_code == 404:
+            raise ObjectNotFound(key)
+        if response.status_code >= 300:
+            raise StorageError(
+                f"{method} {key} failed with {response.status_code}: {response.text[:200]}"
+            )
+        return response
+
+    async def exists(self, key: str) -> bool:
+        try:
+            await self._request("HEAD", key)
+        except ObjectNotFound:
+            return False
+        return True
+
+    async def put(
+        self, key: str, chunks: AsyncIterator[bytes], content_type: Optional[str] = None
+    ) -> None:
+        headers = {"content-type": content_type} if content_type else {}
+        buffer = bytearray()
+        upload_id = None
+        parts: List[Tuple[int, str]] = []
+        try:
+            async for chunk in chunks:
+                buffer.extend(chunk)
+                while len(buffer) >= self.part_size + 1:
+                    # More data than fits in one part: continue as multipart
+                    if upload_id is None:
+                        upload_id = await self._create_multipart_upload(key, headers)
+                    part, buffer = bytes(buffer[: self.part_size]), buffer[self.part_size:]
+                    parts.append(await self._upload_part(key, upload_id, len(parts) + 1, part))
+
+            if upload_id is None:
+                await self._request("PUT", key, headers=headers, content=bytes(buffer))
+                return
+
+            if buffer:
+                parts.append(await self._upload_part(key, upload_id, len(parts) + 1, bytes(buffer)))
+            await self._complete_multipart_upload(key, upload_id, parts)
+        except BaseException:
+            if upload_id is not None:
+                try:
+                    await self._request("DELETE", key, params={"uploadId": upload_id})
+                except StorageError as e:
+                    print(f"⚠️ Failed to abort multipart upload of {key}: {e}")
+            raise
+
+    async def _create_multipart_upload(self, key: str, headers: Dict[str, str]) -> str:
+        response = await self._request("POST", key, params={"uploads": ""}, headers=headers)
+        upload_id = _find_xml_text(response.content, "UploadId")
+        if not upload_id:
+            raise StorageError(f"No UploadId returned for {key}")
+        return upload_id
+
+    async def _upload_part(
+        self, key: str, upload_id: str, number: int, data: bytes
+    ) -> Tuple[int, str]:
+        response = await self._request(
+            "PUT", key, params={"partNumber": str(number), "uploadId": upload_id}, content=data
+        )
+        return number, response.headers["ETag"]
+
+    async def _complete_multipart_upload(
+        self, key: str, upload_id: str, parts: List[Tuple[int, str]]
+    ) -> None:
+        body = "".join(
+            f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+            for number, etag in parts
+        )
+        content = f"<CompleteMultipartUpload>{body}</CompleteMultipartUpload>".encode("utf-8")
+        response = await self._request(
+            "POST",
+            key,
+            params={"uploadId": upload_id},
+            headers={"content-type": "application/xml"},
+            content=content,
+            sign_payload=True,
+        )
+        # S3 can report a failed completion in a 200 response
+        if _find_xml_text(response.content, "Code"):
+            raise StorageError(
+                f"Completing multipart upload of {key} failed: {response.text[:200]}"
+            )
+
+    async def get(self, key: str) -> AsyncIterator[bytes]:
+        url, headers = self._signed_request("GET", key)
+        client = await self._get_client()
+        try:
+            async with client.stream("GET", url, headers=headers) as response:
+                if response.status_code == 404:
+                    raise ObjectNotFound(key)
+                if response.status_code >= 300:
+                    await response.aread()
+                    raise StorageError(
+                        f"GET {key} failed with {response.status_code}: {response.text[:200]}"
+                    )
+                async for chunk in response.aiter_bytes(STORAGE_CHUNK_SIZE):
+                    yield chunk
+        except httpx.HTTPError as e:
+            raise StorageError(f"GET {key} failed: {e}") from e
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self._request("DELETE", key)
+        except ObjectNotFound:
+            pass
+
+    async def presigned_url(self, key: str, expires_in: Optional[int] = None) -> Optional[str]:
+        base, uri = self._object_url(self.public_endpoint_url, key)
+        now = datetime.now(timezone.utc)
+        date = now.strftime("%Y%m%d")
+        params = {
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": f"{self.access_key_id}/{date}/{self.region}/s3/aws4_request",
+            "X-Amz-Date": now.strftime("%Y%m%dT%H%M%SZ"),
+            "X-Amz-Expires": str(expires_in or self.presigned_url_expiry),
+            "X-Amz-SignedHeaders": "host",
+        }
+        query = _canonical_query(params)
+        _, _, signature = self._signature(
+            "GET", urlsplit(base).netloc, uri, query, {}, UNSIGNED_PAYLOAD, now
+        )
+        return f"{base}{uri}?{query}&X-Amz-Signature={signature}"
+
+
+def _find_xml_text(content: bytes, tag: str) -> Optional[str]:
+    """Text of the first element named ``tag`` (ignoring XML namespaces)."""
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError:
+        return None
+    for element in root.iter():
+        if element.tag.rsplit("}", 1)[-1] == tag:
+            return element.text
+    return None
+
+
+def create_storage() -> StorageBackend:
+    """Create the storage driver selected by ``STORAGE_BACKEND``."""
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            bucket=settings.S3_BUCKET,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            region=settings.S3_REGION,
+            path_style=settings.S3_FORCE_PATH_STYLE,
+            public_endpoint_url=settings.S3_PUBLIC_ENDPOINT_URL,
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+            presigned_url_expiry=settings.S3_PRESIGNED_URL_EXPIRY,
+        )
+    return LocalStorage(UPLOAD_DIR)
+
+
+# Singleton instance
+storage = create_storage()
@@ -0,0 +1,119 @@
+"""
+Short-lived in-process cache of authenticated users.
+
+``get_current_user`` resolves the user id carried by an access token through
+this cache, so most authenticated requests need no database query. Entries
+expire after ``USER_CACHE_TTL_SECONDS``. When an admin changes or deletes a
+user, the entry is evicted and the user id is published on a Redis channel
+every API process listens to, so the other processes evict it as well;
+without Redis they pick up the change once their entry expires.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from core.config import settings
+from core.metrics import metrics
+from models.user import User
+
+INVALIDATION_CHANNEL = "users:invalidated"
+
+
+class UserCache:
+    """TTL + LRU cache of detached ``User`` rows keyed by user id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.USER_CACHE_TTL_SECONDS > 0
+
+    def get(self, user_id: str) -> Optional[User]:
+        """Return the cached user, or None if missing or expired."""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                metrics.incr("user_cache.hits")
+                return entry[1]
+            if entry is not None:
+                del self._entries[user_id]
+        metrics.incr("user_cache.misses")
+        return None
+
+    def set(self, user: User) -> None:
+        """
+        Cache a user.
+
+        The instance must be detached from its session (``db.expunge``) and
+        is shared between requests, so it must not be modified.
+        """
+        if not self.enabled:
+            return
+        expires = time.monotonic() + settings.USER_CACHE_TTL_SECONDS
+        with self._lock:
+            self._entries[str(user.id)] = (expires, user)
+            self._entries.move_to_end(str(user.id))
+            while len(self._entries) > settings.USER_CACHE_MAX_SIZE:
+                self._entries.popitem(last=False)
+
+    def evict(self, user_id: str) -> None:
+        """Drop a user from this process's cache."""
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    async def invalidate(self, redis, user_id: str) -> None:
+        """Evict a user here and, if Redis is available, in every other process."""
+        self.evict(user_id)
+        if redis is None:
+            return
+        try:
+            await redis.publish(INVALIDATION_CHANNEL, str(user_id))
+        except Exception as e:
+            print(f"⚠️ Failed to publish user cache invalidation: {e}")
+
+    async def _listen(self, redis) -> None:
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Invalidations may have been missed while disconnected
+                self.clear()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.evict(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ User cache invalidation listener error: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+
+    def start(self, redis) -> None:
+        """Listen for invalidations from other processes on the running event loop."""
+        self._listener = asyncio.create_task(self._listen(redis))
+
+    async def stop(self) -> None:
+        """Stop the invalidation listener."""
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+
+# Singleton instance
+user_cache = UserCache()
@@ -161,6 +161,10 @@ def setup_database():
     finally:
         db.close()
 
+    # Cached catalog responses may describe rows of a previous test
+    from services.catalog_cache import catalog_cache
+    catalog_cache.clear()
+
     yield
 
     # Teardown by downgrading migrations to base. Allow errors to surface
@@ -59,6 +59,44 @@ def test_list_users(client):
     assert isinstance(data, list)
 
 
+def test_list_users_matches_response_model(client):
+    """The orjson rows of the user list render exactly like the UserOut models."""
+    import json
+    from fastapi.encoders import jsonable_encoder
+    from sqlalchemy.orm import Session
+    from core.database import engine
+    from models.user import User
+    from schemas.user import UserOut
+
+    headers = {"Authorization": f"Bearer {get_admin_token(client)}"}
+    response = client.get("/api/v1/admin/users?limit=5", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+
+    with Session(engine) as db:
+        users = db.query(User).order_by(User.created_at.desc(), User.id.desc()).limit(5).all()
+        expected = jsonable_encoder([UserOut.from_orm(user) for user in users])
+    assert response.json() == json.loads(json.dumps(expected))
+
+
+def test_list_users_returns_every_user_without_limit_or_cursor(client):
+    """The admin portal does not follow X-Next-Cursor, so the unpaginated list is kept."""
+    from sqlalchemy.orm import Session
+    from core.database import engine
+    from models.user import User
+
+    headers = {"Authorization": f"Bearer {get_admin_token(client)}"}
+    response = client.get("/api/v1/admin/users", headers=headers)
+    assert response.status_code == 200
+    assert "X-Next-Cursor" not in response.headers
+
+    with Session(engine) as db:
+        assert len(response.json()) == db.query(User).count()
+
+    response = client.get("/api/v1/admin/users?limit=1", headers=headers)
+    assert len(response.json()) == 1
+
+
 def test_update_user(client):
     """Test updating a user as admin."""
     token = get_admin_token(client)
@@ -132,3 +170,60 @@ def test_delete_user(client):
     headers = {"Authorization": f"Bearer {token}"}
     response = client.delete("/api/v1/admin/users/12345678-1234-5678-9012-123456789012", headers=headers)  # Non-existent user
     assert response.status_code in [400, 404, 403]
+
+
+def test_update_user_invalidates_cached_user(client):
+    """Admin updates are visible at once; access changes revoke tokens."""
+    admin_headers = {"Authorization": f"Bearer {get_admin_token(client)}"}
+    email = f"cache_test_{time.time_ns()}@example.com"
+    client.post("/api/v1/admin/admin-create-user", json={
+        "email": email,
+        "password": "testpass123",
+        "first_name": "Before",
+        "role": "designer",
+    }, headers=admin_headers)
+    user_id = next(
+        u["id"]
+        for u in client.get("/api/v1/admin/users", headers=admin_headers).json()
+        if u["email"] == email
+    )
+    token = client.post(
+        "/api/v1/auth/login", data={"username": email, "password": "testpass123"}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/v1/users/me", headers=headers).json()["first_name"] == "Before"
+
+    # Profile changes keep the token valid and replace the cached user
+    client.put(
+        f"/api/v1/admin/users/{user_id}",
+        json={"first_name": "After"},
+        headers=admin_headers,
+    )
+    assert client.get("/api/v1/users/me", headers=headers).json()["first_name"] == "After"
+
+    # Deactivation revokes tokens issued before it
+    client.put(f"/api/v1/admin/users/{user_id}", json={"is_active": False}, headers=admin_headers)
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 401
+
+
+def test_access_changes_revoke_tokens_without_user_id(client):
+    """Tokens issued before tokens carried a user id are revoked by access changes too."""
+    from core.security import create_access_token
+
+    admin_headers = {"Authorization": f"Bearer {get_admin_token(client)}"}
+    email = f"legacy_token_{time.time_ns()}@example.com"
+    client.post("/api/v1/admin/admin-create-user", json={
+        "email": email,
+        "password": "testpass123",
+        "role": "designer",
+    }, headers=admin_headers)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': email, 'role': 'designer'})}"}
+    me = client.get("/api/v1/users/me", headers=headers)
+    assert me.status_code == 200
+
+    client.put(
+        f"/api/v1/admin/users/{me.json()['id']}",
+        json={"role": "customer"},
+        headers=admin_headers,
+    )
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 401
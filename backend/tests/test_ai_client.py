@@ -0,0 +1,96 @@
+"""
+Tests for the pooled AI service client.
+"""
+
+import asyncio
+
+import httpx
+
+from services.ai_client import AIClient
+
+
+def _mock_transport(calls):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(200, json={"status": "healthy"})
+
+    return httpx.MockTransport(handler)
+
+
+def test_ai_client_reuses_pooled_client():
+    """Consecutive calls share one pooled httpx client until close()."""
+    calls = []
+    client = AIClient(transport=_mock_transport(calls))
+
+    async def run():
+        await client.start()
+        pooled = client._client
+        first = await client.health_check()
+        second = await client.health_check()
+        assert client._client is pooled
+        await client.close()
+        assert pooled.is_closed
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first == {"status": "healthy"}
+    assert second == {"status": "healthy"}
+    assert calls == ["/health", "/health"]
+    assert client._client is None
+
+
+def test_ai_client_starts_lazily():
+    """A request made before start() opens the pool on demand."""
+    calls = []
+    client = AIClient(transport=_mock_transport(calls))
+
+    async def run():
+        result = await client.health_check()
+        assert client._client is not None
+        await client.close()
+        return result
+
+    assert asyncio.run(run()) == {"status": "healthy"}
+    assert calls == ["/health"]
+
+
+def test_ai_client_closes_pool_of_previous_loop():
+    """Starting on a new event loop closes the client opened on the old one."""
+    client = AIClient(transport=_mock_transport([]))
+
+    async def open_pool():
+        await client.start()
+        return client._client
+
+    first = asyncio.run(open_pool())
+    second = asyncio.run(open_pool())
+
+    assert second is not first
+    assert first.is_closed
+    assert not second.is_closed
+    asyncio.run(client.close())
+
+
+def test_ai_client_concurrent_first_calls_share_one_pool(monkeypatch):
+    """Concurrent first calls on a new loop open a single client instead of leaking extras."""
+    client = AIClient(transport=_mock_transport([]))
+    opened = []
+    async_client = httpx.AsyncClient
+
+    def counting_client(*args, **kwargs):
+        opened.append(async_client(*args, **kwargs))
+        return opened[-1]
+
+    async def open_pool():
+        await client.start()
+
+    async def run():
+        await asyncio.gather(*(client.health_check() for _ in range(5)))
+        await client.close()
+
+    asyncio.run(open_pool())
+    monkeypatch.setattr(httpx, "AsyncClient", counting_client)
+    asyncio.run(run())
+
+    assert len(opened) == 1
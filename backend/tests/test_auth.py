@@ -260,3 +260,111 @@ def test_register_password_valid_lengths(client):
     )
 
     assert response_max.status_code in [201, 400]  # 201 success, 400 duplicate email
+
+
+def test_authenticated_requests_skip_user_query(client):
+    """Once cached, the user behind a token is resolved without a query."""
+    import time
+    from sqlalchemy import event
+    from core.database import async_engine, engine
+
+    email = f"cached_user_{time.time_ns()}@example.com"
+    client.post(
+        "/api/v1/auth/register",
+        json={"email": email, "password": "testpass123", "role": "customer"},
+    )
+    token = client.post(
+        "/api/v1/auth/login", data={"username": email, "password": "testpass123"}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engines = (engine, async_engine.sync_engine)
+    for target in engines:
+        event.listen(target, "before_cursor_execute", count)
+    try:
+        response = client.get("/api/v1/users/me", headers=headers)
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", count)
+
+    assert response.status_code == 200
+    assert response.json()["email"] == email
+    assert statements == []
+
+
+def test_login_rehashes_password_when_cost_changes(client, monkeypatch):
+    """A successful login upgrades hashes made with another bcrypt cost."""
+    import time
+    from core.config import settings
+    from core.database import SessionLocal
+    from models.user import User
+
+    email = f"rehash_{time.time_ns()}@example.com"
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    client.post(
+        "/api/v1/auth/register",
+        json={"email": email, "password": "testpass123", "role": "customer"},
+    )
+
+    def stored_hash():
+        db = SessionLocal()
+        try:
+            return db.query(User).filter(User.email == email).first().hashed_password
+        finally:
+            db.close()
+
+    assert stored_hash().startswith("$2b$05$")
+
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+    for _ in range(2):
+        response = client.post(
+            "/api/v1/auth/login", data={"username": email, "password": "testpass123"}
+        )
+        assert response.status_code == 200
+    assert stored_hash().startswith("$2b$04$")
+
+
+def test_login_rejected_when_password_hasher_is_saturated(client, monkeypatch):
+    """Logins beyond the password hashing queue get 503 instead of waiting."""
+    from core.config import settings
+    from core.metrics import metrics
+    from services.password_hasher import password_hasher
+
+    rejected = metrics.get("password_hasher.rejected")
+    monkeypatch.setattr(
+        password_hasher,
+        "_pending",
+        settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE,
+    )
+
+    response = client.post(
+        "/api/v1/auth/login", data={"username": "admin@example.com", "password": "password123"}
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)
+    assert metrics.get("password_hasher.rejected") == rejected + 1
+
+
+def test_password_hasher_reports_latency_histograms(client):
+    """Each password operation is recorded in the latency and queue wait histograms."""
+    from core.metrics import metrics
+
+    operations = metrics.get("password_hasher.seconds.count")
+    waits = metrics.get("password_hasher.wait_seconds.count")
+
+    response = client.post(
+        "/api/v1/auth/login", data={"username": "admin@example.com", "password": "password123"}
+    )
+
+    assert response.status_code == 200
+    # A verification, plus a rehash if the stored cost factor is outdated
+    recorded = metrics.get("password_hasher.seconds.count") - operations
+    assert recorded >= 1
+    assert metrics.get("password_hasher.wait_seconds.count") - waits == recorded
@@ -0,0 +1,181 @@
+"""
+Tests for the catalog bootstrap and changes endpoints.
+"""
+
+import base64
+import json
+import uuid
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.database import async_engine, engine
+from crud.color import create_color, delete_color
+from crud.design import create_design
+from crud.fabric import create_fabric, update_fabric
+from models.category import Category
+from models.user import User
+from schemas.color import ColorCreate
+from schemas.design import DesignCreate
+from schemas.fabric import FabricCreate, FabricUpdate
+
+
+@pytest.fixture
+def no_lag(monkeypatch):
+    monkeypatch.setattr(settings, "CATALOG_CHANGES_LAG_SECONDS", 0)
+
+
+def _sync(client, since=None, limit=1000):
+    """All changes since a cursor, following has_more; returns (pages, next cursor)."""
+    pages = []
+    while True:
+        params = {"limit": limit, **({"since": since} if since else {})}
+        response = client.get("/api/v1/catalog/changes", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        pages.append(page)
+        since = page["next_cursor"]
+        if not page["has_more"]:
+            return pages, since
+
+
+def _seed(tag):
+    """A category, fabric, color and design using both; returns their ids."""
+    with Session(engine) as db:
+        admin = db.query(User).filter(User.email == "admin@example.com").one()
+        category = Category(name=f"bootstrap-{tag}")
+        db.add(category)
+        db.commit()
+        fabric = create_fabric(db, FabricCreate(name=f"silk-{tag}", base_price=20))
+        color = create_color(db, ColorCreate(name=f"indigo-{tag}", hex_code="#4B0082"))
+        design = create_design(
+            db,
+            DesignCreate(
+                name=f"bootstrap-{tag}",
+                base_price=100,
+                category_id=category.id,
+                available_fabric_ids=[fabric.id],
+                available_color_ids=[color.id],
+            ),
+            owner_id=admin.id,
+        )
+        return str(category.id), str(fabric.id), str(color.id), str(design.id)
+
+
+def test_bootstrap_returns_the_gallery_with_one_query_per_table(client):
+    *_, older_design_id = _seed(uuid.uuid4().hex)
+    category_id, fabric_id, color_id, design_id = _seed(uuid.uuid4().hex)
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/api/v1/catalog/bootstrap?designs_limit=1")
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert category_id in [category["id"] for category in body["categories"]]
+    assert fabric_id in [fabric["id"] for fabric in body["fabrics"]]
+    assert color_id in [color["id"] for color in body["colors"]]
+    design = body["designs"][0]
+    assert design["id"] == design_id
+    assert design["available_fabric_ids"] == [fabric_id]
+    assert design["available_color_ids"] == [color_id]
+    # categories, designs, two association tables, fabrics, colors
+    assert len(statements) == 6
+    assert response.headers["ETag"]
+    assert body["designs_next_cursor"] is not None
+
+    page = client.get(
+        "/api/v1/designs/", params={"limit": 1, "cursor": body["designs_next_cursor"]}
+    )
+    assert page.status_code == 200
+    assert [design["id"] for design in page.json()] == [older_design_id]
+
+
+def test_bootstrap_is_invalidated_by_catalog_writes(client):
+    first = client.get("/api/v1/catalog/bootstrap").json()
+    assert client.get("/api/v1/catalog/bootstrap").json()["version"] == first["version"]
+
+    with Session(engine) as db:
+        fabric = create_fabric(db, FabricCreate(name=f"linen-{uuid.uuid4().hex}", base_price=15))
+        fabric_id = str(fabric.id)
+
+    second = client.get("/api/v1/catalog/bootstrap").json()
+    assert second["version"] != first["version"]
+    assert fabric_id in [fabric["id"] for fabric in second["fabrics"]]
+
+
+def test_changes_returns_updates_and_deletions_since_the_cursor(client, no_lag):
+    tag = uuid.uuid4().hex
+    category_id, fabric_id, color_id, design_id = _seed(tag)
+
+    full, cursor = _sync(client)
+    assert design_id in [design["id"] for page in full for design in page["designs"]]
+    assert fabric_id in [fabric["id"] for page in full for fabric in page["fabrics"]]
+    assert all(
+        page["deleted"]
+        == {"designs": [], "categories": [], "fabrics": [], "colors": []}
+        for page in full
+    )
+
+    [unchanged], cursor = _sync(client, cursor)
+    assert not any(unchanged[kind] for kind in ("designs", "categories", "fabrics", "colors"))
+
+    with Session(engine) as db:
+        update_fabric(db, uuid.UUID(fabric_id), FabricUpdate(description="heavier weave"))
+        # Also removes it from the design, which touches the design
+        delete_color(db, uuid.UUID(color_id))
+
+    [page], cursor = _sync(client, cursor)
+    assert [fabric["id"] for fabric in page["fabrics"]] == [fabric_id]
+    assert page["fabrics"][0]["description"] == "heavier weave"
+    assert page["deleted"]["colors"] == [color_id]
+    assert [design["id"] for design in page["designs"]] == [design_id]
+    assert page["designs"][0]["available_color_ids"] == []
+    assert page["categories"] == [] and page["colors"] == []
+
+    [page], _ = _sync(client, cursor)
+    assert not page["fabrics"] and not page["deleted"]["colors"]
+
+
+def test_changes_pages_follow_the_cursor(client, no_lag):
+    _seed(uuid.uuid4().hex)
+    _, cursor = _sync(client)
+    created = [_seed(uuid.uuid4().hex) for _ in range(2)]
+
+    pages, _ = _sync(client, cursor, limit=3)
+    # Two categories, fabrics, colors and designs each
+    assert len(pages) == 3 and [page["has_more"] for page in pages] == [True, True, False]
+    designs = [design["id"] for page in pages for design in page["designs"]]
+    assert sorted(designs) == sorted(design_id for *_, design_id in created)
+
+
+def test_changes_hide_writes_newer_than_the_lag(client, monkeypatch):
+    monkeypatch.setattr(settings, "CATALOG_CHANGES_LAG_SECONDS", 0)
+    _, cursor = _sync(client)
+    monkeypatch.setattr(settings, "CATALOG_CHANGES_LAG_SECONDS", 3600)
+    _seed(uuid.uuid4().hex)
+
+    [page], next_cursor = _sync(client, cursor)
+    assert not page["designs"] and not page["fabrics"]
+    # The cursor never moves back, so nothing is returned twice
+    assert next_cursor == cursor
+
+
+def test_changes_rejects_invalid_cursor(client):
+    response = client.get("/api/v1/catalog/changes?since=not-a-cursor")
+    assert response.status_code == 400
+
+    # Well-formed, but without a timezone
+    naive = base64.urlsafe_b64encode(
+        json.dumps(["n", "2099-01-01T00:00:00", str(uuid.uuid4())]).encode()
+    ).decode().rstrip("=")
+    response = client.get("/api/v1/catalog/changes", params={"since": naive})
+    assert response.status_code == 400
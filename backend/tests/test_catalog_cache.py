@@ -0,0 +1,195 @@
+"""
+Tests for the catalog response cache.
+"""
+
+import uuid
+
+from sqlalchemy import event
+
+from core.config import settings
+from core.database import async_engine
+from core.metrics import metrics
+from services import catalog_cache as catalog_cache_module
+from services.catalog_cache import catalog_cache
+
+
+class FakeRedis:
+    """The Redis commands used by the catalog cache, for both clients."""
+
+    def __init__(self):
+        self.values = {}
+        self.published = []
+
+    async def mget(self, *keys):
+        return [self.values.get(key) for key in keys]
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if not (nx and key in self.values):
+            self.values[key] = value
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def incr(self, key):
+        self.commands.append(("incr", key))
+
+    def publish(self, channel, message):
+        self.commands.append(("publish", channel, message))
+
+    def execute(self):
+        for command in self.commands:
+            if command[0] == "incr":
+                self.redis.values[command[1]] = str(int(self.redis.values.get(command[1], "0")) + 1)
+            else:
+                self.redis.published.append(command[1:])
+
+
+def _admin_headers(client):
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "admin@example.com", "password": "password123"},
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+class _StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(async_engine.sync_engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(async_engine.sync_engine, "before_cursor_execute", self)
+
+
+def test_repeated_catalog_reads_skip_the_database(client):
+    """The second identical request is served from memory, headers included."""
+    first = client.get("/api/v1/categories/?limit=1")
+    assert first.status_code == 200
+    hits = metrics.get("catalog_cache.l1_hits")
+
+    with _StatementCounter() as statements:
+        second = client.get("/api/v1/categories/?limit=1")
+
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers.get("X-Next-Cursor") == first.headers.get("X-Next-Cursor")
+    assert statements.count == 0
+    assert metrics.get("catalog_cache.l1_hits") == hits + 1
+    assert 0 < metrics.snapshot()["catalog_cache.hit_rate"] <= 1
+
+
+def test_writes_invalidate_cached_catalog_responses(client):
+    """Creating, updating and deleting a category is visible on the next read."""
+    headers = _admin_headers(client)
+    client.get("/api/v1/categories/")
+    name = f"cached-{uuid.uuid4().hex}"
+
+    created = client.post("/api/v1/categories/", json={"name": name}, headers=headers)
+    assert created.status_code == 201
+    category_id = created.json()["id"]
+    assert name in [category["name"] for category in client.get("/api/v1/categories/").json()]
+    assert client.get(f"/api/v1/categories/{category_id}").json()["name"] == name
+
+    client.put(
+        f"/api/v1/categories/{category_id}",
+        json={"name": name + "-renamed"},
+        headers=headers,
+    )
+    assert client.get(f"/api/v1/categories/{category_id}").json()["name"] == name + "-renamed"
+
+    client.delete(f"/api/v1/categories/{category_id}", headers=headers)
+    assert client.get(f"/api/v1/categories/{category_id}").status_code == 404
+    assert category_id not in [
+        category["id"] for category in client.get("/api/v1/categories/").json()
+    ]
+
+
+def test_redis_entries_are_shared_until_their_tag_is_invalidated(client, monkeypatch):
+    """Another process (an empty L1) reuses the Redis entry until the tag's generation moves on."""
+    redis = FakeRedis()
+    monkeypatch.setattr(catalog_cache_module, "get_redis", lambda: redis)
+    monkeypatch.setattr(catalog_cache_module, "get_sync_redis", lambda: redis)
+    misses = metrics.get("catalog_cache.misses")
+    l2_hits = metrics.get("catalog_cache.l2_hits")
+
+    client.get("/api/v1/templates/")
+    catalog_cache.clear()
+    client.get("/api/v1/templates/")
+    assert metrics.get("catalog_cache.misses") == misses + 1
+    assert metrics.get("catalog_cache.l2_hits") == l2_hits + 1
+
+    catalog_cache.invalidate(catalog_cache_module.TEMPLATES)
+    assert redis.values["catalog:gen:templates"] == "1"
+    assert redis.published == [("catalog:invalidated", '["templates"]')]
+    client.get("/api/v1/templates/")
+    assert metrics.get("catalog_cache.misses") == misses + 2
+
+
+def test_catalog_responses_are_revalidated_with_etags(client, monkeypatch):
+    """A matching If-None-Match gets an empty 304 until the catalog changes."""
+    first = client.get("/api/v1/categories/")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == settings.CATALOG_CACHE_CONTROL
+
+    not_modified = client.get(
+        "/api/v1/categories/", headers={"If-None-Match": f'W/"other", {etag}'}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+    other = client.get("/api/v1/categories/", headers={"If-None-Match": '"other"'})
+    assert other.status_code == 200
+
+    client.post(
+        "/api/v1/categories/",
+        json={"name": f"etag-{uuid.uuid4().hex}"},
+        headers=_admin_headers(client),
+    )
+    changed = client.get("/api/v1/categories/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+    # Without the cache the ETag is computed per request and still honoured
+    monkeypatch.setattr(settings, "CATALOG_CACHE_TTL_SECONDS", 0)
+    uncached = client.get("/api/v1/categories/", headers={"If-None-Match": changed.headers["ETag"]})
+    assert uncached.status_code == 304
+
+
+def test_matching_etags_get_304_without_loading(client, monkeypatch):
+    """With Redis the ETag follows the tag generation, so a 304 needs no query, even uncached."""
+    redis = FakeRedis()
+    monkeypatch.setattr(catalog_cache_module, "get_redis", lambda: redis)
+    monkeypatch.setattr(catalog_cache_module, "get_sync_redis", lambda: redis)
+    monkeypatch.setattr(settings, "CATALOG_CACHE_TTL_SECONDS", 0)
+    etag = client.get("/api/v1/categories/").headers["ETag"]
+
+    with _StatementCounter() as statements:
+        not_modified = client.get("/api/v1/categories/", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+    assert statements.count == 0
+
+    catalog_cache.invalidate(catalog_cache_module.CATEGORIES)
+    changed = client.get("/api/v1/categories/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+    # A lost epoch (e.g. Redis was flushed) changes every ETag
+    etag = changed.headers["ETag"]
+    del redis.values["catalog:epoch"]
+    assert client.get("/api/v1/categories/", headers={"If-None-Match": etag}).status_code == 200
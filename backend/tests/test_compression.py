@@ -0,0 +1,131 @@
+"""
+Tests for response compression.
+"""
+
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from core import compression
+from core.compression import CompressionMiddleware, negotiate
+from core.config import settings
+from core.metrics import metrics
+
+BODY = {
+    "designs": [
+        {"name": f"Design {i}", "customization_rules": {"sleeve": ["short", "long"]}}
+        for i in range(100)
+    ]
+}
+
+
+@pytest.fixture
+def gzip_only(monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_ENCODINGS_STR", "gzip")
+
+
+def _app():
+    app = FastAPI()
+
+    @app.get("/large")
+    def large():
+        return BODY
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/image")
+    def image():
+        return Response(b"\x89PNG" + b"\x00" * 4096, media_type="image/png")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(
+            (json.dumps(BODY).encode() for _ in range(3)), media_type="text/plain"
+        )
+
+    @app.get("/etag")
+    def etag():
+        return JSONResponse(BODY, headers={"ETag": '"abc"'})
+
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    return app
+
+
+def test_negotiate_respects_quality_values(gzip_only):
+    assert negotiate("gzip, deflate") == "gzip"
+    assert negotiate("*") == "gzip"
+    assert negotiate("deflate, gzip;q=0") is None
+    assert negotiate("identity") is None
+    assert negotiate(None) is None
+
+
+def test_middleware_compresses_large_text_responses_only(gzip_only):
+    client = TestClient(_app())
+    headers = {"Accept-Encoding": "gzip"}
+
+    large = client.get("/large", headers=headers)
+    assert large.headers["content-encoding"] == "gzip"
+    assert large.headers["vary"] == "Accept-Encoding"
+    assert large.json() == BODY
+    assert int(large.headers["content-length"]) < len(json.dumps(BODY)) / 5
+
+    assert "content-encoding" not in client.get("/small", headers=headers).headers
+    assert "content-encoding" not in client.get("/image", headers=headers).headers
+    identity = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+
+    streamed = client.get("/stream", headers=headers)
+    assert streamed.headers["content-encoding"] == "gzip"
+    assert "content-length" not in streamed.headers
+    assert streamed.text == json.dumps(BODY) * 3
+
+    assert client.get("/etag", headers=headers).headers["etag"] == '"abc-gzip"'
+
+
+@pytest.mark.parametrize(
+    "encoding, module", [("gzip", "gzip"), ("br", "brotli"), ("zstd", "zstandard")]
+)
+def test_streaming_compressor_round_trips(encoding, module):
+    library = pytest.importorskip(module)
+    compressor = compression._Compressor(encoding, 3)
+    data = (
+        compressor.compress(b"a" * 1000)
+        + compressor.flush()
+        + compressor.compress(b"b" * 1000)
+        + compressor.finish()
+    )
+    if encoding == "gzip":
+        assert gzip.decompress(data) == b"a" * 1000 + b"b" * 1000
+    elif encoding == "br":
+        assert library.decompress(data) == b"a" * 1000 + b"b" * 1000
+    else:
+        assert (
+            library.ZstdDecompressor().decompressobj().decompress(data)
+            == b"a" * 1000 + b"b" * 1000
+        )
+
+
+def test_catalog_cache_compresses_each_entry_once(client, gzip_only, monkeypatch):
+    """Hot catalog responses are sent from their stored compressed copy."""
+    monkeypatch.setattr(settings, "COMPRESSION_MIN_SIZE", 0)
+    headers = {"Accept-Encoding": "gzip"}
+    compressions = metrics.get("catalog_cache.compressions")
+
+    first = client.get("/api/v1/categories/?limit=3", headers=headers)
+    second = client.get("/api/v1/categories/?limit=3", headers=headers)
+
+    assert first.headers["content-encoding"] == second.headers["content-encoding"] == "gzip"
+    assert first.headers["etag"].endswith('-gzip"')
+    assert second.json() == first.json()
+    assert metrics.get("catalog_cache.compressions") == compressions + 1
+    revalidated = client.get(
+        "/api/v1/categories/?limit=3",
+        headers={"If-None-Match": first.headers["etag"], **headers},
+    )
+    assert revalidated.status_code == 304
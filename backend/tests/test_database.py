@@ -0,0 +1,282 @@
+"""
+Tests for engine configuration and connection pool metrics.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from core import database
+from core.config import settings
+from core.metrics import metrics
+
+
+def test_pool_metrics_report_usage_wait_time_and_timeouts(monkeypatch):
+    """A pooled engine exports its usage and counts checkouts that time out."""
+    monkeypatch.setattr(settings, "DATABASE_NULL_POOL", False)
+    monkeypatch.setattr(settings, "DATABASE_POOL_SIZE", 1)
+    monkeypatch.setattr(settings, "DATABASE_MAX_OVERFLOW", 1)
+    monkeypatch.setattr(settings, "DATABASE_POOL_TIMEOUT", 0.1)
+    monkeypatch.setattr(settings, "DATABASE_STATEMENT_TIMEOUT_MS", 1234)
+    engine = create_engine(settings.DATABASE_URL, **database.engine_options())
+    database.register_pool_metrics("test_engine.pool", engine)
+    waits = metrics.get("db.pool.wait_seconds.count")
+    timeouts = metrics.get("db.pool.timeouts")
+    try:
+        with engine.connect() as first, engine.connect() as second:
+            snapshot = metrics.snapshot()
+            assert snapshot["test_engine.pool.checked_out"] == 2
+            assert snapshot["test_engine.pool.overflow"] == 1
+            # The overflow connection is configured like the pooled one
+            for connection in (first, second):
+                assert connection.execute(text("SHOW statement_timeout")).scalar() == "1234ms"
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+        assert metrics.get("db.pool.timeouts") == timeouts + 1
+        assert metrics.get("db.pool.wait_seconds.count") == waits + 3
+        assert metrics.get("db.pool.wait_seconds.le_30") == metrics.get(
+            "db.pool.wait_seconds.count"
+        )
+        assert metrics.snapshot()["test_engine.pool.checked_out"] == 0
+    finally:
+        engine.dispose()
+
+
+def test_pgbouncer_mode_disables_prepared_statement_reuse(monkeypatch):
+    """Behind PgBouncer asyncpg gets no statement cache and unique statement names."""
+    monkeypatch.setattr(settings, "DATABASE_PGBOUNCER", True)
+
+    connect_args = database.engine_options(async_driver=True)["connect_args"]
+    sync_options = database.engine_options()
+
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_cache_size"] == 0
+    assert (
+        connect_args["prepared_statement_name_func"]()
+        != connect_args["prepared_statement_name_func"]()
+    )
+    assert "server_settings" not in connect_args
+    assert "connect_args" not in sync_options
+
+
+def _customer_token(client):
+    email = f"replica_{uuid.uuid4().hex}@example.com"
+    client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "testpass123",
+            "first_name": "Test",
+            "last_name": "User",
+            "role": "customer",
+        },
+    )
+    response = client.post(
+        "/api/v1/auth/login", data={"username": email, "password": "testpass123"}
+    )
+    return response.json()["access_token"]
+
+
+def test_reads_use_replica_except_shortly_after_a_write(client, monkeypatch):
+    """
+    Reads go to the replica, but to the primary right after the client wrote.
+
+    The replica is the test database itself unless TEST_REPLICA_DATABASE_URL
+    points at a second Postgres instance with the same schema (no replication
+    needed: the measurement written to the primary must be readable right away).
+    """
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_STICKY_SECONDS", 0.5)
+    # Without the catalog cache every catalog request reads from the database
+    monkeypatch.setattr(settings, "CATALOG_CACHE_TTL_SECONDS", 0)
+    database.configure_replicas([os.getenv("TEST_REPLICA_DATABASE_URL", settings.DATABASE_URL)])
+    try:
+        headers = {"Authorization": f"Bearer {_customer_token(client)}"}
+        other_headers = {"Authorization": f"Bearer {_customer_token(client)}"}
+        # Forget the anonymous register/login requests
+        database.recent_writes.clear()
+        replica_reads = metrics.get("db.reads.replica")
+        primary_reads = metrics.get("db.reads.primary")
+
+        assert client.get("/api/v1/designs/", headers=headers).status_code == 200
+        assert metrics.get("db.reads.replica") == replica_reads + 1
+
+        created = client.post(
+            "/api/v1/measurements/",
+            json={"measurements": {"chest": 96.0}},
+            headers=headers,
+        )
+        assert created.status_code == 201
+        response = client.get(f"/api/v1/measurements/{created.json()['id']}", headers=headers)
+        assert response.status_code == 200
+        assert metrics.get("db.reads.primary") == primary_reads + 1
+
+        # Other clients keep reading from the replica
+        assert client.get("/api/v1/categories/", headers=other_headers).status_code == 200
+        assert metrics.get("db.reads.replica") == replica_reads + 2
+
+        time.sleep(0.6)
+        assert client.get("/api/v1/designs/", headers=headers).status_code == 200
+        assert metrics.get("db.reads.replica") == replica_reads + 3
+    finally:
+        for replica in database.configure_replicas([]):
+            asyncio.run(replica.dispose())
+        database.recent_writes.clear()
+
+
+def test_catalog_cache_misses_use_replica_and_hits_read_nothing(client, monkeypatch):
+    """Catalog cache hits count no read; misses use the replica unless the catalog just changed."""
+    from services.catalog_cache import CATEGORIES, catalog_cache
+
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_STICKY_SECONDS", 0.5)
+    monkeypatch.setattr(settings, "CATALOG_CACHE_TTL_SECONDS", 300)
+    database.configure_replicas([os.getenv("TEST_REPLICA_DATABASE_URL", settings.DATABASE_URL)])
+    catalog_cache.clear()
+    try:
+        database.recent_writes.clear()
+
+        def reads():
+            return metrics.get("db.reads.replica"), metrics.get("db.reads.primary")
+
+        replica_reads, primary_reads = reads()
+        assert client.get("/api/v1/categories/").status_code == 200
+        assert reads() == (replica_reads + 1, primary_reads)
+
+        assert client.get("/api/v1/categories/").status_code == 200
+        assert reads() == (replica_reads + 1, primary_reads)
+
+        catalog_cache.invalidate(CATEGORIES)
+        assert client.get("/api/v1/categories/").status_code == 200
+        assert reads() == (replica_reads + 1, primary_reads + 1)
+
+        time.sleep(0.6)
+        catalog_cache.clear()
+        assert client.get("/api/v1/categories/").status_code == 200
+        assert reads() == (replica_reads + 2, primary_reads + 1)
+    finally:
+        for replica in database.configure_replicas([]):
+            asyncio.run(replica.dispose())
+        database.recent_writes.clear()
+        catalog_cache.clear()
+
+
+def _index_scans(connection, statement):
+    """Names of the indexes scanned by ``statement``, and whether any table is read sequentially."""
+    compiled = statement.compile(connection)
+    plan = connection.exec_driver_sql(
+        "EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params
+    ).scalar()
+    indexes, seq_scans = set(), set()
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get("Plans", []))
+        if node["Node Type"] in ("Index Scan", "Index Only Scan", "Bitmap Index Scan"):
+            indexes.add(node["Index Name"])
+        elif node["Node Type"] == "Seq Scan":
+            seq_scans.add(node["Relation Name"])
+    return indexes, seq_scans
+
+
+SEED_SQL = """
+INSERT INTO users (id, email, hashed_password, is_active, is_superuser, created_at)
+SELECT gen_random_uuid(), 'explain-' || :tag || '-' || g || '@example.com', 'x', true, false,
+       now() - g * interval '1 minute'
+FROM generate_series(1, 5000) g;
+
+INSERT INTO categories (id, name, is_active, created_at)
+SELECT gen_random_uuid(), 'explain-' || :tag || '-' || g, g % 10 <> 0,
+       now() - g * interval '1 minute'
+FROM generate_series(1, 5000) g;
+
+WITH owners AS (SELECT array_agg(id) AS ids FROM users WHERE email LIKE 'explain-' || :tag || '-%'),
+     categories AS (
+       SELECT array_agg(id) AS ids FROM categories WHERE name LIKE 'explain-' || :tag || '-%'
+     )
+INSERT INTO designs (id, name, base_price, owner_id, category_id, is_active, created_at)
+SELECT gen_random_uuid(), 'design ' || g, 100, owners.ids[1 + g % 200],
+       categories.ids[1 + g % 2000], g % 10 <> 0, now() - g * interval '1 second'
+FROM generate_series(1, 20000) g, owners, categories;
+
+WITH owners AS (SELECT array_agg(id) AS ids FROM users WHERE email LIKE 'explain-' || :tag || '-%')
+INSERT INTO measurements (id, user_id, measurements, image_paths, processed_at, confidence_score)
+SELECT gen_random_uuid(), owners.ids[1 + g % 200], '{}', '{}', now() - g * interval '1 second', 0.9
+FROM generate_series(1, 20000) g, owners;
+
+ANALYZE users;
+ANALYZE categories;
+ANALYZE designs;
+ANALYZE measurements;
+"""
+
+
+def test_list_queries_use_indexes():
+    """On a seeded dataset every list query shape is answered from its index."""
+    from sqlalchemy import select
+
+    from api.v1.endpoints.admin import USER_PAGE_KEYS
+    from api.v1.endpoints.categories import PAGE_KEYS as CATEGORY_PAGE_KEYS
+    from core.pagination import NEXT, Pagination, encode_cursor
+    from crud import design as design_crud
+    from crud import measurement as measurement_crud
+    from models.category import Category
+    from models.user import User
+
+    def pages(query, keys):
+        """The first offset page and a cursor page starting at ``key``."""
+        first = Pagination(request=None, response=None, skip=0, limit=20, cursor=None)
+        middle = Pagination(
+            request=None,
+            response=None,
+            skip=0,
+            limit=20,
+            cursor=encode_cursor(NEXT, key),
+        )
+        return [first.apply(query, keys), middle.apply(query, keys)]
+
+    with database.engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            connection.execute(text(SEED_SQL), {"tag": uuid.uuid4().hex})
+            # A design 100 rows into the list: its owner, its category and its position
+            owner_id, category_id, created_at, design_id = connection.execute(text(
+                "SELECT owner_id, category_id, created_at, id FROM designs"
+                " WHERE is_active ORDER BY created_at DESC LIMIT 1 OFFSET 100"
+            )).one()
+            key = (created_at, design_id)
+            latest = "SELECT user_id FROM measurements ORDER BY processed_at DESC LIMIT 1"
+            user_id = connection.execute(text(latest)).scalar()
+
+            expected = {
+                "ix_designs_active_created_at_id": pages(
+                    design_crud.designs_query(active_only=True), design_crud.PAGE_KEYS
+                ),
+                "ix_designs_owner_created_at_id": pages(
+                    design_crud.designs_query(owner_id=owner_id), design_crud.PAGE_KEYS
+                ),
+                "ix_designs_category_created_at_id": pages(
+                    design_crud.designs_query(
+                        active_only=True, category_id=category_id
+                    ),
+                    design_crud.PAGE_KEYS,
+                ),
+                "ix_measurements_user_processed_at_id": pages(
+                    measurement_crud.measurements_for_user_query(user_id),
+                    measurement_crud.PAGE_KEYS,
+                ),
+                "ix_categories_active_created_at_id": pages(
+                    select(Category).where(Category.is_active == True),
+                    CATEGORY_PAGE_KEYS,
+                ),
+                "ix_users_created_at_id": pages(select(User), USER_PAGE_KEYS),
+            }
+            for index, statements in expected.items():
+                for statement in statements:
+                    indexes, seq_scans = _index_scans(connection, statement)
+                    assert index in indexes, f"{index} not used by:\n{statement}"
+                    assert not seq_scans, f"Sequential scan of {seq_scans} in:\n{statement}"
+        finally:
+            transaction.rollback()
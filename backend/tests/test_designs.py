@@ -172,6 +172,51 @@ def test_list_designs_with_pagination(client):
     assert isinstance(response.json(), list)
 
 
+def test_list_designs_sparse_fields_are_selected_in_sql(client):
+    """fields= limits both the columns queried and the fields returned."""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+    from core.database import async_engine, engine
+    from models.design import Design
+    from models.user import User
+
+    with Session(engine) as db:
+        admin = db.query(User).filter(User.email == "admin@example.com").one()
+        db.add(
+            Design(
+                name="Sparse grid design",
+                base_price=150,
+                owner_id=admin.id,
+                customization_rules={"a": 1},
+            )
+        )
+        db.commit()
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/api/v1/designs/?limit=2&fields=id,name,base_image_url,base_price")
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    designs = response.json()
+    assert designs and all(
+        set(design) == {"id", "name", "base_image_url", "base_price"}
+        for design in designs
+    )
+    assert "X-Next-Cursor" in response.headers or len(designs) < 2
+    query = next(statement for statement in statements if "FROM designs" in statement)
+    assert "customization_rules" not in query and "description" not in query
+
+    response = client.get("/api/v1/designs/?fields=id,secret")
+    assert response.status_code == 400
+    assert "secret" in response.json()["detail"]
+
+
 def test_list_designs_with_style_filter(client):
     """Test listing designs filtered by style type."""
     response = client.get("/api/v1/designs/?style_type=modern")
@@ -0,0 +1,431 @@
+"""
+Tests for asynchronous measurement jobs.
+
+The job queue is exercised against a minimal in-memory stand-in for the few
+Redis commands it uses, and the AI service is replaced by a mock transport.
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+import time
+
+import httpx
+import pytest
+
+from services import measurement_jobs as jobs_module
+from services.ai_client import ai_client
+from services.blob_store import blob_path, blob_store
+from core.config import settings
+from core.database import SessionLocal
+from crud import asset as asset_crud
+from services.measurement_jobs import (
+    MeasurementJobStatus,
+    WebhookURLError,
+    check_webhook_url,
+    measurement_jobs,
+)
+from services.storage import LocalStorage
+
+
+class InMemoryRedis:
+    """Implements the subset of redis.asyncio.Redis used by the job queue."""
+
+    def __init__(self):
+        self.values = {}
+        self.lists = {}
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def lpush(self, key, value):
+        self.lists.setdefault(key, []).insert(0, value)
+
+    async def lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    async def lrem(self, key, count, value):
+        items = self.lists.get(key, [])
+        if value in items:
+            items.remove(value)
+
+    async def eval(self, script, numkeys, key, token, *args):
+        # Lock refresh and release scripts; expiry is not simulated
+        if self.values.get(key) != token:
+            return 0
+        if script == jobs_module.RELEASE_LOCK_SCRIPT:
+            del self.values[key]
+        return 1
+
+    def pipeline(self, transaction=True):
+        return InMemoryPipeline(self)
+
+
+class InMemoryPipeline:
+    """Buffers commands and applies them to an InMemoryRedis on execute()."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.commands = []
+
+    def __getattr__(self, name):
+        def buffer(*args, **kwargs):
+            self.commands.append((getattr(self.redis, name), args, kwargs))
+            return self
+        return buffer
+
+    async def execute(self):
+        return [await command(*args, **kwargs) for command, args, kwargs in self.commands]
+
+
+def _register_and_login(client):
+    email = f"jobs_{time.time_ns()}@example.com"
+    password = "testpass123"
+    client.post(
+        "/api/v1/auth/register",
+        json={"email": email, "password": password, "first_name": "Job", "last_name": "User"},
+    )
+    token = client.post(
+        "/api/v1/auth/login", data={"username": email, "password": password}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    user_id = client.get("/api/v1/users/me", headers=headers).json()["id"]
+    return headers, user_id
+
+
+def _photo_files():
+    return {
+        f"photo_{view}": (f"{view}.jpg", io.BytesIO(b"fake image content"), "image/jpeg")
+        for view in ("front", "back", "left", "right")
+    }
+
+
+def _mock_ai(monkeypatch, payload):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=payload)
+
+    monkeypatch.setattr(ai_client, "_transport", httpx.MockTransport(handler))
+    monkeypatch.setattr(ai_client, "_client", None)
+
+
+def _stored_photos(monkeypatch, tmp_path):
+    """Store photos in a local storage rooted at tmp_path."""
+    monkeypatch.setattr(blob_store, "storage", LocalStorage(str(tmp_path)))
+    photos, image_paths = {}, {}
+    for view in ("front", "back", "left", "right"):
+        key = f"jobs/{view}.jpg"
+        (tmp_path / "jobs").mkdir(exist_ok=True)
+        (tmp_path / key).write_bytes(b"stored image content")
+        photos[view] = {"path": key, "filename": f"{view}.jpg", "content_type": "image/jpeg"}
+        image_paths[view] = key
+    return photos, image_paths
+
+
+def test_create_job_requires_redis(client):
+    """Without Redis the async endpoint answers 503 instead of queueing."""
+    headers, _ = _register_and_login(client)
+
+    response = client.post(
+        "/api/v1/measurements/jobs",
+        files=_photo_files(),
+        data={"height": 175.0, "weight": 70.0},
+        headers=headers,
+    )
+
+    assert response.status_code == 503
+
+
+def test_job_is_processed_and_webhook_notified(client, monkeypatch, tmp_path):
+    """A queued job is processed into a Measurement and delivered by webhook."""
+    headers, user_id = _register_and_login(client)
+    _mock_ai(
+        monkeypatch,
+        {
+            "status": "success",
+            "data": {
+                "measurements": {
+                    "chest": 98.0,
+                    "waist": 82.0,
+                    "shoulders": 44.0,
+                    "arm_length": 63.0,
+                    "neck": 38.0,
+                    "hip": 97.0,
+                },
+                "confidence": 0.92,
+            },
+        },
+    )
+    delivered = []
+
+    def webhook(request: httpx.Request) -> httpx.Response:
+        delivered.append(request)
+        return httpx.Response(204)
+
+    photos, image_paths = _stored_photos(monkeypatch, tmp_path)
+    monkeypatch.setattr(settings, "MEASUREMENT_WEBHOOK_ALLOWED_HOSTS_STR", "client.example.com")
+    redis = InMemoryRedis()
+
+    async def run():
+        monkeypatch.setattr(
+            measurement_jobs,
+            "_webhook_client",
+            httpx.AsyncClient(transport=httpx.MockTransport(webhook)),
+        )
+        job = await measurement_jobs.enqueue(
+            redis,
+            user_id=user_id,
+            photos=photos,
+            image_paths=image_paths,
+            height=175.0,
+            weight=70.0,
+            webhook_url="https://client.example.com/hooks/measurements",
+        )
+        await measurement_jobs.process(redis, job["job_id"])
+        result = await measurement_jobs.get(redis, job["job_id"])
+        await measurement_jobs.stop()
+        return job, result
+
+    job, result = asyncio.run(run())
+
+    assert redis.lists[jobs_module.QUEUE_KEY] == [job["job_id"]]
+    assert result["status"] == MeasurementJobStatus.COMPLETED
+    assert result["result"]["measurements"]["chest"] == 98.0
+
+    # The Measurement row was written for the job owner
+    measurement = client.get(
+        f"/api/v1/measurements/{result['result']['id']}", headers=headers
+    ).json()
+    assert measurement["image_paths"] == image_paths
+
+    assert len(delivered) == 1
+    assert delivered[0].headers["X-Qeyafa-Signature"].startswith("sha256=")
+
+
+def test_job_fails_after_unsuccessful_ai_status(client, monkeypatch, tmp_path):
+    """An unsuccessful AI response fails the job and removes its photos."""
+    _, user_id = _register_and_login(client)
+    _mock_ai(monkeypatch, {"status": "error", "data": {}})
+    photos, image_paths = _stored_photos(monkeypatch, tmp_path)
+    redis = InMemoryRedis()
+
+    async def run():
+        job = await measurement_jobs.enqueue(
+            redis,
+            user_id=user_id,
+            photos=photos,
+            image_paths=image_paths,
+            height=175.0,
+            weight=70.0,
+        )
+        await measurement_jobs.process(redis, job["job_id"])
+        return await measurement_jobs.get(redis, job["job_id"])
+
+    result = asyncio.run(run())
+
+    assert result["status"] == MeasurementJobStatus.FAILED
+    assert "unsuccessful" in result["error"]
+    assert not any((tmp_path / photo["path"]).exists() for photo in photos.values())
+
+
+def test_failed_job_keeps_photos_uploaded_again_meanwhile(client, monkeypatch, tmp_path):
+    """A failed job only removes the blobs nobody registered after it."""
+    _, user_id = _register_and_login(client)
+    _mock_ai(monkeypatch, {"status": "error", "data": {}})
+    monkeypatch.setattr(blob_store, "storage", LocalStorage(str(tmp_path)))
+    photos = {}
+    db = SessionLocal()
+    try:
+        for view in ("front", "back", "left", "right"):
+            content = os.urandom(256)
+            digest = hashlib.sha256(content).hexdigest()
+            key = blob_path(digest)
+            (tmp_path / key).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / key).write_bytes(content)
+            registered_at = asset_crud.register_asset(
+                db, digest, key, f"{view}.jpg", "image/jpeg", len(content)
+            )
+            photos[view] = {
+                "path": key, "filename": f"{view}.jpg", "content_type": "image/jpeg",
+                "sha256": digest, "created": True, "registered_at": registered_at.isoformat(),
+            }
+        # Another request uploads the front photo again before the job fails
+        front = photos["front"]
+        asset_crud.register_asset(
+            db, front["sha256"], front["path"], "other.jpg", "image/jpeg", 256
+        )
+    finally:
+        db.close()
+
+    redis = InMemoryRedis()
+
+    async def process():
+        job = await measurement_jobs.enqueue(
+            redis,
+            user_id=user_id,
+            photos=photos,
+            image_paths={view: photo["path"] for view, photo in photos.items()},
+            height=175.0,
+            weight=70.0,
+        )
+        await measurement_jobs.process(redis, job["job_id"])
+        return await measurement_jobs.get(redis, job["job_id"])
+
+    assert asyncio.run(process())["status"] == MeasurementJobStatus.FAILED
+    assert {view: (tmp_path / photo["path"]).exists() for view, photo in photos.items()} == {
+        "front": True, "back": False, "left": False, "right": False,
+    }
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "ftp://client.example.com/hook",
+        "http://127.0.0.1:8000/hook",
+        "http://localhost/hook",
+        "http://169.254.169.254/latest/meta-data/",
+        "http://10.0.0.5/hook",
+        "http://[::1]/hook",
+        "http://[::ffff:192.168.1.1]/hook",
+    ],
+)
+def test_webhook_url_to_internal_addresses_is_rejected(url):
+    with pytest.raises(WebhookURLError):
+        asyncio.run(check_webhook_url(url))
+
+
+def test_webhook_url_allowlist(monkeypatch):
+    """Public addresses are allowed unless an allowlist restricts the hosts."""
+    asyncio.run(check_webhook_url("https://93.184.216.34/hook"))
+
+    monkeypatch.setattr(
+        settings,
+        "MEASUREMENT_WEBHOOK_ALLOWED_HOSTS_STR",
+        "hooks.example.com, internal-hooks",
+    )
+    asyncio.run(check_webhook_url("https://hooks.example.com/measurements"))
+    asyncio.run(check_webhook_url("http://internal-hooks:9000/measurements"))
+    with pytest.raises(WebhookURLError):
+        asyncio.run(check_webhook_url("https://93.184.216.34/hook"))
+
+
+def test_job_claimed_by_another_worker_is_not_processed(client, monkeypatch, tmp_path):
+    """A job whose lock is held elsewhere is left untouched."""
+    _, user_id = _register_and_login(client)
+    _mock_ai(monkeypatch, {"status": "error", "data": {}})
+    photos, image_paths = _stored_photos(monkeypatch, tmp_path)
+    redis = InMemoryRedis()
+
+    async def run():
+        job = await measurement_jobs.enqueue(
+            redis,
+            user_id=user_id,
+            photos=photos,
+            image_paths=image_paths,
+            height=175.0,
+            weight=70.0,
+        )
+        redis.values[jobs_module.LOCK_KEY.format(job_id=job["job_id"])] = "other-worker"
+        await measurement_jobs.process(redis, job["job_id"])
+        return await measurement_jobs.get(redis, job["job_id"])
+
+    result = asyncio.run(run())
+
+    assert result["status"] == MeasurementJobStatus.QUEUED
+    assert result["attempts"] == 0
+    assert all((tmp_path / photo["path"]).exists() for photo in photos.values())
+
+
+def test_webhook_is_sent_to_the_checked_address(monkeypatch):
+    """Delivery connects to the address that passed the check instead of resolving again."""
+    delivered = []
+
+    def webhook(request: httpx.Request) -> httpx.Response:
+        delivered.append(request)
+        return httpx.Response(204)
+
+    async def checked(url):
+        return "93.184.216.34"
+
+    monkeypatch.setattr(jobs_module, "check_webhook_url", checked)
+
+    async def run():
+        monkeypatch.setattr(
+            measurement_jobs,
+            "_webhook_client",
+            httpx.AsyncClient(transport=httpx.MockTransport(webhook)),
+        )
+        await measurement_jobs.deliver_webhook(
+            {
+                "job_id": "job",
+                "status": MeasurementJobStatus.COMPLETED,
+                "created_at": "",
+                "updated_at": "",
+                "webhook_url": "https://client.example.com:8443/hooks",
+            }
+        )
+        await measurement_jobs.stop()
+
+    asyncio.run(run())
+
+    [request] = delivered
+    assert str(request.url) == "https://93.184.216.34:8443/hooks"
+    assert request.headers["Host"] == "client.example.com:8443"
+    assert request.extensions["sni_hostname"] == "client.example.com"
+
+
+def test_jobs_of_a_stopped_worker_are_requeued(monkeypatch):
+    """Jobs whose lock has expired are queued again or failed; locked jobs keep their worker."""
+    monkeypatch.setattr(settings, "MEASUREMENT_JOB_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(measurement_jobs, "discard_photos", lambda job: asyncio.sleep(0))
+    redis = InMemoryRedis()
+
+    async def run():
+        jobs = []
+        for attempts, locked in ((1, False), (2, False), (1, True)):
+            job = await measurement_jobs.enqueue(
+                redis, user_id="00000000-0000-0000-0000-000000000000", photos={}, image_paths={},
+                height=175.0, weight=70.0,
+            )
+            # As left by a worker that took the job and died while processing it
+            redis.lists[jobs_module.QUEUE_KEY].remove(job["job_id"])
+            redis.lists.setdefault(jobs_module.PROCESSING_KEY, []).insert(0, job["job_id"])
+            job.update(status=MeasurementJobStatus.PROCESSING, attempts=attempts)
+            await measurement_jobs._store(redis, job)
+            if locked:
+                redis.values[jobs_module.LOCK_KEY.format(job_id=job["job_id"])] = "running-worker"
+            jobs.append(job["job_id"])
+
+        recovered = await measurement_jobs.requeue_stalled(redis)
+        return jobs, recovered, [await measurement_jobs.get(redis, job_id) for job_id in jobs]
+
+    (retried, failed, running), recovered, (retried_job, failed_job, running_job) = (
+        asyncio.run(run())
+    )
+
+    assert recovered == 2
+    assert retried_job["status"] == MeasurementJobStatus.QUEUED
+    assert redis.lists[jobs_module.QUEUE_KEY] == [retried]
+    assert failed_job["status"] == MeasurementJobStatus.FAILED
+    assert failed_job["error"] == "Worker stopped while processing the job"
+    # The job whose worker still holds its lock keeps it
+    assert running_job["status"] == MeasurementJobStatus.PROCESSING
+    assert redis.lists[jobs_module.PROCESSING_KEY] == [running]
+    # The requeuer released the locks it took
+    assert not any(
+        jobs_module.LOCK_KEY.format(job_id=job_id) in redis.values
+        for job_id in (retried, failed)
+    )
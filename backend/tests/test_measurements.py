@@ -5,10 +5,12 @@ Note: These tests require a running database and AI service.
 Run with: pytest tests/test_measurements.py
 """
 
+import hashlib
 import io
+import uuid
 
 
-
+import pytest
 from fastapi.testclient import TestClient
 from main import app
 import redis.asyncio as redis
@@ -197,3 +199,535 @@ def test_process_measurements_missing_data(client):
 
     # Should fail with 422 (validation error)
     assert response.status_code == 422
+
+
+def _stored_files():
+    """All files currently in the (local) upload storage."""
+    from services.storage import storage
+
+    return {
+        os.path.join(root, name)
+        for root, _, names in os.walk(storage.root)
+        for name in names
+    }
+
+
+def _mock_ai_service(monkeypatch, received):
+    """Route the shared AI client to an in-process mock of the AI service."""
+    import httpx
+    from services.ai_client import ai_client
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        received.append(request.content)
+        return httpx.Response(
+            200,
+            json={
+                "status": "success",
+                "data": {
+                    "measurements": {
+                        "chest": 98.0,
+                        "waist": 82.0,
+                        "shoulders": 44.0,
+                        "arm_length": 63.0,
+                        "neck": 38.0,
+                        "hip": 97.0,
+                    },
+                    "confidence": 0.92,
+                },
+            },
+        )
+
+    monkeypatch.setattr(ai_client, "_transport", httpx.MockTransport(handler))
+    monkeypatch.setattr(ai_client, "_client", None)
+
+
+def test_process_measurements_streams_photos(client, monkeypatch):
+    """Photos are saved to storage and streamed from there to the AI service."""
+    from services.blob_store import blob_store
+    from services.storage import storage
+
+    received = []
+    _mock_ai_service(monkeypatch, received)
+    read_chunks = {}
+    read = blob_store.read
+
+    async def counting_read(path):
+        read_chunks[path] = 0
+        async for chunk in read(path):
+            read_chunks[path] += 1
+            yield chunk
+
+    monkeypatch.setattr(blob_store, "read", counting_read)
+    token = get_auth_token(client)
+
+    contents = {name: os.urandom(200 * 1024) for name in ("front", "back", "left", "right")}
+    files = {
+        f"photo_{name}": (f"{name}.jpg", io.BytesIO(data), "image/jpeg")
+        for name, data in contents.items()
+    }
+
+    response = client.post(
+        "/api/v1/measurements/process",
+        files=files,
+        data={"height": 175.0, "weight": 70.0},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["measurements"]["chest"] == 98.0
+
+    # The AI service received every photo and the form fields
+    body = received[0]
+    assert b'name="height"' in body
+    for name, data in contents.items():
+        assert f'name="photo_{name}"; filename="{name}.jpg"'.encode() in body
+        assert data in body
+
+    # The same bytes were persisted in storage
+    measurement_id = response.json()["id"]
+    stored = client.get(
+        f"/api/v1/measurements/{measurement_id}",
+        headers={"Authorization": f"Bearer {token}"},
+    ).json()
+    for name, data in contents.items():
+        path = storage.path(stored["image_paths"][name])
+        with open(path, "rb") as fh:
+            assert fh.read() == data
+
+    # ...and streamed back from storage in chunks rather than read whole
+    assert set(read_chunks) == set(stored["image_paths"].values())
+    assert all(count > 1 for count in read_chunks.values())
+
+
+def test_process_measurements_rejects_oversized_photo(client, monkeypatch):
+    """Oversized photos are rejected with 413 and partial files are removed."""
+    from api.v1.endpoints import measurements as measurements_module
+
+    _mock_ai_service(monkeypatch, [])
+    monkeypatch.setattr(measurements_module, "MAX_FILE_SIZE", 64 * 1024)
+    token = get_auth_token(client)
+    files_before = _stored_files()
+
+    files = {
+        "photo_front": ("front.jpg", io.BytesIO(b"x" * 1024), "image/jpeg"),
+        "photo_back": ("back.jpg", io.BytesIO(b"x" * (256 * 1024)), "image/jpeg"),
+        "photo_left": ("left.jpg", io.BytesIO(b"x" * 1024), "image/jpeg"),
+        "photo_right": ("right.jpg", io.BytesIO(b"x" * 1024), "image/jpeg"),
+    }
+
+    response = client.post(
+        "/api/v1/measurements/process",
+        files=files,
+        data={"height": 175.0, "weight": 70.0},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 413
+    assert _stored_files() == files_before
+
+
+def test_upload_photos_cleans_up_on_partial_failure(client, monkeypatch):
+    """If one of the concurrent saves fails, the other photos are removed."""
+    from api.v1.endpoints import measurements as measurements_module
+
+    monkeypatch.setattr(measurements_module, "MAX_FILE_SIZE", 64 * 1024)
+    token = get_auth_token(client)
+    files_before = _stored_files()
+
+    files = {
+        "photo_front": ("front.jpg", io.BytesIO(b"x" * 1024), "image/jpeg"),
+        "photo_back": ("back.jpg", io.BytesIO(b"x" * 1024), "image/jpeg"),
+        "photo_left": ("left.jpg", io.BytesIO(b"x" * (256 * 1024)), "image/jpeg"),
+        "photo_right": ("right.jpg", io.BytesIO(b"x" * 1024), "image/jpeg"),
+    }
+
+    response = client.post(
+        "/api/v1/measurements/upload",
+        files=files,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 413
+    assert _stored_files() == files_before
+
+
+def test_upload_photos_cleans_up_when_storing_a_blob_fails(client, monkeypatch):
+    """If one photo cannot be moved to the blob store, the others' blobs and rows are removed."""
+    from core.database import SessionLocal
+    from crud import asset as asset_crud
+    from services.blob_store import blob_store
+
+    token = get_auth_token(client)
+    files_before = _stored_files()
+    contents = {name: os.urandom(1024) for name in ("front", "back", "left", "right")}
+    failing = hashlib.sha256(contents["left"]).hexdigest()
+    commit = blob_store.commit
+
+    async def flaky_commit(temp_file, digest, content_type=None):
+        if digest == failing:
+            raise OSError("storage unavailable")
+        return await commit(temp_file, digest, content_type)
+
+    monkeypatch.setattr(blob_store, "commit", flaky_commit)
+
+    response = client.post(
+        "/api/v1/measurements/upload",
+        files={
+            f"photo_{name}": (f"{name}.jpg", io.BytesIO(data), "image/jpeg")
+            for name, data in contents.items()
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 500
+    assert _stored_files() == files_before
+    db = SessionLocal()
+    try:
+        for name, data in contents.items():
+            asset = asset_crud.get_asset_by_digest(db, hashlib.sha256(data).hexdigest())
+            # The row of the photo that failed is left to the garbage collector
+            assert (asset is not None) == (name == "left")
+    finally:
+        db.close()
+
+
+class _CacheRedis:
+    """The get/set subset of redis.asyncio.Redis used by the AI result cache."""
+
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+
+def test_process_measurements_reuses_cached_result(client, monkeypatch):
+    """Resubmitting the same photos is answered from the result cache."""
+    from api.v1.endpoints import measurements as measurements_module
+    from core.metrics import metrics
+
+    received = []
+    _mock_ai_service(monkeypatch, received)
+    cache = _CacheRedis()
+    monkeypatch.setattr(measurements_module, "get_redis", lambda: cache)
+    token = get_auth_token(client)
+    hits_before = metrics.get("ai_result_cache.hits")
+
+    contents = {name: os.urandom(1024) for name in ("front", "back", "left", "right")}
+
+    def post(height):
+        return client.post(
+            "/api/v1/measurements/process",
+            files={
+                f"photo_{name}": (f"{name}.jpg", io.BytesIO(data), "image/jpeg")
+                for name, data in contents.items()
+            },
+            data={"height": height, "weight": 70.0},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    first = post(175.0)
+    retry = post(175.0)
+
+    assert first.status_code == 200
+    assert retry.status_code == 200
+    assert retry.json()["measurements"] == first.json()["measurements"]
+    assert retry.json()["id"] != first.json()["id"]
+    assert len(received) == 1
+    assert metrics.get("ai_result_cache.hits") == hits_before + 1
+
+    # Different inputs are not served from the cache
+    assert post(180.0).status_code == 200
+    assert len(received) == 2
+
+
+def test_identical_photos_are_stored_once(client, monkeypatch):
+    """Uploads are content-addressed, deduplicated and reference counted."""
+    from services.storage import storage
+    from core.database import SessionLocal
+    from crud import asset as asset_crud
+
+    _mock_ai_service(monkeypatch, [])
+    token = get_auth_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    photo = os.urandom(4096)
+
+    def files():
+        return {
+            f"photo_{name}": (f"{name}.jpg", io.BytesIO(photo), "image/jpeg")
+            for name in ("front", "back", "left", "right")
+        }
+
+    uploaded = client.post("/api/v1/measurements/upload", files=files(), headers=headers)
+    processed = client.post(
+        "/api/v1/measurements/process",
+        files=files(),
+        data={"height": 175.0, "weight": 70.0},
+        headers=headers,
+    )
+
+    assert uploaded.status_code == 200
+    assert processed.status_code == 200
+
+    # Every view of both requests points at the same blob
+    measurement_id = processed.json()["id"]
+    image_paths = client.get(
+        f"/api/v1/measurements/{measurement_id}", headers=headers
+    ).json()["image_paths"]
+    paths = set(uploaded.json()["image_paths"].values()) | set(image_paths.values())
+    assert len(paths) == 1
+    path = paths.pop()
+    digest = hashlib.sha256(photo).hexdigest()
+    assert path.endswith(digest)
+    with open(storage.path(path), "rb") as fh:
+        assert fh.read() == photo
+
+    db = SessionLocal()
+    try:
+        assert asset_crud.get_asset_by_digest(db, digest).ref_count == 4
+
+        assert (
+            client.delete(
+                f"/api/v1/measurements/{measurement_id}", headers=headers
+            ).status_code
+            == 204
+        )
+        db.expire_all()
+        assert asset_crud.get_asset_by_digest(db, digest).ref_count == 0
+    finally:
+        db.close()
+
+
+def test_failed_request_keeps_photos_uploaded_again_meanwhile(client, monkeypatch):
+    """A failing request does not remove a blob a concurrent upload registered after it."""
+    import httpx
+    from services.ai_client import ai_client
+    from services.blob_store import blob_path
+    from services.storage import storage
+    from core.database import SessionLocal
+    from crud import asset as asset_crud
+
+    headers = {"Authorization": f"Bearer {get_auth_token(client)}"}
+    uploaded_again, discarded = os.urandom(4096), os.urandom(4096)
+
+    def fail(request: httpx.Request) -> httpx.Response:
+        if uploaded_again in request.content:
+            # Another request stores the same bytes while this one is processed
+            db = SessionLocal()
+            try:
+                digest = hashlib.sha256(uploaded_again).hexdigest()
+                asset_crud.register_asset(
+                    db,
+                    digest,
+                    blob_path(digest),
+                    "other.jpg",
+                    "image/jpeg",
+                    len(uploaded_again),
+                )
+            finally:
+                db.close()
+        return httpx.Response(200, json={"status": "error", "data": {}})
+
+    monkeypatch.setattr(ai_client, "_transport", httpx.MockTransport(fail))
+    monkeypatch.setattr(ai_client, "_client", None)
+
+    db = SessionLocal()
+    try:
+        for photo, kept in ((uploaded_again, True), (discarded, False)):
+            response = client.post(
+                "/api/v1/measurements/process",
+                files={
+                    f"photo_{name}": (f"{name}.jpg", io.BytesIO(photo), "image/jpeg")
+                    for name in ("front", "back", "left", "right")
+                },
+                data={"height": 175.0, "weight": 70.0},
+                headers=headers,
+            )
+            assert response.status_code == 500
+            digest = hashlib.sha256(photo).hexdigest()
+            db.expire_all()
+            assert (asset_crud.get_asset_by_digest(db, digest) is not None) == kept
+            assert os.path.exists(storage.path(blob_path(digest))) == kept
+    finally:
+        db.close()
+
+
+def test_referencing_a_deleted_blob_fails():
+    """Referencing a blob without an asset row raises instead of silently counting nothing."""
+    from core.database import SessionLocal
+    from crud import asset as asset_crud
+    from services.blob_store import blob_path
+
+    db = SessionLocal()
+    try:
+        with pytest.raises(asset_crud.MissingAssetError):
+            asset_crud.acquire_assets(
+                db, {"front": blob_path(hashlib.sha256(os.urandom(16)).hexdigest())}
+            )
+        db.rollback()
+    finally:
+        db.close()
+
+
+def test_download_measurement_photo(client, monkeypatch):
+    """Owners can download a measurement's photos; other users cannot."""
+    _mock_ai_service(monkeypatch, [])
+    token = get_auth_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    photos = {name: os.urandom(1024) for name in ("front", "back", "left", "right")}
+
+    processed = client.post(
+        "/api/v1/measurements/process",
+        files={
+            f"photo_{name}": (f"{name}.jpg", io.BytesIO(content), "image/jpeg")
+            for name, content in photos.items()
+        },
+        data={"height": 175.0, "weight": 70.0},
+        headers=headers,
+    )
+    assert processed.status_code == 200
+    measurement_id = processed.json()["id"]
+
+    response = client.get(f"/api/v1/measurements/{measurement_id}/photos/left", headers=headers)
+    assert response.status_code == 200
+    assert response.content == photos["left"]
+    assert response.headers["content-type"] == "image/jpeg"
+
+    missing = client.get(f"/api/v1/measurements/{measurement_id}/photos/top", headers=headers)
+    assert missing.status_code == 404
+    unauthenticated = client.get(f"/api/v1/measurements/{measurement_id}/photos/left")
+    assert unauthenticated.status_code == 401
+
+
+def test_process_measurements_does_not_stall_event_loop(client, monkeypatch):
+    """Requests waiting on the database leave the event loop free for others."""
+    import threading
+    import time
+    import httpx
+    from sqlalchemy import text
+    from core.database import engine
+
+    lock_seconds = 0.5
+    _mock_ai_service(monkeypatch, [])
+    headers = {"Authorization": f"Bearer {get_auth_token(client)}"}
+    photo = os.urandom(2048)
+    digest = hashlib.sha256(photo).hexdigest()
+
+    def files():
+        return {
+            f"photo_{name}": (f"{name}.jpg", io.BytesIO(photo), "image/jpeg")
+            for name in ("front", "back", "left", "right")
+        }
+
+    response = client.post("/api/v1/measurements/upload", files=files(), headers=headers)
+    assert response.status_code == 200
+
+    # Another transaction locks the photo's asset row, so every request
+    # below waits on Postgres for about lock_seconds
+    lock_held = threading.Event()
+
+    def hold_lock():
+        with engine.connect() as conn:
+            conn.execute(
+                text("SELECT 1 FROM assets WHERE sha256 = :digest FOR UPDATE"),
+                {"digest": digest},
+            )
+            lock_held.set()
+            time.sleep(lock_seconds)
+            conn.rollback()
+
+    async def run():
+        stalls = []
+
+        async def monitor():
+            while True:
+                started = time.perf_counter()
+                await asyncio.sleep(0.01)
+                stalls.append(time.perf_counter() - started - 0.01)
+
+        monitor_task = asyncio.create_task(monitor())
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=client.app), base_url="http://test"
+        ) as async_client:
+            responses = await asyncio.gather(*(
+                async_client.post(
+                    "/api/v1/measurements/process",
+                    files=files(),
+                    data={"height": 175.0, "weight": 70.0},
+                    headers=headers,
+                )
+                for _ in range(4)
+            ))
+        monitor_task.cancel()
+        return responses, max(stalls)
+
+    locker = threading.Thread(target=hold_lock)
+    locker.start()
+    assert lock_held.wait(5)
+    started = time.perf_counter()
+    try:
+        responses, max_stall = asyncio.run(run())
+    finally:
+        locker.join()
+
+    assert [response.status_code for response in responses] == [200] * 4
+    assert time.perf_counter() - started >= lock_seconds * 0.8
+    assert max_stall < lock_seconds / 2
+
+
+def test_list_measurements_cursor_pagination(client):
+    """Cursor pages neither skip nor repeat rows when new rows arrive while scrolling."""
+    email = f"cursor_{uuid.uuid4().hex}@example.com"
+    client.post("/api/v1/auth/register", json={"email": email, "password": "testpass123"})
+    token = client.post(
+        "/api/v1/auth/login", data={"username": email, "password": "testpass123"}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def create(chest):
+        response = client.post(
+            "/api/v1/measurements/",
+            json={"measurements": {"chest": chest}},
+            headers=headers,
+        )
+        assert response.status_code == 201
+        return response.json()["id"]
+
+    created = [create(80.0 + i) for i in range(5)]
+
+    first = client.get("/api/v1/measurements/?limit=2", headers=headers)
+    assert [m["id"] for m in first.json()] == [created[4], created[3]]
+    assert "X-Prev-Cursor" not in first.headers
+    assert 'rel="next"' in first.headers["Link"]
+
+    # A new measurement shifts offset pages, but not cursor pages
+    create(99.0)
+    second = client.get(
+        "/api/v1/measurements/",
+        params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]},
+        headers=headers,
+    )
+    assert [m["id"] for m in second.json()] == [created[2], created[1]]
+    third = client.get(
+        "/api/v1/measurements/",
+        params={"limit": 2, "cursor": second.headers["X-Next-Cursor"]},
+        headers=headers,
+    )
+    assert [m["id"] for m in third.json()] == [created[0]]
+    assert "X-Next-Cursor" not in third.headers
+
+    back = client.get(
+        "/api/v1/measurements/",
+        params={"limit": 2, "cursor": third.headers["X-Prev-Cursor"]},
+        headers=headers,
+    )
+    assert back.json() == second.json()
+    assert back.headers["X-Prev-Cursor"]
+
+    invalid = client.get(
+        "/api/v1/measurements/", params={"cursor": "not-a-cursor"}, headers=headers
+    )
+    assert invalid.status_code == 400